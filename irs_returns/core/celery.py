@@ -1,6 +1,8 @@
+import gc
 import os
 
 from celery import Celery
+from celery.signals import worker_init
 
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings.local")
@@ -15,3 +17,18 @@ app.config_from_object("django.conf:settings", namespace="CELERY")
 
 # Load task modules from all registered Django apps.
 app.autodiscover_tasks()
+
+
+@worker_init.connect
+def warm_up_worker(**kwargs):
+    """
+    Preload parser state in the worker's parent process before it forks its pool.
+
+    Children then share the compiled parser state copy-on-write instead of each building it on their first task.
+    Freezing the garbage collector keeps collections in the children from writing to (and so copying) those pages.
+    """
+    # Imported here since Django is only set up once the worker starts
+    from organizations.parsers.warmup import warm_up_parsers
+
+    warm_up_parsers()
+    gc.freeze()
@@ -0,0 +1,63 @@
+"""
+Routing of reads to the read replicas in DATABASE_REPLICAS.
+
+Reads go to the primary (`default`) unless they run within read_from_replica(), which the REST API wraps read-only
+requests in (see rest_api.middleware). The replica is picked once for the whole block, so that the queries of a request
+see the same snapshot even with several replicas lagging by different amounts. Writes always go to the primary, and so
+do dataset jobs, management commands and the admin, which never run within read_from_replica().
+
+The block is tracked in a context variable rather than a thread local, so that it also applies to the queries async
+views run in other threads through sync_to_async.
+"""
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+import random
+
+from django.conf import settings
+
+# Alias of the database reads are routed to, None for the primary
+_read_database: ContextVar[str | None] = ContextVar("read_database", default=None)
+
+
+@contextmanager
+def read_from_replica() -> Iterator[None]:
+    """Route the reads of a block to one of the replicas, or to the primary if there are none."""
+    replicas = settings.DATABASE_REPLICAS
+    token = _read_database.set(random.choice(replicas) if replicas else None)  # noqa: S311
+    try:
+        yield
+    finally:
+        _read_database.reset(token)
+
+
+@contextmanager
+def read_from_primary() -> Iterator[None]:
+    """Route the reads of a block to the primary, e.g. within a request whose reads would go to a replica otherwise."""
+    token = _read_database.set(None)
+    try:
+        yield
+    finally:
+        _read_database.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return _read_database.get() or "default"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replicas hold the same rows as the primary
+        databases = {"default", *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get the schema from the primary through replication
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
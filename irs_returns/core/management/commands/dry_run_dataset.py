@@ -0,0 +1,84 @@
+import json
+from pathlib import Path
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from organizations.datasets import process_dataset
+from organizations.downloads import download_file
+from organizations.parse_report import ParseReport
+
+
+class Command(BaseCommand):
+    help = (
+        "Parse dataset ZIP files without writing to the database, and report the parse throughput, the number of "
+        "files handled by each strategy, why files were skipped and how often each field is filled"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("zip", nargs="+", help="Path or URL of a dataset ZIP file")
+        parser.add_argument(
+            "--index",
+            help="Path or URL of an IRS filing index CSV, to only parse the filings that were not ingested yet",
+        )
+        parser.add_argument("--output", help="Write the report as JSON to this file instead of printing a summary")
+
+    def handle(self, *args, **options):
+        report = ParseReport()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_dir = Path(temp_dir)
+            index_path = self._get_file(options["index"], temp_dir / "index.csv", report) if options["index"] else None
+            for i, zip_location in enumerate(options["zip"]):
+                zip_path = self._get_file(zip_location, temp_dir / f"dataset_{i}.zip", report)
+                extract_dir = temp_dir / f"dataset_{i}"
+                extract_dir.mkdir()
+                process_dataset(
+                    zip_path.as_posix(),
+                    extract_dir.as_posix(),
+                    index_path=index_path.as_posix() if index_path else None,
+                    dry_run=True,
+                    report=report,
+                )
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(report.as_dict(), f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Wrote the report to {options['output']}."))
+        else:
+            self._write_summary(report.as_dict())
+
+    def _get_file(self, location: str, download_path: Path, report: ParseReport) -> Path:
+        """Download a file if given a URL, otherwise use the local file."""
+        if not location.startswith(("http://", "https://")):
+            return Path(location)
+
+        self.stdout.write(f"Downloading {location}...")
+        start = time.perf_counter()
+        download_file(location, download_path)
+        report.download_seconds += time.perf_counter() - start
+        return download_path
+
+    def _write_summary(self, report: dict) -> None:
+        self.stdout.write(
+            f"Parsed {report['files']} files ({report['megabytes']} MB) in {report['parse_seconds']}s: "
+            f"{report['files_per_second']} files/s, {report['megabytes_per_second']} MB/s"
+        )
+        self.stdout.write(
+            f"Total {report['total_seconds']}s, of which {report['extract_seconds']}s extracting "
+            f"(plus {report['download_seconds']}s downloading)"
+        )
+        for title, counts in [
+            ("Strategies", report["strategies"]),
+            ("Skipped", report["skipped"]),
+            ("Parsed but not saved", report["not_saved"]),
+        ]:
+            if counts:
+                self.stdout.write(f"{title}:")
+                for name, count in counts.items():
+                    self.stdout.write(f"  {name}: {count}")
+        for strategy_name, fill_rates in report["fill_rates"].items():
+            self.stdout.write(f"Fill rates ({strategy_name}):")
+            for field, fill_rate in fill_rates.items():
+                self.stdout.write(f"  {field}: {fill_rate:.1%}")
+        self.stdout.write(self.style.SUCCESS("Dry run complete, nothing was written to the database."))
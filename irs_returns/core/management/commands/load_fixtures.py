@@ -1,24 +1,72 @@
-from datetime import date
-
-from django.core.management.base import BaseCommand
+from datetime import date, timedelta
+from decimal import Decimal
+import random
+import time
+from typing import Any
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, connection, models, transaction
+from django.utils import timezone
 from faker import Faker
 
-from organizations.models import Organization, OrganizationReturnInformation
+from organizations.financial_metrics import refresh_derived_metrics
+from organizations.models import (
+    ArchivedFiling,
+    DeletedRecord,
+    Organization,
+    OrganizationReturnInformation,
+    PercentileIndex,
+    ReturnStatistic,
+)
+from organizations.parsers import PARSER_VERSION
+from organizations.partitions import ensure_partition
+from organizations.search import update_search_vectors
+from organizations.statistics import refresh_return_statistics
+from organizations.summaries import LATEST_RETURN_FIELDS
 from users.models import User
 
+# Organization type suffixes for variety
+ORG_TYPES = [
+    "Foundation",
+    "Alliance",
+    "Initiative",
+    "Society",
+    "Network",
+    "Coalition",
+    "Association",
+    "Council",
+    "Institute",
+    "Center",
+]
 
-class Command(BaseCommand):
-    help = "Load sample fixtures for User and Organization models"
+# Return types and how often organizations file them
+RETURN_TYPES = ["990", "990EZ", "990PF"]
+RETURN_TYPE_WEIGHTS = [6, 3, 1]
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.fake = Faker()
+# Number of Faker company names, domains and mission statements generated up front. Calling Faker for every row would
+# dominate the load time of millions of organizations.
+FAKER_POOL_SIZE = 2000
+
+# Largest amount that fits the returns' decimal fields
+MAX_AMOUNT = 10**11
+
+
+def _amount(value: float) -> Decimal:
+    return Decimal(f"{min(value, MAX_AMOUNT):.2f}")
+
+
+class Command(BaseCommand):
+    help = (
+        "Load sample users, organizations and multi-year returns. Organizations and returns are written in batches, "
+        "so millions of them can be generated for load tests, and --seed makes the generated data reproducible."
+    )
 
     def add_arguments(self, parser):
         parser.add_argument(
             "--clear",
             action="store_true",
-            help="Clear existing data before loading fixtures",
+            help="Clear existing organizations, returns, statistics and non-superuser users before loading fixtures",
         )
         parser.add_argument(
             "--users",
@@ -32,13 +80,53 @@ class Command(BaseCommand):
             default=10,
             help="Number of organizations to create (default: 10)",
         )
+        parser.add_argument(
+            "--years",
+            type=int,
+            default=3,
+            help="Number of consecutive tax years each organization files a return for (default: 3)",
+        )
+        parser.add_argument(
+            "--last-tax-year",
+            type=int,
+            default=date.today().year,
+            help="Tax year of the most recent returns (default: the current year)",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            help=(
+                "Seed of the random data. The same seed generates the same organizations and returns, ids included, "
+                "so it is meant to be used with --clear."
+            ),
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Number of organizations written per batch, along with their returns (default: 5000)",
+        )
+        parser.add_argument(
+            "--copy",
+            action="store_true",
+            help="Write rows with Postgres' COPY instead of bulk INSERTs, which is faster for large loads",
+        )
 
     def handle(self, *args, **options):
+        if options["copy"] and connection.vendor != "postgresql":
+            raise CommandError("--copy is only supported on Postgres.")
+        if options["years"] < 1 or options["batch_size"] < 1:
+            raise CommandError("--years and --batch-size must be at least 1.")
+
+        seed = options["seed"] if options["seed"] is not None else random.randrange(2**32)
+        self.rng = random.Random(seed)
+        self.fake = Faker()
+        self.fake.seed_instance(seed)
+        self.stdout.write(f"Using seed {seed}. Pass --seed {seed} to generate the same data again.")
+
         if options["clear"]:
             self.stdout.write(self.style.WARNING("Clearing existing data..."))
-            OrganizationReturnInformation.objects.all().delete()
-            Organization.objects.all().delete()
-            User.objects.filter(is_superuser=False).delete()
+            self._clear()
             self.stdout.write(self.style.SUCCESS("Existing data cleared."))
 
         # Create sample users
@@ -46,18 +134,56 @@ class Command(BaseCommand):
         users = self._create_users(options["users"])
         self.stdout.write(self.style.SUCCESS(f"Created {len(users)} users."))
 
-        # Create sample organizations
-        self.stdout.write(f"Creating {options['organizations']} sample organizations...")
-        organizations = self._create_organizations(options["organizations"])
-        self.stdout.write(self.style.SUCCESS(f"Created {len(organizations)} organizations."))
-
-        # Create sample organization returns
-        self.stdout.write("Creating sample organization returns...")
-        returns = self._create_organization_returns(organizations)
-        self.stdout.write(self.style.SUCCESS(f"Created {len(returns)} organization returns."))
+        # Create sample organizations and their returns
+        started_at = timezone.now()
+        tax_years = list(range(options["last_tax_year"] - options["years"] + 1, options["last_tax_year"] + 1))
+        self.stdout.write(
+            f"Creating {options['organizations']:,} sample organizations with returns for tax years "
+            f"{tax_years[0]}-{tax_years[-1]}..."
+        )
+        organizations, returns = self._create_organizations(
+            options["organizations"],
+            tax_years,
+            options["batch_size"],
+            skip_existing_names=not options["clear"],
+            use_copy=options["copy"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Created {organizations:,} organizations and {returns:,} returns."))
+
+        # Latest return summaries are set while generating, but search vectors, derived metrics and statistics are
+        # computed like after a dataset job.
+        self.stdout.write("Refreshing search vectors, derived metrics and return statistics...")
+        update_search_vectors(since=started_at)
+        refresh_derived_metrics(since=started_at)
+        cohorts = refresh_return_statistics(since=started_at)
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {Organization._meta.db_table}, {OrganizationReturnInformation._meta.db_table}")
+        self.stdout.write(self.style.SUCCESS(f"Refreshed statistics for {cohorts} cohorts."))
 
         self.stdout.write(self.style.SUCCESS("\nFixtures loaded successfully!"))
 
+    def _clear(self):
+        """Empty the organization tables at once instead of deleting (and cascading) row by row."""
+        tables = [
+            model._meta.db_table
+            for model in [
+                OrganizationReturnInformation,
+                Organization,
+                ReturnStatistic,
+                PercentileIndex,
+                DeletedRecord,
+                ArchivedFiling,
+            ]
+        ]
+        with transaction.atomic(), connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute(f"TRUNCATE {', '.join(tables)}")
+            else:
+                for table in tables:
+                    cursor.execute(f"DELETE FROM {table}")  # noqa: S608
+        User.objects.filter(is_superuser=False).delete()
+
     def _create_users(self, count):
         """Create sample user accounts using Faker."""
         created_users = []
@@ -110,122 +236,160 @@ class Command(BaseCommand):
 
         return created_users
 
-    def _create_organizations(self, count):
-        """Create sample organizations using Faker."""
-        created_organizations = []
-
-        # Organization type suffixes for variety
-        org_types = [
-            "Foundation",
-            "Alliance",
-            "Initiative",
-            "Society",
-            "Network",
-            "Coalition",
-            "Association",
-            "Council",
-            "Institute",
-            "Center",
-        ]
-
-        for _ in range(count):
-            # Generate organization name
-            org_name = f"{self.fake.company()} {self.fake.random_element(org_types)}"
-            # Ensure unique name
-            while Organization.objects.filter(name=org_name).exists():
-                org_name = f"{self.fake.company()} {self.fake.random_element(org_types)}"
-
-            # Generate website URL
-            domain = self.fake.domain_name()
-            website_url = f"https://{domain}"
-
-            # Generate mission description
-            mission = self.fake.text(max_nb_chars=200)
+    def _create_organizations(
+        self,
+        count: int,
+        tax_years: list[int],
+        batch_size: int,
+        skip_existing_names: bool,
+        use_copy: bool,
+    ) -> tuple[int, int]:
+        """
+        Generate organizations and their returns, and write them in batches.
+
+        Args:
+            count: Number of organizations to create
+            tax_years: Tax years each organization files a return for, in ascending order
+            batch_size: Number of organizations written per batch
+            skip_existing_names: Avoid the names of organizations that are already in the database
+            use_copy: Write rows with COPY instead of bulk_create
+
+        Returns:
+            Number of organizations and returns created
+        """
+        company_names = [self.fake.company() for _ in range(FAKER_POOL_SIZE)]
+        domains = [self.fake.domain_name() for _ in range(FAKER_POOL_SIZE)]
+        missions = []
+        for _ in range(FAKER_POOL_SIZE):
             # Make it sound more like a mission statement
-            mission = mission.capitalize()
-            if not mission.endswith("."):
-                mission += "."
-
-            org, created = Organization.objects.get_or_create(
-                name=org_name,
-                defaults={
-                    "website_url": website_url,
-                    "mission_description": mission,
-                },
+            mission = self.fake.text(max_nb_chars=200).capitalize()
+            missions.append(mission if mission.endswith(".") else f"{mission}.")
+
+        # Names are made unique in memory rather than by querying the database for every candidate
+        names: set[str] = set()
+        if skip_existing_names:
+            names.update(Organization.objects.values_list("name", flat=True).iterator(chunk_size=10000))
+
+        for year in tax_years:
+            ensure_partition(date(year, 12, 31))
+
+        write = self._copy if use_copy else self._bulk_create
+        start = time.perf_counter()
+        created_organizations = created_returns = 0
+        while created_organizations < count:
+            organizations = []
+            returns = []
+            for _ in range(min(batch_size, count - created_organizations)):
+                name = f"{self.rng.choice(company_names)} {self.rng.choice(ORG_TYPES)}"
+                suffix = 1
+                while name in names:
+                    suffix += 1
+                    name = f"{name.rsplit(' #', 1)[0]} #{suffix}"
+                names.add(name)
+
+                organization = {
+                    "id": self._uuid(),
+                    "name": name,
+                    "website_url": f"https://{self.rng.choice(domains)}",
+                    "mission_description": self.rng.choice(missions),
+                }
+                organization_returns = self._generate_returns(organization["id"], tax_years)
+                # Set the latest return summary right away instead of refreshing it from the database afterwards
+                latest_return = organization_returns[-1]
+                organization["latest_return_id"] = latest_return["id"]
+                organization["latest_tax_year"] = latest_return["tax_period_end_date"].year
+                for field in LATEST_RETURN_FIELDS:
+                    # Derived metrics are missing until they are refreshed after loading
+                    organization[f"latest_{field}"] = latest_return.get(field)
+                organizations.append(organization)
+                returns.extend(organization_returns)
+
+            try:
+                with transaction.atomic():
+                    write(Organization, organizations)
+                    write(OrganizationReturnInformation, returns)
+            except IntegrityError as e:
+                raise CommandError(
+                    "Some of the generated organizations already exist, most likely because they were loaded with the "
+                    "same seed. Use --clear or another --seed."
+                ) from e
+
+            created_organizations += len(organizations)
+            created_returns += len(returns)
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f"  {created_organizations:,}/{count:,} organizations ({created_organizations / elapsed:,.0f}/s)"
             )
-            if created:
-                created_organizations.append(org)
-            else:
-                self.stdout.write(
-                    self.style.WARNING(f"Organization '{org.name}' already exists, skipping."),
-                )
-
-        return created_organizations
-
-    def _create_organization_returns(self, organizations):
-        """Create sample organization return information using Faker."""
-        created_returns = []
-        current_year = date.today().year
-
-        for org in organizations:
-            # Create returns for the last 3 years
-            for year_offset in range(3):
-                tax_year = current_year - year_offset
-                tax_period_start = date(tax_year, 1, 1)
-                tax_period_end = date(tax_year, 12, 31)
-
-                # Generate random filed date between April and June of next year
-                filed_on = self.fake.date_between(
-                    start_date=date(tax_year + 1, 4, 1),
-                    end_date=date(tax_year + 1, 6, 30),
-                )
-
-                # Generate realistic financial data using Faker
-                # Base revenue varies by organization size (simulated)
-                base_revenue = self.fake.random_int(min=100000, max=2000000)
-                revenue_multiplier = 1.0 + (year_offset * self.fake.random.uniform(0.05, 0.15))
-                total_revenue = base_revenue * revenue_multiplier
-
-                # Expenses are typically 75-90% of revenue
-                expense_ratio = self.fake.random.uniform(0.75, 0.90)
-                total_expenses = total_revenue * expense_ratio
-
-                # Assets are typically 1.5-3.5x revenue
-                asset_multiplier = self.fake.random.uniform(1.5, 3.5)
-                total_assets = total_revenue * asset_multiplier
 
-                # Employee count correlates with revenue
-                employee_count = self.fake.random_int(
-                    min=max(5, int(total_revenue / 50000)),
-                    max=min(200, int(total_revenue / 20000)),
-                )
-
-                return_data = {
-                    "organization": org,
-                    "filed_on": filed_on,
-                    "tax_period_start_date": tax_period_start,
-                    "tax_period_end_date": tax_period_end,
+        return created_organizations, created_returns
+
+    def _generate_returns(self, organization_id: uuid.UUID, tax_years: list[int]) -> list[dict[str, Any]]:
+        """Generate an organization's returns, with amounts that carry over from one year to the next."""
+        rng = self.rng
+        return_type = rng.choices(RETURN_TYPES, RETURN_TYPE_WEIGHTS)[0]
+        # Log-normal revenue gives the long tail of real filings: mostly small organizations and a few very large ones
+        revenue = rng.lognormvariate(13, 1.5)
+        assets = revenue * rng.uniform(1.5, 3.5)
+        liabilities = assets * rng.uniform(0.1, 0.5)
+        employee_count = None
+
+        returns = []
+        for tax_year in tax_years:
+            py_revenue, py_assets, py_liabilities, py_employee_count = revenue, assets, liabilities, employee_count
+            revenue *= rng.uniform(0.9, 1.2)
+            # Expenses are typically 75-100% of revenue
+            expenses = revenue * rng.uniform(0.75, 1.0)
+            assets = max(assets + revenue - expenses, 0)
+            liabilities = assets * rng.uniform(0.1, 0.5)
+            # Employee count correlates with revenue
+            employee_count = int(revenue / rng.uniform(40000, 80000))
+
+            returns.append(
+                {
+                    "id": self._uuid(),
+                    "organization_id": organization_id,
+                    "original_file_name": "",
+                    "return_type": return_type,
+                    # Filed between April and June of the next year
+                    "filed_on": date(tax_year + 1, 4, 1) + timedelta(days=rng.randrange(91)),
+                    "tax_period_start_date": date(tax_year, 1, 1),
+                    "tax_period_end_date": date(tax_year, 12, 31),
                     "employee_count": employee_count,
-                    "total_revenue": round(total_revenue, 2),
-                    "total_expenses": round(total_expenses, 2),
-                    "total_assets": round(total_assets, 2),
+                    "py_employee_count": py_employee_count,
+                    "total_revenue": _amount(revenue),
+                    "py_total_revenue": _amount(py_revenue),
+                    "total_expenses": _amount(expenses),
+                    "py_total_expenses": _amount(py_revenue * rng.uniform(0.75, 1.0)),
+                    "total_assets_eoy": _amount(assets),
+                    "total_assets_boy": _amount(py_assets),
+                    "total_liabilities_eoy": _amount(liabilities),
+                    "total_liabilities_boy": _amount(py_liabilities),
+                    # COPY leaves out model defaults, so the parser version must be given like any other column
+                    "parser_version": PARSER_VERSION,
                 }
+            )
 
-                # Check if return already exists for this organization and tax period
-                existing_return = OrganizationReturnInformation.objects.filter(
-                    organization=org,
-                    tax_period_start_date=tax_period_start,
-                    tax_period_end_date=tax_period_end,
-                ).first()
-
-                if not existing_return:
-                    return_obj = OrganizationReturnInformation.objects.create(**return_data)
-                    created_returns.append(return_obj)
-                else:
-                    self.stdout.write(
-                        self.style.WARNING(
-                            f"Return for {org.name} ({tax_year}) already exists, skipping.",
-                        ),
-                    )
-
-        return created_returns
+        return returns
+
+    def _uuid(self) -> uuid.UUID:
+        """Generate a random UUID from the seeded generator, so that ids are reproducible too."""
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def _bulk_create(self, model: type[models.Model], rows: list[dict[str, Any]]) -> None:
+        model.objects.bulk_create([model(**row) for row in rows], batch_size=2000)
+
+    def _copy(self, model: type[models.Model], rows: list[dict[str, Any]]) -> None:
+        """
+        Write rows with COPY.
+
+        Rows are keyed by column and written as is, skipping model instances and the query compiler, since psycopg
+        adapts their values (UUIDs, dates, decimals) directly. Columns missing from the rows are left NULL.
+        """
+        now = timezone.now()
+        columns = ", ".join(connection.ops.quote_name(column) for column in [*rows[0], "created_at", "updated_at"])
+        with (
+            connection.cursor() as cursor,
+            cursor.cursor.copy(f"COPY {model._meta.db_table} ({columns}) FROM STDIN") as copy,
+        ):
+            for row in rows:
+                copy.write_row([*row.values(), now, now])
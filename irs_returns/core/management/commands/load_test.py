@@ -0,0 +1,388 @@
+"""Drive the read API with concurrent clients and report throughput and latency percentiles per scenario."""
+
+from collections import Counter
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+import json
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+import requests
+from rest_framework_api_key.models import APIKey
+
+from organizations.models import DatasetJob, Organization, OrganizationReturnInformation
+
+# Project directory, containing manage.py and the core package
+PROJECT_DIR = settings.BASE_DIR.parent
+
+SUMMARY_ORDERINGS = ["name", "-latest_total_revenue", "-latest_total_expenses", "-latest_total_assets_eoy"]
+
+# Number of organizations, search terms and jobs sampled from the database to build requests from
+SAMPLE_SIZE = 1000
+
+# Width of the band of profit margins the list scenario filters the companies on, around a sampled company's
+LIST_MARGIN_BAND = 0.001
+
+DEFAULT_SCENARIOS = ["summary:3", "search:2", "detail:4", "stats:1"]
+
+
+def _percentile(sorted_values: list[float], fraction: float) -> float:
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+def _summarize(latencies: list[float], statuses: Counter[int], seconds: float) -> dict[str, Any]:
+    """
+    Summarize the latencies (in seconds) and response statuses of a set of requests.
+
+    Without any request, e.g. with `--requests 0`, the throughput is 0 and the latencies are None.
+    """
+    latencies = sorted(latencies)
+    latency_ms = dict.fromkeys(["mean", "p50", "p95", "p99", "max"])
+    if latencies:
+        latency_ms = {
+            "mean": round(sum(latencies) / len(latencies) * 1000, 1),
+            "p50": round(_percentile(latencies, 0.50) * 1000, 1),
+            "p95": round(_percentile(latencies, 0.95) * 1000, 1),
+            "p99": round(_percentile(latencies, 0.99) * 1000, 1),
+            "max": round(latencies[-1] * 1000, 1),
+        }
+    return {
+        "requests": len(latencies),
+        "errors": sum(count for status, count in statuses.items() if not 200 <= status < 400),
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "requests_per_second": round(len(latencies) / seconds, 1) if seconds else None,
+        "latency_ms": latency_ms,
+    }
+
+
+def _format_ms(milliseconds: float | None) -> str:
+    return f"{milliseconds:>7.1f}ms" if milliseconds is not None else f"{'-':>9}"
+
+
+def _git(*args: str) -> str | None:
+    try:
+        result = subprocess.run(["git", *args], cwd=PROJECT_DIR, capture_output=True, text=True, timeout=10)  # noqa: S603, S607
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class RequestPlan:
+    """
+    Generates the requests of every scenario from data sampled from the database.
+
+    Samples and requests come from a seeded random generator, so that runs against the same data make the same requests
+    and their results can be compared across commits.
+    """
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.organization_ids = self._sample_organization_ids()
+        self.search_terms = self._sample_search_terms()
+        self.job_ids = [str(job_id) for job_id in DatasetJob.objects.values_list("id", flat=True)[:SAMPLE_SIZE]]
+        self.profit_margins = sorted(
+            Organization.objects.filter(id__in=self.organization_ids, latest_profit_margin__isnull=False).values_list(
+                "latest_profit_margin", flat=True
+            )
+        )
+        summary_count = Organization.objects.filter(latest_return__isnull=False).count()
+        self.summary_pages = max((summary_count + 49) // 50, 1)
+        self.scenarios: dict[str, Callable[[], str]] = {
+            "list": self.list_path,
+            "summary": self.summary_path,
+            "search": self.search_path,
+            "detail": self.detail_path,
+            "stats": self.stats_path,
+            "jobs": self.jobs_path,
+        }
+
+    def _sample_organization_ids(self) -> list[str]:
+        """Sample organizations by seeking to random ids, which avoids sorting the whole table like ORDER BY random()."""
+        organization_ids: set[str] = set()
+        for _ in range(SAMPLE_SIZE // 10):
+            start = uuid.UUID(int=self.rng.getrandbits(128))
+            batch = Organization.objects.filter(id__gte=start).order_by("id").values_list("id", flat=True)[:10]
+            organization_ids.update(str(organization_id) for organization_id in batch)
+        return sorted(organization_ids)
+
+    def _sample_search_terms(self) -> list[str]:
+        names = Organization.objects.filter(id__in=self.organization_ids).values_list("name", flat=True)
+        return sorted({word for name in names for word in name.split() if len(word) > 3 and word.isalpha()})
+
+    def list_path(self) -> str:
+        # The companies list is not paginated and includes every return, so it is filtered down to the companies with a
+        # profit margin close to a sampled company's, like a client screening companies would
+        low = self.rng.choice(self.profit_margins)
+        return f"/api/companies/?min_profit_margin={low}&max_profit_margin={low + LIST_MARGIN_BAND}&ordering=name"
+
+    def summary_path(self) -> str:
+        # Most visitors stay on the first pages
+        page = min(int(self.rng.expovariate(1 / 5)) + 1, self.summary_pages)
+        return f"/api/companies/summary/?page={page}&page_size=50&ordering={self.rng.choice(SUMMARY_ORDERINGS)}"
+
+    def search_path(self) -> str:
+        return f"/api/companies/search/?q={self.rng.choice(self.search_terms)}"
+
+    def detail_path(self) -> str:
+        return f"/api/companies/{self.rng.choice(self.organization_ids)}/"
+
+    def stats_path(self) -> str:
+        return "/api/stats/"
+
+    def jobs_path(self) -> str:
+        # Clients poll the status of a job, and sometimes list them
+        if self.job_ids and self.rng.random() < 0.8:
+            return f"/api/dataset/{self.rng.choice(self.job_ids)}/"
+        return "/api/dataset/"
+
+    def build(self, weights: dict[str, int], count: int) -> list[tuple[str, str]]:
+        """Build a sequence of (scenario, path) requests, picking scenarios according to their weights."""
+        names = self.rng.choices(list(weights), list(weights.values()), k=count)
+        return [(name, self.scenarios[name]()) for name in names]
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test the read API: start the app with gunicorn against the configured database (or use a running "
+        "server), send requests from concurrent clients, and report the throughput and latency percentiles of each "
+        "scenario. Everything runs locally. Seed the database with load_fixtures first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            default=[],
+            dest="scenarios",
+            metavar="NAME[:WEIGHT]",
+            help=(
+                "Scenario to run, with its share of the requests: summary (summary pages), list (filtered companies "
+                "list), search, detail, stats or jobs "
+                f"(dataset job polling). Repeat to mix scenarios (default: {' '.join(DEFAULT_SCENARIOS)})."
+            ),
+        )
+        parser.add_argument("--clients", type=int, default=8, help="Number of concurrent clients (default: 8)")
+        parser.add_argument(
+            "--requests", type=int, default=200, help="Number of requests measured per client (default: 200)"
+        )
+        parser.add_argument(
+            "--warmup", type=int, default=10, help="Number of unmeasured requests per client first (default: 10)"
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Seed of the sampled data and requests (default: 0)")
+        parser.add_argument(
+            "--base-url",
+            help="Base URL of a running server to test, instead of starting one. It must use this database.",
+        )
+        parser.add_argument("--workers", type=int, default=4, help="Number of gunicorn workers started (default: 4)")
+        parser.add_argument(
+            "--asgi", action="store_true", help="Start gunicorn with uvicorn workers, serving the ASGI application"
+        )
+        parser.add_argument("--output", help="Write the results as JSON to this file")
+        parser.add_argument("--compare", help="JSON results of a previous run to compare against")
+
+    def handle(self, *args, **options):
+        weights = self._parse_scenarios(options["scenarios"] or DEFAULT_SCENARIOS)
+        if settings.DEBUG:
+            self.stderr.write(self.style.WARNING("DEBUG is on, which slows down every request. Results are skewed."))
+
+        rng = random.Random(options["seed"])  # noqa: S311
+        plan = RequestPlan(rng)
+        if not plan.organization_ids and {"search", "detail"} & weights.keys():
+            raise CommandError("There are no organizations to request. Load some with load_fixtures first.")
+        if not plan.profit_margins and "list" in weights:
+            raise CommandError("No organization has a profit margin to filter on. Run refresh_derived_metrics first.")
+        clients = [
+            plan.build(weights, options["warmup"] + options["requests"]) for _ in range(max(options["clients"], 1))
+        ]
+
+        headers = {}
+        api_key = None
+        if "jobs" in weights:
+            api_key, key = APIKey.objects.create_key(name="load_test")
+            headers["Authorization"] = f"Api-Key {key}"
+        # The server's workers open their own connections
+        connection.close()
+
+        server = None
+        try:
+            if options["base_url"]:
+                base_url = options["base_url"].rstrip("/")
+            else:
+                server, base_url = self._start_server(options["workers"], options["asgi"])
+
+            self.stdout.write(
+                f"Sending {options['requests']} requests from each of {len(clients)} clients to {base_url}..."
+            )
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=len(clients)) as pool:
+                results = list(
+                    pool.map(
+                        lambda requests_: self._run_client(base_url, headers, requests_, options["warmup"]), clients
+                    )
+                )
+            seconds = time.perf_counter() - start
+        finally:
+            if server:
+                server.terminate()
+                server.wait(timeout=30)
+            if api_key:
+                api_key.delete()
+
+        report = self._build_report(options, weights, results, seconds)
+        self._write_report(report)
+        if options["compare"]:
+            with open(options["compare"]) as f:
+                self._write_comparison(report, json.load(f))
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Wrote the results to {options['output']}."))
+
+    def _parse_scenarios(self, scenarios: list[str]) -> dict[str, int]:
+        weights = {}
+        for scenario in scenarios:
+            name, _, weight = scenario.partition(":")
+            if name not in {"list", "summary", "search", "detail", "stats", "jobs"}:
+                raise CommandError(f"Unknown scenario {name}.")
+            if weight and not (weight.isdigit() and int(weight) > 0):
+                raise CommandError(f"The weight of scenario {name} must be a positive integer.")
+            weights[name] = int(weight or 1)
+        return weights
+
+    def _start_server(self, workers: int, asgi: bool) -> tuple[subprocess.Popen, str]:
+        """Start gunicorn on a free local port and wait until it serves requests."""
+        port = _free_port()
+        command = [sys.executable, "-m", "gunicorn", "--workers", str(workers), "--bind", f"127.0.0.1:{port}"]
+        command += ["--log-level", "warning", "--chdir", str(PROJECT_DIR)]
+        command += ["--worker-class", "uvicorn_worker.UvicornWorker", "core.asgi"] if asgi else ["core.wsgi"]
+        self.stdout.write(f"Starting {workers} {'ASGI' if asgi else 'WSGI'} gunicorn workers on port {port}...")
+        # A file rather than a pipe, which would block the server once full since it is only read on failure
+        log = tempfile.TemporaryFile(mode="w+")
+        server = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=log, text=True)  # noqa: S603
+
+        base_url = f"http://127.0.0.1:{port}"
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                log.seek(0)
+                raise CommandError(f"The server exited with code {server.returncode}:\n{log.read()}")
+            try:
+                requests.get(f"{base_url}/api/stats/", timeout=5)
+                return server, base_url
+            except requests.RequestException:
+                time.sleep(0.2)
+
+        server.terminate()
+        raise CommandError("The server did not start within 60 seconds.")
+
+    def _run_client(
+        self, base_url: str, headers: dict[str, str], client_requests: list[tuple[str, str]], warmup: int
+    ) -> list[tuple[str, float, int]]:
+        """Send requests one after the other, returning the scenario, latency and status of the measured ones."""
+        results = []
+        with requests.Session() as session:
+            session.headers.update(headers)
+            for i, (scenario, path) in enumerate(client_requests):
+                start = time.perf_counter()
+                try:
+                    # The whole body is read before get() returns, so it is part of the latency
+                    status = session.get(base_url + path, timeout=60).status_code
+                except requests.RequestException:
+                    status = 0
+                if i >= warmup:
+                    results.append((scenario, time.perf_counter() - start, status))
+        return results
+
+    def _build_report(
+        self,
+        options: dict[str, Any],
+        weights: dict[str, int],
+        results: list[list[tuple[str, float, int]]],
+        seconds: float,
+    ) -> dict[str, Any]:
+        latencies: dict[str, list[float]] = {}
+        statuses: dict[str, Counter[int]] = {}
+        for scenario, latency, status in (result for client_results in results for result in client_results):
+            latencies.setdefault(scenario, []).append(latency)
+            statuses.setdefault(scenario, Counter())[status] += 1
+
+        all_latencies = [latency for scenario_latencies in latencies.values() for latency in scenario_latencies]
+        all_statuses = sum(statuses.values(), Counter())
+        return {
+            "git_sha": _git("rev-parse", "HEAD"),
+            # Uncommitted changes to tracked files make the sha ambiguous
+            "git_dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+            "started_at": timezone.now().isoformat(),
+            "config": {
+                "scenarios": weights,
+                "clients": options["clients"],
+                "requests_per_client": options["requests"],
+                "warmup": options["warmup"],
+                "seed": options["seed"],
+                "server": options["base_url"] or f"gunicorn {'asgi' if options['asgi'] else 'wsgi'}",
+                "workers": None if options["base_url"] else options["workers"],
+                "database": connection.vendor,
+                "organizations": Organization.objects.count(),
+                "returns": OrganizationReturnInformation.objects.count(),
+                "debug": settings.DEBUG,
+            },
+            "seconds": round(seconds, 2),
+            "overall": _summarize(all_latencies, all_statuses, seconds),
+            # Scenarios share the run, so their throughput is their share of the overall throughput
+            "scenarios": {
+                scenario: _summarize(latencies[scenario], statuses[scenario], seconds) for scenario in sorted(latencies)
+            },
+        }
+
+    def _write_report(self, report: dict[str, Any]) -> None:
+        config = report["config"]
+        self.stdout.write(
+            f"{report['overall']['requests']} requests in {report['seconds']}s against {config['organizations']:,} "
+            f"organizations and {config['returns']:,} returns ({config['database']}), at {report['git_sha'] or '?'}"
+            f"{' with uncommitted changes' if report['git_dirty'] else ''}"
+        )
+        for name, summary in [("overall", report["overall"]), *report["scenarios"].items()]:
+            latency = summary["latency_ms"]
+            self.stdout.write(
+                f"  {name:<8} {summary['requests_per_second'] or 0:>8.1f} req/s  p50 {_format_ms(latency['p50'])}  "
+                f"p95 {_format_ms(latency['p95'])}  p99 {_format_ms(latency['p99'])}  max {_format_ms(latency['max'])}  "
+                f"{summary['errors']} errors"
+            )
+
+    def _write_comparison(self, report: dict[str, Any], baseline: dict[str, Any]) -> None:
+        """Print the change of throughput and latency percentiles from a previous run."""
+        if baseline["config"] != report["config"]:
+            self.stdout.write(self.style.WARNING("The baseline ran with a different configuration or dataset."))
+
+        self.stdout.write(f"Compared to {baseline.get('git_sha') or '?'}:")
+        current = {"overall": report["overall"], **report["scenarios"]}
+        previous = {"overall": baseline["overall"], **baseline["scenarios"]}
+        for name in [name for name in current if name in previous]:
+            changes = []
+            for label, now, before in [
+                ("req/s", current[name]["requests_per_second"], previous[name]["requests_per_second"]),
+                *[
+                    (key, current[name]["latency_ms"][key], previous[name]["latency_ms"][key])
+                    for key in ["p50", "p95", "p99"]
+                ],
+            ]:
+                changes.append(
+                    f"{label} {(now - before) / before:+.1%}" if now is not None and before else f"{label} n/a"
+                )
+            self.stdout.write(f"  {name:<8} {'  '.join(changes)}")
@@ -0,0 +1,36 @@
+import signal
+import sys
+
+from django.core.management.base import BaseCommand
+
+from organizations.parsers import PARSER_VERSION
+from organizations.reextraction import reextract_filings
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-extract the returns of the filings kept in the filing store (DJANGO_DATASET_ARCHIVE_FILINGS) with the "
+        "current strategies, for the filings extracted before the current parser version. Only the fields that "
+        "changed are written."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int, default=4, help="Number of worker processes parsing filings (default: 4)"
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=500, help="Number of filings parsed and written per batch (default: 500)"
+        )
+
+    def handle(self, *args, **options):
+        # SIGTERM ends the process without unwinding it, so it is turned into SystemExit for the run to be marked failed
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+        self.stdout.write(f"Re-extracting the filings extracted before parser version {PARSER_VERSION}...")
+        result = reextract_filings(workers=options["workers"], batch_size=options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Re-extracted {result.filings:,} filings: {result.returns_updated:,} returns updated, "
+                f"{result.returns_unchanged:,} unchanged and {result.returns_created:,} created, "
+                f"{result.organizations_updated:,} organizations updated and {result.skipped:,} filings skipped."
+            )
+        )
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from organizations.financial_metrics import refresh_derived_metrics
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the financial metrics derived from every return (profit margin, growth and liability ratio), "
+        "along with those of the companies' latest returns"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=20000, help="Number of returns computed per batch (default: 20000)"
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("Refreshing derived metrics...")
+        returns = refresh_derived_metrics(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Refreshed the derived metrics of {returns} returns."))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from organizations.statistics import refresh_return_statistics
+
+
+class Command(BaseCommand):
+    help = "Rebuild the rollup of aggregate return statistics served by /api/stats/ and the percentile indexes"
+
+    def handle(self, *args, **options):
+        self.stdout.write("Refreshing return statistics...")
+        cohorts = refresh_return_statistics()
+        self.stdout.write(self.style.SUCCESS(f"Refreshed statistics for {cohorts} cohorts."))
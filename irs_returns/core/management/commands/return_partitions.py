@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from organizations.partitions import (
+    create_partition,
+    get_partitions,
+    is_partitioned,
+    partition_returns_table,
+    split_default_partition,
+    unpartition_returns_table,
+)
+
+
+class Command(BaseCommand):
+    help = "List or manage the tax year partitions of the returns table (Postgres only)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--create", nargs="+", type=int, default=[], metavar="YEAR", help="Create tax year partitions"
+        )
+        parser.add_argument(
+            "--split-default",
+            action="store_true",
+            help="Move returns out of the default partition into partitions of their own tax year",
+        )
+        parser.add_argument(
+            "--enable",
+            action="store_true",
+            help="Partition the returns table. It is locked while every row is copied.",
+        )
+        parser.add_argument(
+            "--disable",
+            action="store_true",
+            help="Convert the returns table back to a regular table. It is locked while every row is copied.",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Partitioning is only supported on Postgres.")
+        if options["enable"] and options["disable"]:
+            raise CommandError("--enable and --disable cannot be used together.")
+
+        if options["enable"]:
+            self.stdout.write("Partitioning the returns table...")
+            partition_returns_table()
+        elif options["disable"]:
+            self.stdout.write("Converting the returns table back to a regular table...")
+            unpartition_returns_table()
+
+        if (options["create"] or options["split_default"]) and not is_partitioned():
+            raise CommandError("The returns table is not partitioned. Use --enable first.")
+        for year in options["create"]:
+            if create_partition(year):
+                self.stdout.write(f"Created the partition of tax year {year}.")
+        if options["split_default"]:
+            years = split_default_partition()
+            self.stdout.write(f"Moved returns of {len(years)} tax years out of the default partition.")
+
+        if not is_partitioned():
+            self.stdout.write("The returns table is not partitioned.")
+            return
+
+        for name, bounds, estimated_rows in get_partitions():
+            self.stdout.write(f"{name}: {bounds} (~{estimated_rows} rows)")
@@ -0,0 +1,185 @@
+"""Run concurrent dataset ingests and API requests while sampling database connection usage."""
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+import requests
+
+
+def _run_ingest(zip_path: str) -> dict:
+    """Ingest a dataset ZIP file in a fresh process, the way a Celery child would."""
+    django.setup()
+
+    from django.db import connection
+
+    from organizations.datasets import process_dataset
+
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as extract_dir:
+        organizations_created, returns_created = process_dataset(zip_path, extract_dir)
+
+    return {
+        "zip_path": zip_path,
+        "seconds": time.perf_counter() - start,
+        "organizations_created": organizations_created,
+        "returns_created": returns_created,
+        "pool": connection.pool.get_stats() if connection.pool else None,
+    }
+
+
+def _percentile(sorted_values: list[float], fraction: float) -> float:
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Run concurrent dataset ingests and API requests against a running server, and report the number of "
+        "database connections and the time spent waiting for pooled connections. Ingests write to the configured "
+        "database, so point it at a scratch copy."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--zip",
+            action="append",
+            default=[],
+            dest="zip_paths",
+            help="Dataset ZIP file to ingest. Repeat to run several ingests concurrently (use different files).",
+        )
+        parser.add_argument("--base-url", default="http://localhost:8000", help="Base URL of the running API server")
+        parser.add_argument(
+            "--path",
+            action="append",
+            default=[],
+            dest="paths",
+            help="API path to request, cycled through by every client (default: /api/companies/summary/)",
+        )
+        parser.add_argument("--clients", type=int, default=8, help="Number of concurrent API clients")
+        parser.add_argument("--requests", type=int, default=100, help="Number of requests made by each API client")
+        parser.add_argument(
+            "--interval", type=float, default=0.1, help="Seconds between samples of the number of connections"
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Connection usage can only be sampled on Postgres.")
+
+        with connection.cursor() as cursor:
+            cursor.execute("SHOW max_connections")
+            max_connections = int(cursor.fetchone()[0])
+
+        samples: list[dict[str, int]] = []
+        done = threading.Event()
+        sampler = threading.Thread(target=self._sample_connections, args=(samples, done, options["interval"]))
+        sampler.start()
+
+        start = time.perf_counter()
+        try:
+            ingest_results, latencies, errors = self._run(options)
+        finally:
+            done.set()
+            sampler.join()
+        elapsed = time.perf_counter() - start
+
+        self._report_connections(samples, max_connections)
+        self._report_api(latencies, errors, elapsed)
+        for result in ingest_results:
+            self._report_ingest(result)
+
+    def _run(self, options) -> tuple[list[dict], list[float], int]:
+        """Run the ingests in separate processes and the API clients in threads until both are done."""
+        paths = options["paths"] or ["/api/companies/summary/"]
+        base_url = options["base_url"].rstrip("/")
+
+        # Ingests run with the pool sizing of Celery workers
+        os.environ["DJANGO_PROCESS_ROLE"] = "worker"
+        ingest_pool = ProcessPoolExecutor(
+            max_workers=max(len(options["zip_paths"]), 1), mp_context=multiprocessing.get_context("spawn")
+        )
+        with ingest_pool, ThreadPoolExecutor(max_workers=max(options["clients"], 1)) as client_pool:
+            ingests = [ingest_pool.submit(_run_ingest, zip_path) for zip_path in options["zip_paths"]]
+            clients = [
+                client_pool.submit(self._run_client, base_url, paths, options["requests"])
+                for _ in range(options["clients"])
+            ]
+
+            latencies: list[float] = []
+            errors = 0
+            for client in clients:
+                client_latencies, client_errors = client.result()
+                latencies.extend(client_latencies)
+                errors += client_errors
+
+            return [ingest.result() for ingest in ingests], latencies, errors
+
+    def _run_client(self, base_url: str, paths: list[str], request_count: int) -> tuple[list[float], int]:
+        latencies = []
+        errors = 0
+        with requests.Session() as session:
+            for i in range(request_count):
+                start = time.perf_counter()
+                try:
+                    response = session.get(base_url + paths[i % len(paths)], timeout=30)
+                    if response.status_code >= 500:
+                        errors += 1
+                except requests.RequestException:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+        return latencies, errors
+
+    def _sample_connections(self, samples: list[dict[str, int]], done: threading.Event, interval: float) -> None:
+        """Record the number of connections to the current database by state until done is set."""
+        try:
+            while not done.is_set():
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        "SELECT coalesce(state, 'unknown'), count(*) FROM pg_stat_activity "
+                        "WHERE datname = current_database() AND pid <> pg_backend_pid() GROUP BY 1"
+                    )
+                    samples.append(dict(cursor.fetchall()))
+                done.wait(interval)
+        finally:
+            connection.close()
+
+    def _report_connections(self, samples: list[dict[str, int]], max_connections: int) -> None:
+        if not samples:
+            return
+
+        totals = [sum(sample.values()) for sample in samples]
+        states = sorted({state for sample in samples for state in sample})
+        peak_by_state = ", ".join(f"{state} {max(sample.get(state, 0) for sample in samples)}" for state in states)
+        self.stdout.write(
+            f"Connections: peak {max(totals)} of {max_connections} allowed, mean {sum(totals) / len(totals):.1f} "
+            f"over {len(samples)} samples (peak by state: {peak_by_state})"
+        )
+
+    def _report_api(self, latencies: list[float], errors: int, elapsed: float) -> None:
+        if not latencies:
+            return
+
+        latencies = sorted(latencies)
+        self.stdout.write(
+            f"API: {len(latencies)} requests in {elapsed:.1f}s ({len(latencies) / elapsed:.1f} req/s), "
+            f"{errors} errors, latency p50 {_percentile(latencies, 0.50) * 1000:.0f}ms, "
+            f"p95 {_percentile(latencies, 0.95) * 1000:.0f}ms, p99 {_percentile(latencies, 0.99) * 1000:.0f}ms"
+        )
+
+    def _report_ingest(self, result: dict) -> None:
+        message = (
+            f"Ingest of {result['zip_path']}: {result['organizations_created']} organizations and "
+            f"{result['returns_created']} returns created in {result['seconds']:.1f}s"
+        )
+        pool = result["pool"]
+        if pool:
+            message += (
+                f", {pool.get('requests_num', 0)} connection requests waited {pool.get('requests_wait_ms', 0)}ms "
+                f"in total ({pool.get('requests_errors', 0)} timed out)"
+            )
+        self.stdout.write(message)
@@ -15,6 +15,7 @@ import os
 from pathlib import Path
 
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -43,6 +44,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "corsheaders",
     "rest_framework",
     "rest_framework_api_key",
@@ -54,6 +56,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "rest_api.middleware.MetricsMiddleware",
+    "rest_api.middleware.ReplicaReadMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -84,16 +88,76 @@ TEMPLATES = [
 WSGI_APPLICATION = "core.wsgi.application"
 
 
+# Serve the public read endpoints with async views. Only useful when running under ASGI (core.asgi).
+ASYNC_READ_API = os.getenv("DJANGO_ASYNC_READ_API", "False").lower() in ("true", "1")
+
+
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
 DATABASES = {
     "default": dj_database_url.config(
         default=os.getenv("DJANGO_DATABASE_URL"),
-        conn_max_age=600,
+        # Under ASGI, queries run in per-request threads so persistent connections would never be reused
+        conn_max_age=0 if ASYNC_READ_API else 600,
+        # With pooling, this also makes the pool check connections before handing them out
+        conn_health_checks=True,
     )
 }
 
+# Read replicas, as a comma-separated list of database URLs (see core.db_routers). Read-only REST API requests are served
+# from one of them, while writes, dataset jobs, the admin and everything else use the primary.
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DJANGO_DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+DATABASE_REPLICAS = []
+for index, replica_url in enumerate(DATABASE_REPLICA_URLS):
+    DATABASES[f"replica_{index}"] = {
+        **dj_database_url.parse(
+            replica_url, conn_max_age=DATABASES["default"]["CONN_MAX_AGE"], conn_health_checks=True
+        ),
+        # Tests read what they just wrote within their transaction, which only the primary's test database has
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(f"replica_{index}")
+
+DATABASE_ROUTERS = ["core.db_routers.ReplicaRouter"]
+
+# Connection pooling (Postgres only)
+# https://docs.djangoproject.com/en/6.0/ref/databases/#connection-pool
+#
+# Each process gets its own pool, so the total number of connections is roughly the number of web and worker processes
+# times their pool's max size. Web processes serve several requests at once under ASGI or threaded workers, while a
+# Celery child only runs one task at a time. Set DJANGO_PROCESS_ROLE=worker for Celery workers.
+DATABASE_POOL = os.getenv("DJANGO_DB_POOL", "False").lower() in ("true", "1")
+PROCESS_ROLE = os.getenv("DJANGO_PROCESS_ROLE", "web")
+DATABASE_POOL_SIZES = {
+    "web": (2, 4),
+    "worker": (1, 2),
+}
+if PROCESS_ROLE not in DATABASE_POOL_SIZES:
+    raise ImproperlyConfigured(
+        f"DJANGO_PROCESS_ROLE must be one of {', '.join(DATABASE_POOL_SIZES)}, got {PROCESS_ROLE!r}"
+    )
+
+if DATABASE_POOL:
+    pool_min_size, pool_max_size = DATABASE_POOL_SIZES[PROCESS_ROLE]
+    # Each replica gets a pool of the same size as the primary's
+    for database in DATABASES.values():
+        # Pooled connections are returned to the pool at the end of each request, so they must not also be persistent
+        database["CONN_MAX_AGE"] = 0
+        database.setdefault("OPTIONS", {})["pool"] = {
+            "min_size": int(os.getenv("DJANGO_DB_POOL_MIN_SIZE", pool_min_size)),
+            "max_size": int(os.getenv("DJANGO_DB_POOL_MAX_SIZE", pool_max_size)),
+            # Seconds to wait for a free connection before raising an error
+            "timeout": float(os.getenv("DJANGO_DB_POOL_TIMEOUT", "10")),
+            # Connections are recycled after this many seconds, and idle ones above min_size are closed
+            "max_lifetime": float(os.getenv("DJANGO_DB_POOL_MAX_LIFETIME", "1800")),
+            "max_idle": float(os.getenv("DJANGO_DB_POOL_MAX_IDLE", "300")),
+        }
+
+# Partition the returns table by tax year (Postgres only, see organizations.partitions). This is applied by the
+# migrations, or by `manage.py return_partitions --enable` on a database that was migrated without it.
+PARTITION_RETURNS = os.getenv("DJANGO_PARTITION_RETURNS", "False").lower() in ("true", "1")
+
 
 # Authentication
 
@@ -135,6 +199,10 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 
+# Uploaded and generated files, such as the profiles of dataset jobs. Celery workers write them, so the web processes
+# must see the same directory.
+MEDIA_ROOT = os.getenv("DJANGO_MEDIA_ROOT", BASE_DIR / "media")
+
 
 # REST framework
 
@@ -147,6 +215,27 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Request metrics of the REST API, served on /api/metrics/ (see rest_api.metrics)
+API_METRICS = os.getenv("DJANGO_API_METRICS", "True").lower() in ("true", "1")
+# Return each request's database and serializer time in a Server-Timing header
+API_SERVER_TIMING = os.getenv("DJANGO_API_SERVER_TIMING", "False").lower() in ("true", "1")
+# Maximum number of database queries per request of an endpoint, by view name. Requests over budget are logged as
+# warnings, which catches N+1 queries introduced by serializer or queryset changes.
+API_QUERY_BUDGETS = {
+    "rest_api:company-list": 2,
+    "rest_api:company-detail": 2,
+    "rest_api:company-percentiles": 4,
+    "rest_api:company-summary": 2,
+    "rest_api:company-search": 3,
+    "rest_api:stats-list": 1,
+    "rest_api:dataset-list": 3,
+    "rest_api:dataset-detail": 3,
+    "rest_api:dataset-profile": 3,
+    "rest_api:dataset-events": 2,
+    "rest_api:metrics-list": 1,
+    "rest_api:changes-list": 5,
+}
+
 SIMPLEJWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
@@ -164,6 +253,32 @@ CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 
+# Number of ZIP files of a batch dataset job that are downloaded at once (at least one, or no archive would be processed)
+DATASET_DOWNLOAD_CONCURRENCY = max(int(os.getenv("DJANGO_DATASET_DOWNLOAD_CONCURRENCY", "3")), 1)
+
+# Number of byte ranges large files are downloaded in, over as many connections, when the server supports it
+DATASET_DOWNLOAD_PARTS = int(os.getenv("DJANGO_DATASET_DOWNLOAD_PARTS", "4"))
+
+# Pub/sub used to push dataset job progress to watchers (see organizations.progress). Redis reaches the web processes
+# from the Celery workers, other URLs (e.g. memory://) only reach watchers in the process running the job.
+DATASET_PROGRESS_BROKER_URL = os.getenv("DJANGO_DATASET_PROGRESS_BROKER_URL", CELERY_BROKER_URL)
+
+# Cache of downloaded dataset files, reused while the server reports them unchanged (see organizations.downloads).
+# The least recently used files are evicted over the size limit, and a limit of 0 disables the cache.
+DATASET_DOWNLOAD_CACHE_DIR = Path(os.getenv("DJANGO_DATASET_DOWNLOAD_CACHE_DIR", BASE_DIR / "download_cache"))
+DATASET_DOWNLOAD_CACHE_MAX_GB = float(os.getenv("DJANGO_DATASET_DOWNLOAD_CACHE_MAX_GB", "20"))
+
+# Whether dataset jobs keep every raw filing they process, gzipped and addressed by its SHA-256, so that returns can be
+# re-extracted after a strategy changes without downloading the ZIP files again (see organizations.reextraction)
+DATASET_ARCHIVE_FILINGS = os.getenv("DJANGO_DATASET_ARCHIVE_FILINGS", "False").lower() in ("true", "1")
+DATASET_FILING_STORE_DIR = Path(os.getenv("DJANGO_DATASET_FILING_STORE_DIR", BASE_DIR / "filing_store"))
+
+# How dataset jobs write organizations and returns (see organizations.writers): "copy" streams them into staging tables
+# with COPY and merges them in chunks of DATASET_WRITE_CHUNK_SIZE files, "orm" saves them one file at a time. COPY is
+# only available on Postgres, other databases always use the ORM.
+DATASET_WRITE_BACKEND = os.getenv("DJANGO_DATASET_WRITE_BACKEND", "copy")
+DATASET_WRITE_CHUNK_SIZE = int(os.getenv("DJANGO_DATASET_WRITE_CHUNK_SIZE", "5000"))
+
 # Temporary file storage for dataset processing
 TEMP_DIR = BASE_DIR / "temp"
 TEMP_DIR.mkdir(exist_ok=True)
@@ -0,0 +1,26 @@
+from .base import *  # noqa
+from .base import DATABASE_REPLICAS, DATABASES
+
+SECRET_KEY = "test-secret-key"  # noqa: S105
+
+# Tests run against the test database of DJANGO_DATABASE_URL if set, and an in-memory SQLite database otherwise
+if not DATABASES["default"]:
+    DATABASES["default"] = {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}
+
+# Replicas use connections of their own, which do not see what a test wrote within its transaction, so reads are only
+# routed to this mirror of the primary's test database in the tests that make it a replica with override_settings
+for alias in DATABASE_REPLICAS:
+    del DATABASES[alias]
+DATABASES["replica_0"] = {**DATABASES["default"], "TEST": {"MIRROR": "default"}}
+DATABASE_REPLICAS = []
+
+# Tasks and job progress updates stay within the test process
+CELERY_BROKER_URL = "memory://"
+CELERY_RESULT_BACKEND = "cache+memory://"
+DATASET_PROGRESS_BROKER_URL = "memory://"
+
+# Files written by dataset jobs are not cached or kept between tests
+DATASET_DOWNLOAD_CACHE_MAX_GB = 0
+DATASET_ARCHIVE_FILINGS = False
+
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
@@ -0,0 +1,18 @@
+from django.core.management import call_command
+import pytest
+
+from organizations.models import Organization, OrganizationReturnInformation
+from organizations.parsers import PARSER_VERSION
+from organizations.tests.conftest import requires_postgres
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.mark.parametrize("copy", [False, pytest.param(True, marks=requires_postgres)])
+def test_fixtures_are_loaded(copy):
+    call_command("load_fixtures", users=0, organizations=20, years=2, seed=1, batch_size=7, copy=copy, verbosity=0)
+
+    assert Organization.objects.count() == 20
+    assert Organization.objects.filter(latest_return__isnull=False).count() == 20
+    assert OrganizationReturnInformation.objects.count() == 40
+    assert not OrganizationReturnInformation.objects.exclude(parser_version=PARSER_VERSION).exists()
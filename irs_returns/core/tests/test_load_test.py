@@ -0,0 +1,46 @@
+from collections import Counter
+import random
+from urllib.parse import urlsplit
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+import pytest
+
+from core.management.commands.load_test import RequestPlan, _summarize
+from organizations.models import Organization
+
+
+def test_summarize_latencies():
+    summary = _summarize([0.3, 0.1, 0.2], Counter({200: 2, 500: 1}), seconds=2)
+
+    assert summary["requests"] == 3
+    assert summary["errors"] == 1
+    assert summary["requests_per_second"] == 1.5
+    assert summary["latency_ms"] == {"mean": 200.0, "p50": 200.0, "p95": 300.0, "p99": 300.0, "max": 300.0}
+
+
+def test_summarize_without_requests():
+    summary = _summarize([], Counter(), seconds=1)
+
+    assert summary["requests"] == 0
+    assert summary["requests_per_second"] == 0
+    assert set(summary["latency_ms"].values()) == {None}
+
+
+@pytest.mark.django_db
+def test_scenarios_request_their_endpoints():
+    Organization.objects.bulk_create(
+        Organization(name=f"Load Test Foundation {i}", latest_profit_margin=i / 10) for i in range(5)
+    )
+    plan = RequestPlan(random.Random(0))
+
+    assert urlsplit(plan.list_path()).path == "/api/companies/"
+    assert urlsplit(plan.summary_path()).path == "/api/companies/summary/"
+
+
+@pytest.mark.django_db
+def test_list_scenario_needs_profit_margins():
+    Organization.objects.create(name="Load Test Foundation")
+
+    with pytest.raises(CommandError, match="profit margin"):
+        call_command("load_test", "--scenario", "list", "--requests", "0")
@@ -0,0 +1,39 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+import pytest
+
+
+def _load_settings(code: str = "", **environ):
+    """Import the base settings as `base` in a new interpreter with the given environment variables, then run code."""
+    return subprocess.run(  # noqa: S603
+        [sys.executable, "-c", f"from core.settings import base; {code}"],
+        cwd=settings.BASE_DIR.parent,
+        env={**os.environ, "DJANGO_SECRET_KEY": "test-secret-key", **environ},
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+
+
+@pytest.mark.parametrize("role", ["web", "worker"])
+def test_known_process_role(role):
+    result = _load_settings(DJANGO_PROCESS_ROLE=role)
+
+    assert result.returncode == 0, result.stderr
+
+
+def test_unknown_process_role_is_improperly_configured():
+    result = _load_settings(DJANGO_PROCESS_ROLE="celery")
+
+    assert result.returncode != 0
+    assert "ImproperlyConfigured: DJANGO_PROCESS_ROLE must be one of web, worker, got 'celery'" in result.stderr
+
+
+@pytest.mark.parametrize(("concurrency", "expected"), [("5", "5"), ("0", "1"), ("-2", "1")])
+def test_download_concurrency_is_at_least_one(concurrency, expected):
+    result = _load_settings("print(base.DATASET_DOWNLOAD_CONCURRENCY)", DJANGO_DATASET_DOWNLOAD_CONCURRENCY=concurrency)
+
+    assert result.stdout.strip() == expected, result.stderr
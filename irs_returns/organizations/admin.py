@@ -1,7 +1,211 @@
+from functools import cached_property
+
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.core.paginator import EmptyPage, Page, Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.forms.models import BaseInlineFormSet
+
+from .models import DatasetArchive, DatasetJob, Organization, OrganizationReturnInformation
+from .search import search_organizations
+from .summaries import LATEST_SUMMARY_UPDATE_FIELDS
+
+# Changelists the planner expects to have more rows than this show its estimate instead of counting them
+ESTIMATED_COUNT_THRESHOLD = 100_000
+
+# Fields of the returns shown on an organization's page
+RETURN_INLINE_FIELDS = [
+    "tax_period_end_date",
+    "return_type",
+    "filed_on",
+    "total_revenue",
+    "total_expenses",
+    "total_assets_eoy",
+    "original_file_name",
+]
+
+
+def estimate_count(queryset: QuerySet) -> int | None:
+    """Get the planner's estimate of the number of rows of a queryset, or None on databases other than Postgres."""
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+
+    sql, params = queryset.order_by().query.get_compiler(using=queryset.db).as_sql()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    return plan[0]["Plan"]["Plan Rows"]
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator using the Postgres planner's row estimate as the count of large results.
+
+    Counting millions of rows scans all of them, while the estimate comes from the table statistics kept up to date by
+    autovacuum, so it can be off by a few percent. Results estimated under ESTIMATED_COUNT_THRESHOLD rows are counted.
+
+    The estimate of filtered or searched results can be far off, so the results are counted after all when a page
+    comes back short or empty, or is the last one.
+    """
+
+    estimated = False
+
+    @cached_property
+    def count(self) -> int:
+        estimate = estimate_count(self.object_list)
+        if estimate is not None and estimate > ESTIMATED_COUNT_THRESHOLD:
+            self.estimated = True
+            return estimate
+        return super().count
+
+    def page(self, number) -> Page:
+        try:
+            page = super().page(number)
+            if not self.estimated or (page.has_next() and len(page) == self.per_page):
+                return page
+        except EmptyPage:
+            if not self.estimated:
+                raise
+
+        # Where the results end is visible on this page, so the estimate is replaced with their count and the number of
+        # pages computed from it is dropped
+        self.estimated = False
+        self.count = super().count
+        self.__dict__.pop("num_pages", None)
+        return super().page(number)
+
+
+class PaginatedInlineFormSet(BaseInlineFormSet):
+    """Inline formset showing a page of the related objects, selected by the `<prefix>_page` query parameter."""
+
+    per_page = 20
+    # Set by the inline, since formsets are not given the request
+    request = None
+
+    @property
+    def page_param(self) -> str:
+        return f"{self.prefix}_page"
+
+    def get_queryset(self) -> QuerySet:
+        if not hasattr(self, "page"):
+            paginator = Paginator(super().get_queryset(), self.per_page)
+            self.page = paginator.get_page(self.request.GET.get(self.page_param) if self.request else None)
+            self._queryset = self.page.object_list
+        return self._queryset
+
+
+class ReturnInline(admin.TabularInline):
+    """Read-only, paginated returns of an organization, which can have a return for every year since 2000."""
+
+    model = OrganizationReturnInformation
+    formset = PaginatedInlineFormSet
+    template = "admin/organizations/paginated_tabular.html"
+    fields = RETURN_INLINE_FIELDS
+    readonly_fields = RETURN_INLINE_FIELDS
+    ordering = ["-tax_period_end_date", "-filed_on"]
+    extra = 0
+    can_delete = False
+    show_change_link = True
+
+    def get_formset(self, request, obj=None, **kwargs):
+        # The factory creates a new class for every call, so the request is not shared between requests
+        formset = super().get_formset(request, obj, **kwargs)
+        formset.request = request
+        return formset
+
+    def has_add_permission(self, request, obj=None) -> bool:
+        return False
+
+    def has_change_permission(self, request, obj=None) -> bool:
+        return False
+
+
+class LargeTableChangeList(ChangeList):
+    def get_results(self, request):
+        super().get_results(request)
+        # The result count is taken before the page is loaded, which can replace the paginator's estimate with a count
+        self.result_count = self.paginator.count
+        self.multi_page = self.result_count > self.list_per_page
+        self.can_show_all = self.result_count <= self.list_max_show_all
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Admin of a table with millions of rows, which must not be counted or searched with full scans."""
+
+    paginator = EstimatedCountPaginator
+    # Otherwise the changelist also counts the unfiltered table when filtered or searched
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return LargeTableChangeList
+
+
+@admin.register(Organization)
+class OrganizationAdmin(LargeTableAdmin):
+    list_display = ["name", "latest_tax_year", "latest_return_type", "latest_total_revenue", "updated_at"]
+    search_fields = ["name"]
+    search_help_text = "Searches names and mission descriptions, like the public search."
+    readonly_fields = ["created_at", "updated_at", *LATEST_SUMMARY_UPDATE_FIELDS]
+    inlines = [ReturnInline]
+
+    def get_search_results(self, request, queryset, search_term):
+        # Substring matching would scan every name, while the public search uses the full-text and trigram indexes
+        if not search_term:
+            return queryset, False
+        return queryset.filter(pk__in=search_organizations(search_term).values("pk")), False
+
+
+@admin.register(OrganizationReturnInformation)
+class OrganizationReturnInformationAdmin(LargeTableAdmin):
+    list_display = ["__str__", "organization", "return_type", "filed_on", "total_revenue", "updated_at"]
+    list_select_related = ["organization"]
+    search_fields = ["organization__name"]
+    search_help_text = "Searches the names and mission descriptions of the organizations that filed the returns."
+    # A select listing every organization would not load
+    raw_id_fields = ["organization"]
+    readonly_fields = [
+        "created_at",
+        "updated_at",
+        "profit_margin",
+        "revenue_growth",
+        "expense_growth",
+        "asset_growth",
+        "liability_ratio",
+        "parser_version",
+    ]
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return queryset.filter(organization__in=search_organizations(search_term).values("pk")), False
+
+
+class DatasetArchiveInline(admin.TabularInline):
+    model = DatasetArchive
+    fields = ["zip_url", "status", "progress", "processed_files", "total_files", "returns_created", "error_message"]
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None) -> bool:
+        return False
+
+    def has_change_permission(self, request, obj=None) -> bool:
+        return False
+
+
+@admin.register(DatasetJob)
+class DatasetJobAdmin(admin.ModelAdmin):
+    list_display = ["id", "status", "progress", "dry_run", "organizations_created", "returns_created", "created_at"]
+    list_filter = ["status", "dry_run"]
+    search_fields = ["zip_url", "index_url"]
+    inlines = [DatasetArchiveInline]
 
-# Register your models here.
-from .models import Organization, OrganizationReturnInformation
+    # Jobs are started and updated by the API and the Celery workers, so the admin only shows them
+    def has_add_permission(self, request) -> bool:
+        return False
 
-admin.site.register(Organization)
-admin.site.register(OrganizationReturnInformation)
+    def has_change_permission(self, request, obj=None) -> bool:
+        return False
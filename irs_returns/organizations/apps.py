@@ -1,5 +1,17 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
 
 
 class OrganizationsConfig(AppConfig):
     name = "organizations"
+
+    def ready(self):
+        from organizations.models import DatasetArchive, DatasetJob
+        from organizations.progress import publish_progress
+        from organizations.signals import DELETED_RECORD_KINDS, record_deletion
+
+        for model in DELETED_RECORD_KINDS:
+            post_delete.connect(record_deletion, sender=model, dispatch_uid=f"{model._meta.model_name}_tombstone")
+
+        for model in [DatasetJob, DatasetArchive]:
+            post_save.connect(publish_progress, sender=model, dispatch_uid=f"{model._meta.model_name}_progress")
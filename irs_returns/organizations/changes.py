@@ -0,0 +1,176 @@
+"""
+Change feed of organizations and returns, for consumers that keep a copy of the data in sync incrementally.
+
+Changes are ordered by (updated_at, id), with deletions interleaved from their tombstones, and paginated with an opaque
+cursor holding the position of the last change read. Consumers store the cursor of their last page and pass it back
+on their next sync to only get what changed since.
+
+While a dataset job is running, the feed stops at the time the job started. Its rows get their updated_at when they are
+written but only become visible when their transaction commits, so a cursor moving past them before then would skip
+them. Once the job finishes, its changes are returned in the next sync. Jobs whose worker died without finishing them
+are marked as failed once they have not been saved for longer than a task can run, so they do not hold back the feed
+forever.
+"""
+
+import base64
+import binascii
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+import heapq
+from itertools import islice
+from uuid import UUID
+
+from django.conf import settings
+from django.db.models import Min, Model, Q, QuerySet
+from django.utils import timezone
+
+from organizations.models import DatasetArchive, DatasetJob, DeletedRecord, Organization, OrganizationReturnInformation
+
+CHANGE_FEED_KINDS = {
+    "organizations": (Organization, DeletedRecord.Kind.ORGANIZATION),
+    "returns": (OrganizationReturnInformation, DeletedRecord.Kind.RETURN),
+}
+
+RUNNING_JOB_STATUSES = [DatasetJob.Status.DOWNLOADING, DatasetJob.Status.PROCESSING]
+
+
+@dataclass(frozen=True)
+class ChangeCursor:
+    """Position of a change in the feed."""
+
+    changed_at: datetime
+    id: UUID
+
+    def encode(self) -> str:
+        return base64.urlsafe_b64encode(f"{self.changed_at.isoformat()}|{self.id}".encode()).decode()
+
+    @classmethod
+    def decode(cls, token: str) -> "ChangeCursor":
+        """Decode a cursor given by a client, raising ValueError if it is invalid."""
+        try:
+            changed_at, id = base64.urlsafe_b64decode(token.encode()).decode().split("|")
+            return cls(datetime.fromisoformat(changed_at), UUID(id))
+        except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+            raise ValueError(f"Invalid cursor: {token}") from e
+
+    @classmethod
+    def since(cls, changed_at: datetime) -> "ChangeCursor":
+        """Cursor before every change made at or after the given time."""
+        return cls(changed_at, UUID(int=0))
+
+
+@dataclass
+class Change:
+    """A changed object, or the tombstone of a deleted one."""
+
+    cursor: ChangeCursor
+    deleted: bool
+    # The changed organization or return, or the DeletedRecord of a deleted one
+    instance: Model
+
+
+@dataclass
+class ChangePage:
+    changes: list[Change]
+    # Cursor to pass back for the next page, or None if the feed was empty from the start
+    next_cursor: ChangeCursor | None
+    has_more: bool
+    # Changes after this time are held back until the running dataset jobs finish
+    until: datetime
+
+
+def fail_stale_jobs() -> int:
+    """
+    Mark the running dataset jobs that have not been saved for longer than a task can run as failed.
+
+    Running jobs save their progress as they go. A worker killed at the task's hard time limit, or by a crash or a
+    deploy, leaves its job running though, which would hold back the change feed forever. The last save of a job is
+    after its task started, and a task is killed CELERY_TASK_TIME_LIMIT seconds after it started, so a job that has not
+    been saved for that long is no longer running.
+
+    Returns:
+        Number of jobs marked as failed
+    """
+    now = timezone.now()
+    stale_job_ids = list(
+        DatasetJob.objects.filter(
+            status__in=RUNNING_JOB_STATUSES, updated_at__lt=now - timedelta(seconds=settings.CELERY_TASK_TIME_LIMIT)
+        ).values_list("id", flat=True)
+    )
+    if not stale_job_ids:
+        return 0
+
+    error_message = "The job stopped without finishing, e.g. its worker was killed."
+    DatasetArchive.objects.filter(job__in=stale_job_ids, status__in=RUNNING_JOB_STATUSES).update(
+        status=DatasetJob.Status.FAILED, error_message=error_message, updated_at=now
+    )
+    # The status is checked again in case a job finished meanwhile
+    return DatasetJob.objects.filter(id__in=stale_job_ids, status__in=RUNNING_JOB_STATUSES).update(
+        status=DatasetJob.Status.FAILED, error_message=error_message, finished_at=now, updated_at=now
+    )
+
+
+def get_feed_end() -> datetime:
+    """
+    Get the time up to which changes can be read, which is the start of the oldest running dataset job if any.
+
+    Stale jobs are marked as failed first, see fail_stale_jobs.
+    """
+    fail_stale_jobs()
+    oldest_running_job = (
+        DatasetJob.objects.filter(dry_run=False, status__in=RUNNING_JOB_STATUSES)
+        .aggregate(started_at=Min("created_at"))
+        .get("started_at")
+    )
+    now = timezone.now()
+    return min(oldest_running_job, now) if oldest_running_job else now
+
+
+def _after(queryset: QuerySet, time_field: str, cursor: ChangeCursor | None, until: datetime) -> QuerySet:
+    queryset = queryset.filter(**{f"{time_field}__lte": until})
+    if cursor:
+        # The redundant lower bound is what lets the planner start the index scan at the cursor instead of filtering
+        queryset = queryset.filter(**{f"{time_field}__gte": cursor.changed_at}).filter(
+            Q(**{f"{time_field}__gt": cursor.changed_at}) | Q(id__gt=cursor.id)
+        )
+    return queryset.order_by(time_field, "id")
+
+
+def get_changes(kind: str, cursor: ChangeCursor | None = None, limit: int = 100) -> ChangePage:
+    """
+    Get a page of the changes to organizations or returns after a cursor.
+
+    Each page reads at most limit + 1 changed rows and as many tombstones along the (updated_at, id) and
+    (deleted_at, id) indexes, and merges them in order.
+
+    Args:
+        kind: "organizations" or "returns"
+        cursor: Position of the last change read, or None to start from the beginning
+        limit: Maximum number of changes in the page
+
+    Returns:
+        The page of changes and the cursor to get the next one
+    """
+    model, deleted_kind = CHANGE_FEED_KINDS[kind]
+    until = get_feed_end()
+
+    updated = _after(model.objects.all(), "updated_at", cursor, until)
+    if model is Organization:
+        updated = updated.defer("search_vector")
+    deleted = _after(DeletedRecord.objects.filter(kind=deleted_kind), "deleted_at", cursor, until)
+
+    changes = heapq.merge(
+        (Change(ChangeCursor(instance.updated_at, instance.id), False, instance) for instance in updated[: limit + 1]),
+        (Change(ChangeCursor(record.deleted_at, record.id), True, record) for record in deleted[: limit + 1]),
+        key=lambda change: (change.cursor.changed_at, change.cursor.id),
+    )
+    changes = list(islice(changes, limit + 1))
+
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    return ChangePage(
+        changes=changes,
+        next_cursor=changes[-1].cursor if changes else cursor,
+        has_more=has_more,
+        until=until,
+    )
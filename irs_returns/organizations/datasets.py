@@ -1,34 +1,74 @@
 import logging
 from pathlib import Path
+import time
 import zipfile
 
+from django.conf import settings
 from lxml import etree
 
-from organizations.models import DatasetJob, Organization, OrganizationReturnInformation
+from organizations.filing_index import select_new_filings
+from organizations.filing_store import FilingStore
+from organizations.models import DatasetArchive, DatasetJob
+from organizations.parse_report import ParseReport
 from organizations.parsers import XMLParser
 from organizations.parsers.errors import NoStrategyFoundError
+from organizations.profiling import DatasetProfiler
+from organizations.writers import archive_filing, get_writer
 
 logger = logging.getLogger(__name__)
 
 
-def _get_xml_files_from_zip(dataset_zip_path: str, extract_dir: Path):
-    """Get all XML files from a ZIP file and extract them to a directory."""
+def _get_xml_files_from_zip(dataset_zip_path: str, extract_dir: Path, members: list[str] | None = None):
+    """Get all XML files, or only the given members, from a ZIP file and extract them to a directory."""
     with zipfile.ZipFile(dataset_zip_path, "r") as zip_ref:
-        zip_ref.extractall(extract_dir)
-
-    return list(extract_dir.glob("*.xml"))
-
-
-def process_dataset(dataset_zip_path: str, extract_dir: str, job: DatasetJob | None = None):
-    """Process a dataset ZIP file: extract XML files, parse them, and create or update organizations and returns."""
-    logger.info("Starting dataset processing...")
+        if members is None:
+            zip_ref.extractall(extract_dir)
+        else:
+            return [Path(zip_ref.extract(member, extract_dir)) for member in members]
+
+    # Files are named after their object ID, which grows over time, so amended returns are processed after the original
+    return sorted(extract_dir.glob("*.xml"))
+
+
+def process_dataset(
+    dataset_zip_path: str,
+    extract_dir: str,
+    job: DatasetJob | DatasetArchive | None = None,
+    index_path: str | None = None,
+    dry_run: bool = False,
+    report: ParseReport | None = None,
+    profiler: DatasetProfiler | None = None,
+):
+    """
+    Process a dataset ZIP file: extract XML files, parse them, and create or update organizations and returns.
+
+    The progress is recorded on the job, or on the archive when processing one of the ZIP files of a batch job. With an
+    IRS filing index, only the filings of a supported form type that were not ingested yet are extracted and parsed
+    (see organizations.filing_index).
+
+    With DATASET_ARCHIVE_FILINGS, every file is also kept in the filing store, whether or not a return could be
+    extracted from it, so that it can be re-extracted later (see organizations.reextraction).
+
+    Organizations and returns are written by the writer of DATASET_WRITE_BACKEND (see organizations.writers), either
+    file by file or in chunks. A dry run parses every file the same way but does not write organizations or returns,
+    which makes it possible to measure the parsers on their own. Timings, strategy counts, skip reasons and fill rates
+    are added to the report if one is given. With a profiler, the files it samples are profiled from reading to saving,
+    or to buffering with a writer that writes in chunks.
+    """
+    start = time.perf_counter()
+    logger.info(f"Starting dataset processing{' (dry run)' if dry_run else ''}...")
     logger.info("-" * 100)
     logger.info(f"Processing dataset ZIP file: {dataset_zip_path}")
+    members = select_new_filings(index_path, dataset_zip_path)[0] if index_path else None
     logger.info(f"Extracting ZIP file to: {extract_dir}")
-    xml_files = _get_xml_files_from_zip(dataset_zip_path, Path(extract_dir))
+    xml_files = _get_xml_files_from_zip(dataset_zip_path, Path(extract_dir), members)
     total_files = len(xml_files)
+    if report is not None:
+        report.extract_seconds += time.perf_counter() - start
     logger.info(f"Found {total_files} XML files to process.")
     logger.info("-" * 100)
+    filing_store = FilingStore(settings.DATASET_FILING_STORE_DIR) if settings.DATASET_ARCHIVE_FILINGS else None
+    writer = None if dry_run else get_writer()
 
     # Update job status
     if job:
@@ -38,77 +78,67 @@ def process_dataset(dataset_zip_path: str, extract_dir: str, job: DatasetJob | N
         job.save(update_fields=["status", "total_files", "progress"])
 
     # Process XML files
-    organizations_created = 0
-    returns_created = 0
     processed_count = 0
     skipped_count = 0
     total_attempted = 0
 
     logger.info(f"Processing {total_files} XML files...")
     for xml_file in xml_files:
+        # Outside of the per-file error handling, since a chunk that cannot be written must fail the job
+        if writer is not None and writer.full:
+            writer.flush()
         total_attempted += 1
         logger.debug("-" * 60)
         logger.debug(f"Processing XML file: {xml_file}")
+        file_start = time.perf_counter()
+        xml_content = b""
+        sha256 = None
+        profiling = profiler is not None and profiler.start_file()
         try:
             with open(xml_file, "rb") as f:
                 xml_content = f.read()
+            if filing_store is not None and not dry_run:
+                sha256 = filing_store.add(xml_content)
 
             # Parse XML file
-            parsed_data = XMLParser(xml_content).parse()
+            parsed_filing = XMLParser(xml_content).parse()
+            if report is not None:
+                report.add_parsed(parsed_filing, len(xml_content), time.perf_counter() - file_start)
 
             # Create or update organization and return information
-            org_data = parsed_data["data"]["organization"]
-            if org_data.get("name"):
-                organization, org_created = Organization.objects.update_or_create(
-                    name=org_data["name"],
-                    defaults={
-                        "website_url": org_data.get("website_url") or "",
-                        "mission_description": org_data.get("mission_description") or "",
-                    },
-                )
-
-                if org_created:
-                    organizations_created += 1
-
-                return_data = parsed_data["data"]["return_info"]
-                if return_data.get("tax_period_start_date") and return_data.get("tax_period_end_date"):
-                    _, return_created = OrganizationReturnInformation.objects.update_or_create(
-                        organization=organization,
-                        tax_period_start_date=return_data["tax_period_start_date"],
-                        tax_period_end_date=return_data["tax_period_end_date"],
-                        defaults={
-                            "original_file_name": xml_file.name,
-                            "return_type": return_data.get("return_type"),
-                            "filed_on": return_data.get("filed_on"),
-                            "employee_count": return_data.get("employee_count"),
-                            "py_employee_count": return_data.get("py_employee_count"),
-                            "total_revenue": return_data.get("total_revenue"),
-                            "py_total_revenue": return_data.get("py_total_revenue"),
-                            "total_expenses": return_data.get("total_expenses"),
-                            "py_total_expenses": return_data.get("py_total_expenses"),
-                            "total_assets_eoy": return_data.get("total_assets_eoy"),
-                            "total_assets_boy": return_data.get("total_assets_boy"),
-                            "total_liabilities_eoy": return_data.get("total_liabilities_eoy"),
-                            "total_liabilities_boy": return_data.get("total_liabilities_boy"),
-                        },
-                    )
-
-                    if return_created:
-                        returns_created += 1
+            if writer is not None:
+                writer.add(xml_file, parsed_filing, sha256, len(xml_content))
+                # The writer records the filing as archived along with its return
+                sha256 = None
             processed_count += 1
-        except NoStrategyFoundError:
+        except NoStrategyFoundError as e:
             logger.debug(f"Skipping XML file because no handler was found for this form type: {xml_file}")
             skipped_count += 1
+            if report is not None:
+                report.add_skipped(
+                    f"no strategy for form type {e.return_type or 'unknown'}",
+                    len(xml_content),
+                    time.perf_counter() - file_start,
+                )
             continue
         except etree.XMLSyntaxError:
             logger.debug(f"Skipping XML file because it is does not contain valid XML: {xml_file}")
             skipped_count += 1
+            if report is not None:
+                report.add_skipped("invalid XML", len(xml_content), time.perf_counter() - file_start)
             continue
         except Exception as e:
             # Log error but continue processing other files
             logger.error(f"Unknown error while processing {xml_file}: {str(e)}")
             skipped_count += 1
+            if report is not None:
+                report.add_skipped(f"error: {type(e).__name__}", len(xml_content), time.perf_counter() - file_start)
             continue
+        finally:
+            if sha256 is not None:
+                archive_filing(xml_file, sha256, len(xml_content), None)
+            if profiling:
+                profiler.stop_file()
 
         if total_attempted % 100 == 0 or total_attempted == total_files:
             logger.info(
@@ -123,4 +153,12 @@ def process_dataset(dataset_zip_path: str, extract_dir: str, job: DatasetJob | N
                 job.processed_files = total_attempted
                 job.save(update_fields=["progress", "processed_files"])
 
+    if writer is None:
+        organizations_created = returns_created = 0
+    else:
+        writer.flush()
+        organizations_created, returns_created = writer.organizations_created, writer.returns_created
+
+    if report is not None:
+        report.total_seconds += time.perf_counter() - start
     return organizations_created, returns_created
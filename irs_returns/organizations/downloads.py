@@ -0,0 +1,352 @@
+"""
+Downloads of dataset files.
+
+Downloads are cached in DATASET_DOWNLOAD_CACHE_DIR, keyed by URL, along with the ETag and Last-Modified headers they
+were served with. A cached file is reused when a conditional request tells that it did not change on the server, so
+reprocessing the same ZIP files (e.g. after a parser fix) does not transfer them again. Cached files are verified
+against the SHA-256 recorded when they were downloaded before being reused, and the least recently used ones are
+evicted once the cache grows over DATASET_DOWNLOAD_CACHE_MAX_GB.
+
+Cached files are never modified in place: new downloads replace them atomically, and they are hard linked into the
+path the caller asked for. Callers can then delete their copy, and eviction can delete the cached one, without
+affecting each other, even with several workers sharing the cache.
+
+Large files are downloaded in DATASET_DOWNLOAD_PARTS byte ranges over as many connections when the server supports
+range requests, since a single connection is usually throttled well below the bandwidth available. Each range is
+retried on its own, from where it stopped, and If-Range makes sure that all of them come from the same version of the
+file. Other files are streamed over a single connection.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+import shutil
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+import requests
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+
+# Smallest byte range a file is split into, so that small files are not split into many short requests
+MIN_PART_SIZE = 16 * 1024 * 1024
+
+# Number of times a byte range is retried after failing
+RANGE_RETRIES = 3
+
+
+class DownloadChangedError(requests.RequestException):
+    """The file changed on the server while its byte ranges were being downloaded."""
+
+
+@dataclass
+class CachedDownload:
+    """Metadata of a cached download, stored next to it as JSON."""
+
+    url: str
+    etag: str
+    last_modified: str
+    size: int
+    sha256: str
+    last_used: float
+
+
+class DownloadProgress:
+    """Number of bytes downloaded of a file, updated by the threads downloading it and read by others."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.downloaded = 0
+        self.total: int | None = None
+
+    def add(self, size: int) -> None:
+        with self._lock:
+            self.downloaded += size
+
+    @property
+    def fraction(self) -> float:
+        """Fraction of the file downloaded, 0 while its size is unknown."""
+        return min(self.downloaded / self.total, 1.0) if self.total else 0.0
+
+
+def _stream_to(response: requests.Response, path: Path, progress: DownloadProgress) -> tuple[int, str]:
+    """Write the body of a response to a file, returning its size and SHA-256."""
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "wb") as f:
+        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+            f.write(chunk)
+            digest.update(chunk)
+            size += len(chunk)
+            progress.add(len(chunk))
+
+    expected_size = response.headers.get("Content-Length")
+    # Content-Length is the encoded size when the response is compressed, which iter_content decodes
+    if expected_size and not response.headers.get("Content-Encoding") and int(expected_size) != size:
+        raise requests.RequestException(f"Incomplete download of {response.url}: {size} of {expected_size} bytes.")
+
+    return size, digest.hexdigest()
+
+
+def _range_validator(response: requests.Response) -> str | None:
+    """Get the validator to send as If-Range with the range requests of a file, or None if it cannot be split."""
+    accept_ranges = response.headers.get("Accept-Ranges", "").lower()
+    if accept_ranges != "bytes" or response.headers.get("Content-Encoding"):
+        return None
+    # If-Range only accepts strong ETags
+    etag = response.headers.get("ETag", "")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return response.headers.get("Last-Modified") or None
+
+
+def _download_range(
+    url: str,
+    path: Path,
+    start: int,
+    end: int,
+    validator: str,
+    progress: DownloadProgress,
+    response: requests.Response | None = None,
+) -> None:
+    """
+    Download bytes start to end (inclusive) of a file into the same bytes of path, retrying from where it stopped.
+
+    The first attempt can read from a response to a request for the whole file if the range starts at 0.
+    """
+    offset = start
+    with open(path, "r+b") as f:
+        for attempt in range(RANGE_RETRIES + 1):
+            try:
+                if response is None:
+                    response = requests.get(
+                        url,
+                        headers={"Range": f"bytes={offset}-{end}", "If-Range": validator},
+                        timeout=300,
+                        stream=True,
+                    )
+                    response.raise_for_status()
+                    if response.status_code != requests.codes.partial_content:
+                        # The server sends the whole file instead of the range if it no longer matches If-Range
+                        raise DownloadChangedError(f"{url} changed on the server during its download.")
+
+                with response:
+                    f.seek(offset)
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        chunk = chunk[: end + 1 - offset]
+                        f.write(chunk)
+                        offset += len(chunk)
+                        progress.add(len(chunk))
+                        if offset > end:
+                            return
+                raise requests.RequestException(f"Incomplete download of bytes {start}-{end} of {url}.")
+            except requests.RequestException as e:
+                client_error = isinstance(e, requests.HTTPError) and e.response.status_code < 500
+                if attempt == RANGE_RETRIES or client_error or isinstance(e, DownloadChangedError):
+                    raise
+                logger.warning(f"Retrying bytes {offset}-{end} of {url}: {e}")
+                time.sleep(2**attempt)
+            finally:
+                response = None
+
+
+def _download_parts(
+    url: str, response: requests.Response, path: Path, size: int, parts: int, validator: str, progress: DownloadProgress
+) -> None:
+    """Download a file in byte ranges over parallel connections, the first one reading the response already made."""
+    part_size = -(-size // parts)
+    with open(path, "wb") as f:
+        f.truncate(size)
+
+    with ThreadPoolExecutor(max_workers=parts) as pool:
+        downloads = [
+            pool.submit(
+                _download_range,
+                url,
+                path,
+                start,
+                min(start + part_size, size) - 1,
+                validator,
+                progress,
+                response if start == 0 else None,
+            )
+            for start in range(0, size, part_size)
+        ]
+        for download in downloads:
+            download.result()
+
+
+def _fetch(url: str, response: requests.Response, path: Path, progress: DownloadProgress) -> tuple[int, str]:
+    """Write the file of a successful response to path, in byte ranges if possible, returning its size and SHA-256."""
+    size = int(response.headers.get("Content-Length") or 0)
+    progress.total = size or None
+    validator = _range_validator(response)
+    parts = min(settings.DATASET_DOWNLOAD_PARTS, size // MIN_PART_SIZE)
+    if validator is None or parts < 2:
+        return _stream_to(response, path, progress)
+
+    _download_parts(url, response, path, size, parts, validator, progress)
+    # Parts are written out of order, so the file is only hashed once complete
+    return size, _file_sha256(path)
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _link_or_copy(source: Path, destination: Path) -> None:
+    destination.unlink(missing_ok=True)
+    try:
+        os.link(source, destination)
+    except OSError:
+        # Hard links only work within a file system
+        shutil.copyfile(source, destination)
+
+
+class DownloadCache:
+    """Size-bounded, least recently used cache of downloaded files."""
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+    def _paths(self, url: str) -> tuple[Path, Path]:
+        key = hashlib.sha256(url.encode()).hexdigest()
+        return self.directory / f"{key}.data", self.directory / f"{key}.json"
+
+    def _read_entry(self, url: str) -> CachedDownload | None:
+        data_path, meta_path = self._paths(url)
+        try:
+            entry = CachedDownload(**json.loads(meta_path.read_text()))
+        except (OSError, ValueError, TypeError):
+            return None
+
+        # A file that does not match what was downloaded must not be reused, so it is dropped from the cache
+        try:
+            valid = data_path.stat().st_size == entry.size and _file_sha256(data_path) == entry.sha256
+        except OSError:
+            valid = False
+        if not valid or entry.url != url:
+            logger.warning(f"Discarding the cached download of {url}, which does not match its checksum.")
+            self._remove(data_path, meta_path)
+            return None
+
+        return entry
+
+    def _write_entry(self, entry: CachedDownload) -> None:
+        _, meta_path = self._paths(entry.url)
+        with tempfile.NamedTemporaryFile("w", dir=self.directory, suffix=".tmp", delete=False) as temp_file:
+            json.dump(asdict(entry), temp_file)
+        os.replace(temp_file.name, meta_path)
+
+    def _remove(self, data_path: Path, meta_path: Path) -> None:
+        meta_path.unlink(missing_ok=True)
+        data_path.unlink(missing_ok=True)
+
+    def _evict(self) -> None:
+        """Remove the least recently used files until the cache fits in its size limit."""
+        entries = []
+        for meta_path in self.directory.glob("*.json"):
+            try:
+                entries.append((CachedDownload(**json.loads(meta_path.read_text())), meta_path))
+            except (OSError, ValueError, TypeError):
+                continue
+
+        total = sum(entry.size for entry, _ in entries)
+        for entry, meta_path in sorted(entries, key=lambda item: item[0].last_used):
+            if total <= self.max_bytes:
+                break
+            logger.info(f"Evicting the cached download of {entry.url} ({entry.size} bytes).")
+            self._remove(meta_path.with_suffix(".data"), meta_path)
+            total -= entry.size
+
+    def download(self, url: str, path: Path, progress: DownloadProgress) -> None:
+        """Download a file to path, reusing the cached copy if the server reports it unchanged."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        data_path, _ = self._paths(url)
+        entry = self._read_entry(url)
+        if entry:
+            # Linked before asking the server, so that other workers evicting the file in the meantime don't matter
+            try:
+                _link_or_copy(data_path, path)
+            except FileNotFoundError:
+                entry = None
+
+        headers = {}
+        if entry and entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry and entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+
+        response = requests.get(url, headers=headers, timeout=300, stream=True)
+        with response:
+            if entry and response.status_code == requests.codes.not_modified:
+                logger.info(f"Reusing the cached download of {url}, which did not change.")
+                progress.total = progress.downloaded = entry.size
+                entry.last_used = time.time()
+                self._write_entry(entry)
+                return
+
+            response.raise_for_status()
+            etag = response.headers.get("ETag", "")
+            last_modified = response.headers.get("Last-Modified", "")
+            if not etag and not last_modified:
+                # Without validators the file could not be reused safely, so it is not cached. The path may be a hard link
+                # to the cached file, which is unlinked so that writing the response doesn't overwrite the cache too.
+                path.unlink(missing_ok=True)
+                _fetch(url, response, path, progress)
+                return
+
+            with tempfile.NamedTemporaryFile(dir=self.directory, suffix=".tmp", delete=False) as temp_file:
+                temp_path = Path(temp_file.name)
+            try:
+                size, sha256 = _fetch(url, response, temp_path, progress)
+                os.replace(temp_path, data_path)
+            finally:
+                temp_path.unlink(missing_ok=True)
+
+        self._write_entry(CachedDownload(url, etag, last_modified, size, sha256, time.time()))
+        _link_or_copy(data_path, path)
+        self._evict()
+
+
+def download_file(url: str, path: Path, progress: DownloadProgress | None = None) -> None:
+    """
+    Download a file, streaming it to disk.
+
+    The download cache is used unless DATASET_DOWNLOAD_CACHE_MAX_GB is 0.
+
+    Args:
+        url: URL of the file
+        path: Path to write the file to
+        progress: Progress updated as the file is downloaded, for other threads to report it
+
+    Raises:
+        requests.RequestException: If the download fails
+    """
+    progress = progress or DownloadProgress()
+    if settings.DATASET_DOWNLOAD_CACHE_MAX_GB > 0:
+        max_bytes = int(settings.DATASET_DOWNLOAD_CACHE_MAX_GB * 1024**3)
+        DownloadCache(settings.DATASET_DOWNLOAD_CACHE_DIR, max_bytes).download(url, path, progress)
+        return
+
+    response = requests.get(
+        url,
+        timeout=300,  # 5 minute timeout
+        stream=True,
+    )
+    response.raise_for_status()
+    with response:
+        _fetch(url, response, path, progress)
@@ -0,0 +1,160 @@
+"""
+Selection of the filings to ingest from a dataset ZIP file, using the IRS filing index.
+
+Alongside the dataset ZIP files, the IRS publishes a yearly index CSV listing every e-filed return with its object ID,
+EIN, tax period and form type. The XML file of a filing inside a ZIP file is named after its object ID
+(`<object ID>_public.xml`), and is stored as the `original_file_name` of the return parsed from it. An amended return
+is a new filing with a new object ID, so a filing needs to be parsed if its object ID is listed in the index with a
+supported form type, no return was stored from its file yet, and no later filing of the same EIN and tax period
+supersedes it (parsing it would overwrite the amended return).
+"""
+
+from collections import Counter
+from collections.abc import Iterator
+import csv
+import logging
+from pathlib import PurePosixPath
+from typing import NamedTuple
+import zipfile
+
+from organizations.models import OrganizationReturnInformation
+
+logger = logging.getLogger(__name__)
+
+# Form types handled by XMLParser.STRATEGY_CLASSES, as written in the RETURN_TYPE column of the index
+SUPPORTED_RETURN_TYPES = {"990", "990EZ", "990PF"}
+
+# Number of file names looked up at once when checking which filings are already stored
+STORED_FILES_BATCH_SIZE = 1000
+
+
+class FilingIndexEntry(NamedTuple):
+    object_id: str
+    ein: str
+    tax_period: str
+    return_type: str
+
+
+def read_filing_index(index_path: str) -> Iterator[FilingIndexEntry]:
+    """
+    Read the entries of an IRS filing index CSV file.
+
+    Column names are matched case-insensitively, since their case changed over the years.
+
+    Args:
+        index_path: Path to the index CSV file
+
+    Yields:
+        One entry per filing listed in the index
+
+    Raises:
+        ValueError: If the file does not have the OBJECT_ID and RETURN_TYPE columns
+    """
+    with open(index_path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = [column.strip().upper() for column in next(reader, [])]
+        if "OBJECT_ID" not in header or "RETURN_TYPE" not in header:
+            raise ValueError(f"Not an IRS filing index, the OBJECT_ID and RETURN_TYPE columns are missing: {header}")
+
+        object_id_column = header.index("OBJECT_ID")
+        return_type_column = header.index("RETURN_TYPE")
+        ein_column = header.index("EIN") if "EIN" in header else None
+        tax_period_column = header.index("TAX_PERIOD") if "TAX_PERIOD" in header else None
+        for row in reader:
+            if len(row) <= max(object_id_column, return_type_column):
+                continue
+            yield FilingIndexEntry(
+                object_id=row[object_id_column].strip(),
+                ein=row[ein_column].strip() if ein_column is not None else "",
+                tax_period=row[tax_period_column].strip() if tax_period_column is not None else "",
+                return_type=row[return_type_column].strip().upper(),
+            )
+
+
+def _object_id(member_name: str) -> str:
+    """Get the object ID of a filing from the name of its XML file in a dataset ZIP file."""
+    return PurePosixPath(member_name).stem.split("_", 1)[0]
+
+
+def _get_stored_file_names(file_names: list[str]) -> set[str]:
+    stored = set()
+    for i in range(0, len(file_names), STORED_FILES_BATCH_SIZE):
+        stored.update(
+            OrganizationReturnInformation.objects.filter(
+                original_file_name__in=file_names[i : i + STORED_FILES_BATCH_SIZE]
+            ).values_list("original_file_name", flat=True)
+        )
+    return stored
+
+
+def _is_later(object_id: str, other_object_id: str) -> bool:
+    """Object IDs grow over time, but are only comparable as numbers."""
+    if object_id.isdigit() and other_object_id.isdigit():
+        return int(object_id) > int(other_object_id)
+    return object_id > other_object_id
+
+
+def select_new_filings(index_path: str, dataset_zip_path: str) -> tuple[list[str], Counter]:
+    """
+    Select the XML files of a dataset ZIP file that need to be parsed, according to the IRS filing index.
+
+    A file is selected if its filing is listed in the index with a supported form type, no return was stored from it
+    yet, and it is the latest filing of its EIN and tax period. The index usually covers a whole year of filings spread
+    over several ZIP files, so entries that are not in this ZIP file are only used to find superseded filings.
+
+    Args:
+        index_path: Path to the index CSV file
+        dataset_zip_path: Path to the dataset ZIP file
+
+    Returns:
+        Names of the ZIP file members to parse, and the number of skipped members by reason
+    """
+    with zipfile.ZipFile(dataset_zip_path, "r") as zip_ref:
+        members = {
+            _object_id(member_name): member_name
+            for member_name in zip_ref.namelist()
+            if member_name.lower().endswith(".xml")
+        }
+
+    # The index lists hundreds of thousands of filings, so only the entries of this ZIP file are kept, and the index is
+    # read a second time to find the latest filing of their EIN and tax period. Filings of unsupported form types, such
+    # as a 990T, are separate returns and do not supersede anything.
+    entries = {entry.object_id: entry for entry in read_filing_index(index_path) if entry.object_id in members}
+    latest_filings = {
+        (entry.ein, entry.tax_period): entry.object_id
+        for entry in entries.values()
+        if entry.return_type in SUPPORTED_RETURN_TYPES
+    }
+    for entry in read_filing_index(index_path):
+        key = (entry.ein, entry.tax_period)
+        if (
+            key in latest_filings
+            and entry.return_type in SUPPORTED_RETURN_TYPES
+            and _is_later(entry.object_id, latest_filings[key])
+        ):
+            latest_filings[key] = entry.object_id
+
+    skipped = Counter()
+    candidates = {}
+    for object_id, member_name in members.items():
+        entry = entries.get(object_id)
+        if entry is None:
+            skipped["not in index"] += 1
+        elif entry.return_type not in SUPPORTED_RETURN_TYPES:
+            skipped[f"unsupported form type {entry.return_type}"] += 1
+        elif latest_filings[(entry.ein, entry.tax_period)] != object_id:
+            skipped["superseded"] += 1
+        else:
+            candidates[PurePosixPath(member_name).name] = member_name
+
+    stored_file_names = _get_stored_file_names(list(candidates))
+    skipped["already stored"] = len(stored_file_names)
+    selected = sorted(
+        member_name for file_name, member_name in candidates.items() if file_name not in stored_file_names
+    )
+
+    logger.info(
+        f"Selected {len(selected)} of {len(members)} XML files using the filing index - Skipped: "
+        + (", ".join(f"{count} {reason}" for reason, count in sorted(skipped.items()) if count) or "none")
+    )
+    return selected, skipped
@@ -0,0 +1,48 @@
+"""
+Content-addressed store of raw XML filings.
+
+Each filing is stored gzipped under the SHA-256 of its XML, so a filing found in several ZIP files (e.g. when the IRS
+republishes a year) is only stored once. Which filing is which is recorded in ArchivedFiling, keyed by object ID.
+Files are written atomically and never modified, so processes can add and read filings concurrently.
+"""
+
+import gzip
+import hashlib
+import os
+from pathlib import Path
+import tempfile
+
+# Filings are mostly repeated tags, which the default compression level already shrinks about tenfold
+COMPRESS_LEVEL = 6
+
+
+class FilingStore:
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+
+    def path(self, sha256: str) -> Path:
+        # Files are spread over 256 subdirectories, since a year of filings is several hundred thousand files
+        return self.directory / sha256[:2] / f"{sha256[2:]}.xml.gz"
+
+    def add(self, xml_content: bytes) -> str:
+        """Store a filing unless it is already stored, returning its SHA-256."""
+        sha256 = hashlib.sha256(xml_content).hexdigest()
+        path = self.path(sha256)
+        if path.exists():
+            return sha256
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=path.parent, suffix=".tmp", delete=False) as temp_file:
+            temp_file.write(gzip.compress(xml_content, compresslevel=COMPRESS_LEVEL))
+        os.replace(temp_file.name, path)
+        return sha256
+
+    def read(self, sha256: str) -> bytes:
+        """
+        Read a stored filing.
+
+        Raises:
+            FileNotFoundError: If the filing is not stored
+        """
+        with open(self.path(sha256), "rb") as f:
+            return gzip.decompress(f.read())
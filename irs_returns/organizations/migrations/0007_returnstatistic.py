@@ -0,0 +1,39 @@
+# Generated by Django 6.0.1 on 2026-10-19 02:10
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0006_organizationreturninformation_original_file_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReturnStatistic',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('return_type', models.CharField(max_length=255)),
+                ('tax_year', models.IntegerField()),
+                ('metric', models.CharField(choices=[('total_revenue', 'Total revenue'), ('total_expenses', 'Total expenses'), ('total_assets_eoy', 'Total assets (EOY)')], max_length=32)),
+                ('count', models.IntegerField(default=0)),
+                ('total', models.DecimalField(decimal_places=2, max_digits=20)),
+                ('minimum', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('maximum', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('mean', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('p10', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('p25', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('median', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('p75', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('p90', models.DecimalField(decimal_places=2, max_digits=14)),
+            ],
+            options={
+                'ordering': ['return_type', '-tax_year', 'metric'],
+                'constraints': [models.UniqueConstraint(fields=('return_type', 'tax_year', 'metric'), name='unique_return_statistic_cohort')],
+            },
+        ),
+    ]
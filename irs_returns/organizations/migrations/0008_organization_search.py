@@ -0,0 +1,49 @@
+# Generated by Django 6.0.1 on 2026-10-19 02:20
+
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS organization_search_vector_gin '
+        'ON organizations_organization USING gin (search_vector)'
+    )
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS organization_name_trgm_gin '
+        'ON organizations_organization USING gin (name gin_trgm_ops)'
+    )
+    schema_editor.execute(
+        "UPDATE organizations_organization SET search_vector = "
+        "setweight(to_tsvector('english'::regconfig, COALESCE(name, '')), 'A') || "
+        "setweight(to_tsvector('english'::regconfig, COALESCE(mission_description, '')), 'B')"
+    )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute('DROP INDEX IF EXISTS organization_name_trgm_gin')
+    schema_editor.execute('DROP INDEX IF EXISTS organization_search_vector_gin')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0007_returnstatistic'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='organization',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
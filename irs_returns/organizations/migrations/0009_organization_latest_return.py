@@ -0,0 +1,124 @@
+# Generated by Django 6.0.1 on 2026-10-19 02:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+LATEST_RETURN_FIELDS = [
+    'tax_period_end_date',
+    'filed_on',
+    'return_type',
+    'employee_count',
+    'py_employee_count',
+    'total_revenue',
+    'py_total_revenue',
+    'total_expenses',
+    'py_total_expenses',
+    'total_assets_eoy',
+    'total_assets_boy',
+]
+
+
+def backfill_latest_returns(apps, schema_editor):
+    Organization = apps.get_model('organizations', 'Organization')
+    OrganizationReturnInformation = apps.get_model('organizations', 'OrganizationReturnInformation')
+
+    update_fields = ['latest_return', 'latest_tax_year', *[f'latest_{field}' for field in LATEST_RETURN_FIELDS]]
+    organization_ids = list(
+        OrganizationReturnInformation.objects.order_by().values_list('organization_id', flat=True).distinct()
+    )
+    for start in range(0, len(organization_ids), 2000):
+        batch = organization_ids[start:start + 2000]
+        latest_returns = {}
+        for return_info in OrganizationReturnInformation.objects.filter(organization_id__in=batch).order_by(
+            'organization_id', '-tax_period_end_date', '-filed_on'
+        ):
+            latest_returns.setdefault(return_info.organization_id, return_info)
+
+        organizations = list(Organization.objects.filter(pk__in=batch))
+        for organization in organizations:
+            return_info = latest_returns[organization.pk]
+            organization.latest_return = return_info
+            organization.latest_tax_year = return_info.tax_period_end_date.year
+            for field in LATEST_RETURN_FIELDS:
+                setattr(organization, f'latest_{field}', getattr(return_info, field))
+        Organization.objects.bulk_update(organizations, update_fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0008_organization_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='organization',
+            name='latest_employee_count',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='organization',
+            name='latest_filed_on',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='organization',
+            name='latest_py_employee_count',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='organization',
+            name='latest_py_total_expenses',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=14, null=True),
+        ),
+        migrations.AddField(
+            model_name='organization',
+            name='latest_py_total_revenue',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=14, null=True),
+        ),
+        migrations.AddField(
+            model_name='organization',
+            name='latest_return',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='organizations.organizationreturninformation'),
+        ),
+        migrations.AddField(
+            model_name='organization',
+            name='latest_return_type',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='organization',
+            name='latest_tax_period_end_date',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='organization',
+            name='latest_tax_year',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='organization',
+            name='latest_total_assets_boy',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=14, null=True),
+        ),
+        migrations.AddField(
+            model_name='organization',
+            name='latest_total_assets_eoy',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=14, null=True),
+        ),
+        migrations.AddField(
+            model_name='organization',
+            name='latest_total_expenses',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=14, null=True),
+        ),
+        migrations.AddField(
+            model_name='organization',
+            name='latest_total_revenue',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=14, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='organization',
+            index=models.Index(condition=models.Q(('latest_return__isnull', False)), fields=['name'], name='organization_with_return_idx'),
+        ),
+        migrations.RunPython(backfill_latest_returns, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,125 @@
+# Generated by Django 6.0.1 on 2026-10-19 02:52
+
+from datetime import date
+import re
+
+from django.conf import settings
+import django.db.models.deletion
+from django.db import migrations, models
+
+# The conversion is written out here rather than imported from organizations.partitions, so that later changes to that
+# module do not change what this migration does.
+RETURNS_TABLE = 'organizations_organizationreturninformation'
+PARTITION_KEY = 'tax_period_end_date'
+
+
+def _is_partitioned(cursor):
+    cursor.execute(
+        'SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))', [RETURNS_TABLE]
+    )
+    return cursor.fetchone()[0]
+
+
+def _rebuild_returns_table(cursor, partitioned):
+    old_table = f'{RETURNS_TABLE}_old'
+    cursor.execute(
+        "SELECT conrelid::regclass::text FROM pg_constraint WHERE confrelid = to_regclass(%s) AND contype = 'f'",
+        [RETURNS_TABLE],
+    )
+    referencing_tables = [row[0] for row in cursor.fetchall()]
+    if referencing_tables:
+        raise RuntimeError(
+            f"Foreign keys from {', '.join(referencing_tables)} reference {RETURNS_TABLE}, which cannot be kept "
+            'once it is partitioned. Use db_constraint=False on them.'
+        )
+
+    if partitioned:
+        cursor.execute(
+            "SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype IN ('u', 'x') "
+            'AND NOT conkey @> ARRAY[(SELECT attnum FROM pg_attribute WHERE attrelid = to_regclass(%s) '
+            'AND attname = %s)]',
+            [RETURNS_TABLE, RETURNS_TABLE, PARTITION_KEY],
+        )
+        unpartitionable = [row[0] for row in cursor.fetchall()]
+        if unpartitionable:
+            raise RuntimeError(
+                f"The constraints {', '.join(unpartitionable)} of {RETURNS_TABLE} do not include {PARTITION_KEY}, "
+                'so they cannot be kept once it is partitioned.'
+            )
+
+    cursor.execute(
+        'SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint '
+        "WHERE conrelid = to_regclass(%s) AND contype IN ('p', 'u', 'x', 'f')",
+        [RETURNS_TABLE],
+    )
+    constraints = cursor.fetchall()
+    primary_key_name = next(name for name, constraint_type, _ in constraints if constraint_type == 'p')
+    other_constraints = [
+        (name, definition) for name, constraint_type, definition in constraints if constraint_type != 'p'
+    ]
+    cursor.execute(
+        'SELECT indexdef FROM pg_indexes WHERE schemaname = current_schema() AND tablename = %s '
+        'AND indexname NOT IN (SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s))',
+        [RETURNS_TABLE, RETURNS_TABLE],
+    )
+    index_definitions = [
+        re.sub(r' ON (ONLY )?\S+ USING ', f' ON {RETURNS_TABLE} USING ', row[0]) for row in cursor.fetchall()
+    ]
+
+    cursor.execute(f'ALTER TABLE {RETURNS_TABLE} RENAME TO {old_table}')
+    create_table = f'CREATE TABLE {RETURNS_TABLE} (LIKE {old_table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+    if partitioned:
+        cursor.execute(f'{create_table} PARTITION BY RANGE ({PARTITION_KEY})')
+        cursor.execute(f'CREATE TABLE {RETURNS_TABLE}_default PARTITION OF {RETURNS_TABLE} DEFAULT')
+        cursor.execute(f'SELECT DISTINCT extract(year FROM {PARTITION_KEY})::int FROM {old_table} ORDER BY 1')
+        for (year,) in cursor.fetchall():
+            cursor.execute(
+                f'CREATE TABLE {RETURNS_TABLE}_y{year} PARTITION OF {RETURNS_TABLE} '
+                f"FOR VALUES FROM ('{date(year, 1, 1).isoformat()}') TO ('{date(year + 1, 1, 1).isoformat()}')"
+            )
+    else:
+        cursor.execute(create_table)
+
+    cursor.execute(f'INSERT INTO {RETURNS_TABLE} SELECT * FROM {old_table}')
+    cursor.execute(f'DROP TABLE {old_table}')
+
+    primary_key = f'id, {PARTITION_KEY}' if partitioned else 'id'
+    cursor.execute(f'ALTER TABLE {RETURNS_TABLE} ADD CONSTRAINT {primary_key_name} PRIMARY KEY ({primary_key})')
+    for index_definition in index_definitions:
+        cursor.execute(index_definition)
+    for name, definition in other_constraints:
+        cursor.execute(f'ALTER TABLE {RETURNS_TABLE} ADD CONSTRAINT {name} {definition}')
+
+
+def partition_returns(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql' or not settings.PARTITION_RETURNS:
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        if not _is_partitioned(cursor):
+            _rebuild_returns_table(cursor, partitioned=True)
+
+
+def unpartition_returns(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        if _is_partitioned(cursor):
+            _rebuild_returns_table(cursor, partitioned=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0009_organization_latest_return'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='organization',
+            name='latest_return',
+            field=models.ForeignKey(blank=True, db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='organizations.organizationreturninformation'),
+        ),
+        migrations.RunPython(partition_returns, unpartition_returns),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-19 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0010_return_partitions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasetjob',
+            name='index_url',
+            field=models.URLField(blank=True, max_length=2048),
+        ),
+    ]
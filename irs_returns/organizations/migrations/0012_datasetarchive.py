@@ -0,0 +1,40 @@
+# Generated by Django 6.0.1 on 2026-10-19 11:40
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0011_datasetjob_index_url'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='datasetjob',
+            name='zip_url',
+            field=models.URLField(blank=True, max_length=2048),
+        ),
+        migrations.CreateModel(
+            name='DatasetArchive',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('zip_url', models.URLField(max_length=2048)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('DOWNLOADING', 'Downloading'), ('PROCESSING', 'Processing'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed')], default='PENDING', max_length=20)),
+                ('progress', models.IntegerField(default=0)),
+                ('total_files', models.IntegerField(blank=True, null=True)),
+                ('processed_files', models.IntegerField(default=0)),
+                ('organizations_created', models.IntegerField(default=0)),
+                ('returns_created', models.IntegerField(default=0)),
+                ('error_message', models.TextField(blank=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archives', to='organizations.datasetjob')),
+            ],
+            options={
+                'ordering': ['created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-19 13:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0012_datasetarchive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasetjob',
+            name='dry_run',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='datasetjob',
+            name='report',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.1 on 2026-10-19 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0013_datasetjob_dry_run'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasetjob',
+            name='profile_every',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='datasetjob',
+            name='profile_file',
+            field=models.FileField(blank=True, upload_to='dataset_profiles/'),
+        ),
+        migrations.AddField(
+            model_name='datasetjob',
+            name='profile_summary',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
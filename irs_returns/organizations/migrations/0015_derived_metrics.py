@@ -0,0 +1,63 @@
+# Generated by Django 6.0.1 on 2026-10-19 14:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0014_datasetjob_profile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='organization',
+            name='latest_asset_growth',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='organization',
+            name='latest_expense_growth',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='organization',
+            name='latest_liability_ratio',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='organization',
+            name='latest_profit_margin',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='organization',
+            name='latest_revenue_growth',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='organizationreturninformation',
+            name='asset_growth',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='organizationreturninformation',
+            name='expense_growth',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='organizationreturninformation',
+            name='liability_ratio',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='organizationreturninformation',
+            name='profit_margin',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='organizationreturninformation',
+            name='revenue_growth',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+    ]
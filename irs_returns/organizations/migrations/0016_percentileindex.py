@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-19 15:20
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0015_derived_metrics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PercentileIndex',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('return_type', models.CharField(max_length=255)),
+                ('tax_year', models.IntegerField()),
+                ('metric', models.CharField(choices=[('total_revenue', 'Total revenue'), ('total_expenses', 'Total expenses'), ('total_assets_eoy', 'Total assets (EOY)')], max_length=32)),
+                ('count', models.IntegerField(default=0)),
+                ('values', models.BinaryField()),
+            ],
+            options={
+                'ordering': ['return_type', '-tax_year', 'metric'],
+                'constraints': [models.UniqueConstraint(fields=('return_type', 'tax_year', 'metric'), name='unique_percentile_index_cohort')],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 6.0.1 on 2026-10-19 15:45
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0016_percentileindex'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletedRecord',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('organization', 'Organization'), ('return', 'Return')], max_length=20)),
+                ('object_id', models.UUIDField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['deleted_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='datasetjob',
+            name='finished_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='organization',
+            index=models.Index(fields=['updated_at', 'id'], name='organization_changes_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='organizationreturninformation',
+            index=models.Index(fields=['updated_at', 'id'], name='return_changes_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='deletedrecord',
+            index=models.Index(fields=['kind', 'deleted_at', 'id'], name='deleted_record_changes_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:10
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0017_change_feed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='organizationreturninformation',
+            name='parser_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='ArchivedFiling',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('object_id', models.CharField(max_length=255, unique=True)),
+                ('sha256', models.CharField(max_length=64)),
+                ('size', models.PositiveIntegerField()),
+                ('parser_version', models.PositiveIntegerField(default=0)),
+                ('return_info', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='organizations.organizationreturninformation')),
+            ],
+            options={
+                'ordering': ['object_id'],
+            },
+        ),
+    ]
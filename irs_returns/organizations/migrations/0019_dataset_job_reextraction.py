@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0018_filing_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasetjob',
+            name='reextraction',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+    ]
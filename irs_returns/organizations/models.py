@@ -1,3 +1,4 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
 from core.models import TimestampedAbstractModel, UUIDAbstractModel
@@ -7,6 +8,88 @@ class Organization(UUIDAbstractModel, TimestampedAbstractModel):
     name = models.CharField(max_length=255)
     website_url = models.URLField(max_length=255)
     mission_description = models.TextField()
+    # Maintained at ingest on Postgres (see organizations.search). GIN indexes are created by migration.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    # Denormalized summary of the most recent return, maintained at ingest (see organizations.summaries)
+    latest_return = models.ForeignKey(
+        "OrganizationReturnInformation",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name="+",
+        # Postgres cannot enforce foreign keys to the returns table once it is partitioned (see organizations.partitions)
+        db_constraint=False,
+    )
+    latest_tax_year = models.IntegerField(null=True, blank=True, editable=False)
+    latest_tax_period_end_date = models.DateField(null=True, blank=True, editable=False)
+    latest_filed_on = models.DateField(null=True, blank=True, editable=False)
+    latest_return_type = models.CharField(max_length=255, blank=True, editable=False)
+    latest_employee_count = models.IntegerField(null=True, blank=True, editable=False)
+    latest_py_employee_count = models.IntegerField(null=True, blank=True, editable=False)
+    latest_total_revenue = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    latest_py_total_revenue = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    latest_total_expenses = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    latest_py_total_expenses = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    latest_total_assets_eoy = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    latest_total_assets_boy = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    latest_profit_margin = models.FloatField(null=True, blank=True, editable=False)
+    latest_revenue_growth = models.FloatField(null=True, blank=True, editable=False)
+    latest_expense_growth = models.FloatField(null=True, blank=True, editable=False)
+    latest_asset_growth = models.FloatField(null=True, blank=True, editable=False)
+    latest_liability_ratio = models.FloatField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Backs the summary list, which only includes organizations that have filed a return
+            models.Index(
+                fields=["name"],
+                condition=models.Q(latest_return__isnull=False),
+                name="organization_with_return_idx",
+            ),
+            # Keyset pagination of the change feed (see organizations.changes)
+            models.Index(fields=["updated_at", "id"], name="organization_changes_idx"),
+        ]
+
+    def __str__(self):
+        return self.name
 
 
 class OrganizationReturnInformation(UUIDAbstractModel, TimestampedAbstractModel):
@@ -66,6 +149,24 @@ class OrganizationReturnInformation(UUIDAbstractModel, TimestampedAbstractModel)
         null=True,
         blank=True,
     )
+    # Derived from the amounts above after each dataset job (see organizations.financial_metrics). Ratios, not amounts.
+    profit_margin = models.FloatField(null=True, blank=True, editable=False)
+    revenue_growth = models.FloatField(null=True, blank=True, editable=False)
+    expense_growth = models.FloatField(null=True, blank=True, editable=False)
+    asset_growth = models.FloatField(null=True, blank=True, editable=False)
+    liability_ratio = models.FloatField(null=True, blank=True, editable=False)
+    # PARSER_VERSION of the strategies the fields above were extracted with, 0 if ingested before it was recorded
+    parser_version = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the change feed (see organizations.changes)
+            models.Index(fields=["updated_at", "id"], name="return_changes_idx"),
+        ]
+
+    def __str__(self):
+        # Does not include the organization, which would be queried for every return listed
+        return f"{self.return_type} {self.tax_period_start_date} to {self.tax_period_end_date}"
 
 
 class DatasetJob(UUIDAbstractModel, TimestampedAbstractModel):
@@ -78,7 +179,19 @@ class DatasetJob(UUIDAbstractModel, TimestampedAbstractModel):
         COMPLETED = "COMPLETED", "Completed"
         FAILED = "FAILED", "Failed"
 
-    zip_url = models.URLField(max_length=2048)
+    # Empty for batch jobs, whose ZIP files are listed in their archives
+    zip_url = models.URLField(max_length=2048, blank=True)
+    # IRS filing index CSV used to only ingest filings that are new, see organizations.filing_index
+    index_url = models.URLField(max_length=2048, blank=True)
+    # Dry runs only parse the files, and store a ParseReport instead of writing organizations and returns
+    dry_run = models.BooleanField(default=False)
+    report = models.JSONField(null=True, blank=True)
+    # Marks the job registered by a run of reextract_filings, which is not a dataset job and is left out of the dataset API
+    reextraction = models.BooleanField(default=False, editable=False)
+    # Profile every Nth file with cProfile (see organizations.profiling), or none if empty
+    profile_every = models.PositiveIntegerField(null=True, blank=True)
+    profile_file = models.FileField(upload_to="dataset_profiles/", blank=True)
+    profile_summary = models.JSONField(null=True, blank=True)
     status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
     progress = models.IntegerField(default=0)  # 0-100
     total_files = models.IntegerField(null=True, blank=True)
@@ -86,6 +199,134 @@ class DatasetJob(UUIDAbstractModel, TimestampedAbstractModel):
     organizations_created = models.IntegerField(default=0)
     returns_created = models.IntegerField(default=0)
     error_message = models.TextField(blank=True)
+    # When the job completed or failed. The change feed holds back changes made while a job is running.
+    finished_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         ordering = ["-created_at"]
+
+    def save(self, *args, **kwargs):
+        # Progress is saved with update_fields, which would leave updated_at out. The change feed tells running jobs from
+        # dead ones by when they were last saved (see organizations.changes.fail_stale_jobs).
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = {*kwargs["update_fields"], "updated_at"}
+        super().save(*args, **kwargs)
+
+
+class DatasetArchive(UUIDAbstractModel, TimestampedAbstractModel):
+    """Track the status of one of the ZIP files of a batch dataset job."""
+
+    job = models.ForeignKey(DatasetJob, on_delete=models.CASCADE, related_name="archives")
+    zip_url = models.URLField(max_length=2048)
+    status = models.CharField(max_length=20, choices=DatasetJob.Status.choices, default=DatasetJob.Status.PENDING)
+    progress = models.IntegerField(default=0)  # 0-100
+    total_files = models.IntegerField(null=True, blank=True)
+    processed_files = models.IntegerField(default=0)
+    organizations_created = models.IntegerField(default=0)
+    returns_created = models.IntegerField(default=0)
+    error_message = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ["created_at"]
+
+
+class ReturnStatistic(UUIDAbstractModel, TimestampedAbstractModel):
+    """Precomputed aggregates of a return metric for a (return type, tax year) cohort."""
+
+    class Metric(models.TextChoices):
+        TOTAL_REVENUE = "total_revenue", "Total revenue"
+        TOTAL_EXPENSES = "total_expenses", "Total expenses"
+        TOTAL_ASSETS_EOY = "total_assets_eoy", "Total assets (EOY)"
+
+    return_type = models.CharField(max_length=255)
+    tax_year = models.IntegerField()
+    metric = models.CharField(max_length=32, choices=Metric.choices)
+    count = models.IntegerField(default=0)
+    total = models.DecimalField(max_digits=20, decimal_places=2)
+    minimum = models.DecimalField(max_digits=14, decimal_places=2)
+    maximum = models.DecimalField(max_digits=14, decimal_places=2)
+    mean = models.DecimalField(max_digits=14, decimal_places=2)
+    p10 = models.DecimalField(max_digits=14, decimal_places=2)
+    p25 = models.DecimalField(max_digits=14, decimal_places=2)
+    median = models.DecimalField(max_digits=14, decimal_places=2)
+    p75 = models.DecimalField(max_digits=14, decimal_places=2)
+    p90 = models.DecimalField(max_digits=14, decimal_places=2)
+
+    class Meta:
+        ordering = ["return_type", "-tax_year", "metric"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["return_type", "tax_year", "metric"],
+                name="unique_return_statistic_cohort",
+            ),
+        ]
+
+
+class PercentileIndex(UUIDAbstractModel, TimestampedAbstractModel):
+    """
+    Sorted values of a return metric for a (return type, tax year) cohort, for ranking returns within their cohort.
+
+    Refreshed along with the cohort's ReturnStatistic (see organizations.rankings).
+    """
+
+    return_type = models.CharField(max_length=255)
+    tax_year = models.IntegerField()
+    metric = models.CharField(max_length=32, choices=ReturnStatistic.Metric.choices)
+    count = models.IntegerField(default=0)
+    # Ascending float64 array (numpy.ndarray.tobytes)
+    values = models.BinaryField()
+
+    class Meta:
+        ordering = ["return_type", "-tax_year", "metric"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["return_type", "tax_year", "metric"],
+                name="unique_percentile_index_cohort",
+            ),
+        ]
+
+
+class DeletedRecord(UUIDAbstractModel):
+    """Tombstone of a deleted organization or return, so that the change feed can report deletions."""
+
+    class Kind(models.TextChoices):
+        ORGANIZATION = "organization", "Organization"
+        RETURN = "return", "Return"
+
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    object_id = models.UUIDField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["deleted_at"]
+        indexes = [
+            models.Index(fields=["kind", "deleted_at", "id"], name="deleted_record_changes_idx"),
+        ]
+
+
+class ArchivedFiling(UUIDAbstractModel, TimestampedAbstractModel):
+    """
+    Raw XML filing kept in the filing store, so that its return can be re-extracted without downloading it again.
+
+    See organizations.filing_store and organizations.reextraction.
+    """
+
+    # Name of the filing's XML file without its extension, which the IRS names after the filing's object ID
+    object_id = models.CharField(max_length=255, unique=True)
+    # SHA-256 of the XML, under which it is stored gzipped
+    sha256 = models.CharField(max_length=64)
+    size = models.PositiveIntegerField()
+    return_info = models.ForeignKey(
+        OrganizationReturnInformation,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        # Postgres cannot enforce foreign keys to the returns table once it is partitioned (see organizations.partitions)
+        db_constraint=False,
+    )
+    # PARSER_VERSION the filing was last extracted with, whether or not a return could be extracted from it
+    parser_version = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["object_id"]
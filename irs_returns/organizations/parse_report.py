@@ -0,0 +1,99 @@
+"""Statistics gathered while parsing dataset files, used to evaluate parser changes and size hardware."""
+
+from collections import Counter, defaultdict
+from dataclasses import fields
+from typing import Any
+
+from organizations.parsers import ParsedFiling
+
+
+def _is_filled(value: Any) -> bool:
+    return value is not None and value != ""
+
+
+class ParseReport:
+    """
+    Throughput, strategy counts, skip reasons and field fill rates of a dataset run.
+
+    A single report can be passed to several process_dataset calls (e.g. the archives of a batch job) to add them up.
+    """
+
+    def __init__(self):
+        self.files = 0
+        self.bytes = 0
+        self.download_seconds = 0.0
+        self.extract_seconds = 0.0
+        self.parse_seconds = 0.0
+        self.total_seconds = 0.0
+        self.strategies: Counter[str] = Counter()
+        self.skipped: Counter[str] = Counter()
+        # Parsed files that would not be saved, since their organization or tax period is missing
+        self.not_saved: Counter[str] = Counter()
+        self.filled_fields: defaultdict[str, Counter[str]] = defaultdict(Counter)
+
+    def add_parsed(self, parsed_filing: ParsedFiling, size: int, seconds: float) -> None:
+        """
+        Record a file that was parsed.
+
+        Args:
+            parsed_filing: Output of XMLParser.parse
+            size: Size of the XML file in bytes
+            seconds: Time spent reading and parsing the file
+        """
+        self.files += 1
+        self.bytes += size
+        self.parse_seconds += seconds
+
+        strategy_name = parsed_filing.strategy_name
+        self.strategies[strategy_name] += 1
+        filled_fields = self.filled_fields[strategy_name]
+        organization = parsed_filing.organization
+        return_info = parsed_filing.return_info
+        for section, record in [("organization", organization), ("return_info", return_info)]:
+            for field in fields(record):
+                # Counted even when empty so that fields that are never filled show up with a 0% fill rate
+                filled_fields[f"{section}.{field.name}"] += _is_filled(getattr(record, field.name))
+
+        if not organization.name:
+            self.not_saved["no organization name"] += 1
+        elif not (return_info.tax_period_start_date and return_info.tax_period_end_date):
+            self.not_saved["no tax period"] += 1
+
+    def add_skipped(self, reason: str, size: int, seconds: float) -> None:
+        """
+        Record a file that could not be parsed.
+
+        Args:
+            reason: Why the file was skipped
+            size: Size of the XML file in bytes
+            seconds: Time spent on the file before it was skipped
+        """
+        self.files += 1
+        self.bytes += size
+        self.parse_seconds += seconds
+        self.skipped[reason] += 1
+
+    def as_dict(self) -> dict[str, Any]:
+        """Get the report as a JSON serializable dict, with rates rounded for readability."""
+        megabytes = self.bytes / 1_000_000
+        return {
+            "files": self.files,
+            "megabytes": round(megabytes, 2),
+            "download_seconds": round(self.download_seconds, 3),
+            "extract_seconds": round(self.extract_seconds, 3),
+            "parse_seconds": round(self.parse_seconds, 3),
+            "total_seconds": round(self.total_seconds, 3),
+            # Parse throughput only counts the time spent reading and parsing files, so it can be compared across runs
+            "files_per_second": round(self.files / self.parse_seconds, 1) if self.parse_seconds else None,
+            "megabytes_per_second": round(megabytes / self.parse_seconds, 2) if self.parse_seconds else None,
+            "strategies": dict(self.strategies.most_common()),
+            "skipped": dict(self.skipped.most_common()),
+            "not_saved": dict(self.not_saved.most_common()),
+            "fill_rates": {
+                strategy_name: {
+                    field: round(filled / self.strategies[strategy_name], 4)
+                    for field, filled in sorted(filled_fields.items())
+                }
+                for strategy_name, filled_fields in self.filled_fields.items()
+            },
+        }
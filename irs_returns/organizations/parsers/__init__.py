@@ -1,8 +1,9 @@
 """XML Parser package using Strategy pattern."""
 
-from organizations.parsers.handler import XMLParser
+from organizations.parsers.handler import PARSER_VERSION, XMLParser
+from organizations.parsers.records import OrganizationRecord, ParsedFiling, ReturnRecord
 
-__all__ = ["XMLParser", "parse_irs_990_xml"]
+__all__ = ["PARSER_VERSION", "OrganizationRecord", "ParsedFiling", "ReturnRecord", "XMLParser", "parse_irs_990_xml"]
 
 
 def parse_irs_990_xml(xml_content: bytes) -> dict:
@@ -17,5 +18,4 @@ def parse_irs_990_xml(xml_content: bytes) -> dict:
     Returns:
         Dictionary with organization and return_info keys
     """
-    handler = XMLParser()
-    return handler.parse(xml_content)
+    return XMLParser(xml_content).parse().as_dict()["data"]
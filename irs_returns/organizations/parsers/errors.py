@@ -1,7 +1,8 @@
 class NoStrategyFoundError(Exception):
     """Exception raised when no handler is found for the given XML content."""
 
-    def __init__(self, xml_content: bytes, available_strategies: list[str]):
+    def __init__(self, xml_content: bytes, available_strategies: list[str], return_type: str | None = None):
+        self.return_type = return_type
         xml_content_str = (
             xml_content.decode("utf-8")[:50] + "..." if len(xml_content) > 50 else xml_content.decode("utf-8")
         )
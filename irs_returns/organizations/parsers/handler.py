@@ -1,18 +1,22 @@
 """XML Parser Handler using Strategy pattern."""
 
 import logging
-from typing import Any
 
 from lxml import etree
 
 from organizations.parsers.errors import NoStrategyFoundError
-from organizations.parsers.strategies.general import XMLParserStrategy
+from organizations.parsers.records import ParsedFiling
+from organizations.parsers.strategies.general import XMLParserStrategy, get_xml_parser
 from organizations.parsers.strategies.irs_990 import IRS990Strategy
 from organizations.parsers.strategies.irs_990_ez import IRS990EZStrategy
 from organizations.parsers.strategies.irs_990_pf import IRS990PFStrategy
 
 logger = logging.getLogger(__name__)
 
+# Version of the strategies, stamped on the returns they extract. Increment it whenever a strategy extracts something
+# new or differently, so that `manage.py reextract_filings` updates the returns extracted by earlier versions.
+PARSER_VERSION = 1
+
 
 class XMLParser:
     """Main handler for XML parsing using strategy pattern."""
@@ -42,21 +46,36 @@ class XMLParser:
             if strategy.can_handle():
                 logger.debug(f"Selected {strategy_name} strategy.")
                 return strategy_name, strategy
-        raise NoStrategyFoundError(self.xml_content, available_strategies=list(self.strategy_instances.keys()))
+        raise NoStrategyFoundError(
+            self.xml_content,
+            available_strategies=list(self.strategy_instances.keys()),
+            return_type=self._get_return_type(),
+        )
+
+    def _get_return_type(self) -> str | None:
+        """Get the form type declared in the return header, whatever its namespace."""
+        root = next(iter(self.strategy_instances.values())).root
+        if root is None:
+            return None
+        return root.findtext("{*}ReturnHeader/{*}ReturnTypeCd")
 
     def _validate_xml(self) -> None:
         """
         Check if the XML content is valid and well-formed.
 
+        The parsed tree is handed to every strategy so that the content is only parsed once.
+
         Args:
             xml_content: Raw XML bytes
 
         Raises:
             etree.XMLSyntaxError: If the XML content is not valid XML or not well-formed.
         """
-        etree.fromstring(self.xml_content)
+        root = etree.fromstring(self.xml_content, get_xml_parser())
+        for strategy in self.strategy_instances.values():
+            strategy.root = root
 
-    def parse(self) -> dict[str, Any]:
+    def parse(self) -> ParsedFiling:
         """
         Parse XML content using appropriate handler.
 
@@ -64,7 +83,8 @@ class XMLParser:
             None
 
         Returns:
-            Dictionary with strategy_name used and data parsed from the XML content.
+            The records parsed from the XML content, and the name of the strategy used. ParsedFiling.as_dict gives the
+            nested dict form this used to return.
 
         Raises:
             NoStrategyFoundError: If no suitable handler is found for the given XML content.
@@ -73,7 +93,5 @@ class XMLParser:
         self._validate_xml()
         strategy_name, strategy = self._select_strategy()
         logger.debug(f"Using {strategy_name} handler to parse XML content.")
-        return {
-            "strategy_name": strategy_name,
-            "data": strategy.parse(),
-        }
+        organization, return_info = strategy.parse()
+        return ParsedFiling(strategy_name, organization, return_info)
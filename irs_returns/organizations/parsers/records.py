@@ -0,0 +1,77 @@
+"""
+Records produced by the parsing strategies.
+
+Every strategy fills the same fixed schema, leaving None in the fields its form does not have. Records use slots
+instead of a dict per instance, which keeps them small when many are buffered, and they pickle as a list of their values
+when passed between processes. Their fields are named after the model fields they are written to.
+"""
+
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from operator import attrgetter
+from typing import Any
+
+
+class _Record:
+    __slots__ = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # dataclass(slots=True) creates the class again with its fields as slots, which is the class that is kept
+        if len(cls.__slots__) > 1:
+            # Gets every field at once, as a tuple in field order
+            cls._get_values = attrgetter(*cls.__slots__)
+        else:
+            # attrgetter gives the value itself rather than a tuple for a single field, and needs at least one
+            cls._get_values = staticmethod(lambda record: tuple(getattr(record, name) for name in cls.__slots__))
+
+    def __reduce__(self):
+        # Pickled as a call to the constructor with the values in field order, which is smaller and faster than the
+        # per-field state slotted dataclasses are pickled with by default
+        return type(self), self._get_values(self)
+
+
+@dataclass(slots=True)
+class OrganizationRecord(_Record):
+    name: str | None = None
+    website_url: str | None = None
+    mission_description: str | None = None
+
+
+@dataclass(slots=True)
+class ReturnRecord(_Record):
+    return_type: str | None = None
+    # Dates are parsed as datetimes, which the model's date fields convert when saving
+    filed_on: datetime | None = None
+    tax_period_start_date: datetime | None = None
+    tax_period_end_date: datetime | None = None
+    employee_count: int | None = None
+    py_employee_count: int | None = None
+    total_revenue: Decimal | None = None
+    py_total_revenue: Decimal | None = None
+    total_expenses: Decimal | None = None
+    py_total_expenses: Decimal | None = None
+    total_assets_eoy: Decimal | None = None
+    total_assets_boy: Decimal | None = None
+    total_liabilities_eoy: Decimal | None = None
+    total_liabilities_boy: Decimal | None = None
+
+
+@dataclass(slots=True)
+class ParsedFiling(_Record):
+    """What XMLParser.parse extracted from a filing, and the strategy that extracted it."""
+
+    strategy_name: str
+    organization: OrganizationRecord = field(default_factory=OrganizationRecord)
+    return_info: ReturnRecord = field(default_factory=ReturnRecord)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Get the nested dict form XMLParser.parse used to return, for code that still expects it."""
+        return {
+            "strategy_name": self.strategy_name,
+            "data": {
+                "organization": asdict(self.organization),
+                "return_info": asdict(self.return_info),
+            },
+        }
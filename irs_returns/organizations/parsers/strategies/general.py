@@ -3,16 +3,75 @@
 from abc import ABC, abstractmethod
 from datetime import datetime
 from decimal import Decimal
-from typing import Any
+import threading
+
+from lxml import etree
+
+from organizations.parsers.records import OrganizationRecord, ReturnRecord
 
 from .errors import StrategyCannotHandleXMLContentError
 
+_local = threading.local()
+
+
+def get_xml_parser() -> etree.XMLParser:
+    """
+    Get the configured XML parser shared by every strategy.
+
+    IRS filings never need entity resolution or network access, so both are disabled. lxml parsers must not be shared
+    between threads, so each thread gets its own instance.
+
+    Returns:
+        The calling thread's XML parser
+    """
+    parser = getattr(_local, "parser", None)
+    if parser is None:
+        parser = etree.XMLParser(resolve_entities=False, no_network=True)
+        _local.parser = parser
+    return parser
+
+
+def compile_xpath(expression: str, namespace: str) -> etree.XPath:
+    """
+    Get a compiled XPath expression, compiling it on first use.
+
+    The `irs` prefix in the expression is bound to the given namespace. Compiled expressions are cached per thread since
+    lxml's XPath evaluators are not thread-safe.
+
+    Args:
+        expression: XPath expression using the `irs` prefix
+        namespace: Namespace URI the `irs` prefix maps to
+
+    Returns:
+        The compiled XPath expression
+    """
+    compiled_xpaths = getattr(_local, "xpaths", None)
+    if compiled_xpaths is None:
+        compiled_xpaths = _local.xpaths = {}
+
+    xpath = compiled_xpaths.get((expression, namespace))
+    if xpath is None:
+        xpath = etree.XPath(expression, namespaces={"irs": namespace})
+        compiled_xpaths[(expression, namespace)] = xpath
+    return xpath
+
 
 class XMLParserStrategy(ABC):
     """Abstract base class for XML parsing strategies."""
 
-    def __init__(self, xml_content: bytes):
+    def __init__(self, xml_content: bytes, root: etree._Element | None = None):
         self.xml_content = xml_content
+        self.root = root
+
+    def _get_root(self) -> etree._Element:
+        """Get the parsed XML tree, parsing the content on first use so that it is only parsed once per file."""
+        if self.root is None:
+            self.root = etree.fromstring(self.xml_content, get_xml_parser())
+        return self.root
+
+    def _xpath(self, root: etree._Element, expression: str, ns: dict[str, str]) -> list:
+        """Evaluate an XPath expression using the `irs` prefix against the tree, compiling it once per process."""
+        return compile_xpath(expression, ns["irs"])(root)
 
     @abstractmethod
     def can_handle(self) -> bool:
@@ -28,7 +87,7 @@ class XMLParserStrategy(ABC):
         raise NotImplementedError("Subclasses must implement this method")
 
     @abstractmethod
-    def parse(self) -> dict[str, Any]:
+    def parse(self) -> tuple[OrganizationRecord, ReturnRecord]:
         """
         Parse the XML content.
 
@@ -36,7 +95,7 @@ class XMLParserStrategy(ABC):
             None
 
         Returns:
-            Dictionary with data parsed from the XML content
+            The organization and return records parsed from the XML content
         """
         raise NotImplementedError("Subclasses must implement this method")
 
@@ -1,10 +1,10 @@
 """IRS Form 990 XML parsing strategy."""
 
 import logging
-from typing import Any
 
 from lxml import etree
 
+from organizations.parsers.records import OrganizationRecord, ReturnRecord
 from organizations.parsers.strategies.general import XMLParserStrategy
 
 from .errors import StrategyCannotHandleXMLContentError
@@ -20,7 +20,7 @@ class IRS990Strategy(XMLParserStrategy):
     def can_handle(self) -> bool:
         """Check if this is an IRS Form 990 XML file."""
         try:
-            root = etree.fromstring(self.xml_content)
+            root = self._get_root()
             self._validate_has_irs_namespace(root)
             self._validate_has_irs_990_root_elements(root)
             self._validate_has_correct_return_type(root)
@@ -49,21 +49,15 @@ class IRS990Strategy(XMLParserStrategy):
         if return_type is None or return_type.text.lower() != "990":
             self._raise_cannot_handle_error()
 
-    def parse(self) -> dict[str, Any]:
+    def parse(self) -> tuple[OrganizationRecord, ReturnRecord]:
         """
         Parse an IRS Form 990 XML file and extract organization and return information.
 
-        Args:
-            xml_content: The XML file content as bytes
-
         Returns:
-            Dictionary with keys:
-            - organization: dict with name, website_url, mission_description
-            - return_info: dict with filed_on, tax_period_start_date, tax_period_end_date,
-              employee_count, total_revenue, total_expenses, total_assets
+            The organization and return records of the filing
         """
         # Parse XML with namespace support
-        root = etree.fromstring(self.xml_content)
+        root = self._get_root()
 
         # IRS Form 990 XML typically uses this namespace
         ns = {"irs": self.IRS_NAMESPACE}
@@ -80,167 +74,148 @@ class IRS990Strategy(XMLParserStrategy):
         # Extract return information
         return_data = self._extract_return_data(root, ns)
 
-        return {
-            "organization": organization_data,
-            "return_info": return_data,
-        }
+        return organization_data, return_data
 
-    def _extract_organization_data(self, root: etree.Element, ns: dict[str, str]) -> dict[str, Any]:
+    def _extract_organization_data(self, root: etree.Element, ns: dict[str, str]) -> OrganizationRecord:
         """Extract organization data from XML root."""
-        org_data = {
-            "name": None,
-            "website_url": None,
-            "mission_description": None,
-        }
+        org_data = OrganizationRecord()
 
         # Try various XPath patterns for organization name
-        name_elem = root.xpath(".//irs:Filer/irs:BusinessName/irs:BusinessNameLine1Txt", namespaces=ns)
+        name_elem = self._xpath(root, ".//irs:Filer/irs:BusinessName/irs:BusinessNameLine1Txt", ns)
         if name_elem and name_elem[0].text:
-            org_data["name"] = name_elem[0].text.strip()
+            org_data.name = name_elem[0].text.strip()
 
         # Try to find website URL
-        website_elem = root.xpath(".//irs:WebsiteAddressTxt", namespaces=ns)
+        website_elem = self._xpath(root, ".//irs:WebsiteAddressTxt", ns)
         if website_elem and website_elem[0].text:
             # We don't ensure the URL is valid here because we want to stay faithful to the original data.
             # The URL is prepended with "https://" in the serializer class.
             url = website_elem[0].text.strip()
-            org_data["website_url"] = url
+            org_data.website_url = url
 
         # Try to find mission description
-        mission_elem = root.xpath(".//irs:ActivityOrMissionDesc", namespaces=ns)
+        mission_elem = self._xpath(root, ".//irs:ActivityOrMissionDesc", ns)
         if mission_elem and mission_elem[0].text:
-            org_data["mission_description"] = mission_elem[0].text.strip().capitalize()
+            org_data.mission_description = mission_elem[0].text.strip().capitalize()
 
         return org_data
 
-    def _extract_return_data(self, root: etree.Element, ns: dict[str, str]) -> dict[str, Any]:
+    def _extract_return_data(self, root: etree.Element, ns: dict[str, str]) -> ReturnRecord:
         """Extract return information from XML root."""
-        return_data = {
-            "return_type": "990",
-            "filed_on": None,
-            "tax_period_start_date": None,
-            "tax_period_end_date": None,
-            "employee_count": None,
-            "total_revenue": None,
-            "total_expenses": None,
-            "total_assets_eoy": None,
-            "total_assets_boy": None,
-            "total_liabilities_eoy": None,
-            "total_liabilities_boy": None,
-        }
+        return_data = ReturnRecord(return_type="990")
 
         # Extract tax period dates
-        tax_period_start_elem = root.xpath(".//irs:ReturnHeader/irs:TaxPeriodBeginDt", namespaces=ns)
+        tax_period_start_elem = self._xpath(root, ".//irs:ReturnHeader/irs:TaxPeriodBeginDt", ns)
         if tax_period_start_elem and tax_period_start_elem[0].text:
             try:
-                return_data["tax_period_start_date"] = self._parse_datetime(tax_period_start_elem[0].text)
+                return_data.tax_period_start_date = self._parse_datetime(tax_period_start_elem[0].text)
             except (ValueError, TypeError):
                 logger.debug(f"Error parsing tax period start date: {tax_period_start_elem[0].text}", exc_info=True)
                 pass
 
-        tax_period_end_elem = root.xpath(".//irs:ReturnHeader/irs:TaxPeriodEndDt", namespaces=ns)
+        tax_period_end_elem = self._xpath(root, ".//irs:ReturnHeader/irs:TaxPeriodEndDt", ns)
         if tax_period_end_elem and tax_period_end_elem[0].text:
             try:
-                return_data["tax_period_end_date"] = self._parse_datetime(tax_period_end_elem[0].text)
+                return_data.tax_period_end_date = self._parse_datetime(tax_period_end_elem[0].text)
             except (ValueError, TypeError):
                 logger.debug(f"Error parsing tax period end date: {tax_period_end_elem[0].text}", exc_info=True)
                 pass
 
         # Extract filed date
-        filed_date_elem = root.xpath(".//irs:ReturnHeader/irs:ReturnTs", namespaces=ns)
+        filed_date_elem = self._xpath(root, ".//irs:ReturnHeader/irs:ReturnTs", ns)
         if filed_date_elem and filed_date_elem[0].text:
             try:
-                return_data["filed_on"] = self._parse_datetime(filed_date_elem[0].text)
+                return_data.filed_on = self._parse_datetime(filed_date_elem[0].text)
             except (ValueError, TypeError):
                 logger.debug(f"Error parsing filed date: {filed_date_elem[0].text}", exc_info=True)
                 pass
 
         # Extract employee count
-        employee_elem = root.xpath(".//irs:TotalEmployeeCnt", namespaces=ns)
+        employee_elem = self._xpath(root, ".//irs:TotalEmployeeCnt", ns)
         if employee_elem and employee_elem[0].text:
             try:
-                return_data["employee_count"] = int(employee_elem[0].text)
+                return_data.employee_count = int(employee_elem[0].text)
             except (ValueError, TypeError):
                 logger.debug(f"Error parsing employee count: {employee_elem[0].text}", exc_info=True)
                 pass
 
         # Extract previous year employee count
-        py_employee_elem = root.xpath(".//irs:PYTotalEmployeeCnt", namespaces=ns)
+        py_employee_elem = self._xpath(root, ".//irs:PYTotalEmployeeCnt", ns)
         if py_employee_elem and py_employee_elem[0].text:
             try:
-                return_data["py_employee_count"] = int(py_employee_elem[0].text)
+                return_data.py_employee_count = int(py_employee_elem[0].text)
             except (ValueError, TypeError):
                 logger.debug(f"Error parsing previous year employee count: {py_employee_elem[0].text}", exc_info=True)
                 pass
 
         # Extract total revenue
-        revenue_elem = root.xpath(".//irs:CYTotalRevenueAmt", namespaces=ns)
+        revenue_elem = self._xpath(root, ".//irs:CYTotalRevenueAmt", ns)
         if revenue_elem and revenue_elem[0].text:
             try:
-                return_data["total_revenue"] = self._parse_decimal(revenue_elem[0].text)
+                return_data.total_revenue = self._parse_decimal(revenue_elem[0].text)
             except (ValueError, TypeError):
                 logger.debug(f"Error parsing total revenue: {revenue_elem[0].text}", exc_info=True)
                 pass
 
         # Extract previous year total revenue
-        py_revenue_elem = root.xpath(".//irs:PYTotalRevenueAmt", namespaces=ns)
+        py_revenue_elem = self._xpath(root, ".//irs:PYTotalRevenueAmt", ns)
         if py_revenue_elem and py_revenue_elem[0].text:
             try:
-                return_data["py_total_revenue"] = self._parse_decimal(py_revenue_elem[0].text)
+                return_data.py_total_revenue = self._parse_decimal(py_revenue_elem[0].text)
             except (ValueError, TypeError):
                 logger.debug(f"Error parsing previous year total revenue: {py_revenue_elem[0].text}", exc_info=True)
                 pass
 
         # Extract total expenses
-        expense_elem = root.xpath(".//irs:CYTotalExpensesAmt", namespaces=ns)
+        expense_elem = self._xpath(root, ".//irs:CYTotalExpensesAmt", ns)
         if expense_elem and expense_elem[0].text:
             try:
-                return_data["total_expenses"] = self._parse_decimal(expense_elem[0].text)
+                return_data.total_expenses = self._parse_decimal(expense_elem[0].text)
             except (ValueError, TypeError):
                 logger.debug(f"Error parsing total expenses: {expense_elem[0].text}", exc_info=True)
                 pass
 
         # Extract previous year total expenses
-        py_expense_elem = root.xpath(".//irs:PYTotalExpensesAmt", namespaces=ns)
+        py_expense_elem = self._xpath(root, ".//irs:PYTotalExpensesAmt", ns)
         if py_expense_elem and py_expense_elem[0].text:
             try:
-                return_data["py_total_expenses"] = self._parse_decimal(py_expense_elem[0].text)
+                return_data.py_total_expenses = self._parse_decimal(py_expense_elem[0].text)
             except (ValueError, TypeError):
                 logger.debug(f"Error parsing previous year total expenses: {py_expense_elem[0].text}", exc_info=True)
                 pass
 
         # Extract total assets EOY
-        asset_elem = root.xpath(".//irs:TotalAssetsEOYAmt", namespaces=ns)
+        asset_elem = self._xpath(root, ".//irs:TotalAssetsEOYAmt", ns)
         if asset_elem and asset_elem[0].text:
             try:
-                return_data["total_assets_eoy"] = self._parse_decimal(asset_elem[0].text)
+                return_data.total_assets_eoy = self._parse_decimal(asset_elem[0].text)
             except (ValueError, TypeError):
                 logger.debug(f"Error parsing total assets EOY: {asset_elem[0].text}", exc_info=True)
                 pass
 
         # Extract total assets BOY
-        asset_boy_elem = root.xpath(".//irs:TotalAssetsBOYAmt", namespaces=ns)
+        asset_boy_elem = self._xpath(root, ".//irs:TotalAssetsBOYAmt", ns)
         if asset_boy_elem and asset_boy_elem[0].text:
             try:
-                return_data["total_assets_boy"] = self._parse_decimal(asset_boy_elem[0].text)
+                return_data.total_assets_boy = self._parse_decimal(asset_boy_elem[0].text)
             except (ValueError, TypeError):
                 logger.debug(f"Error parsing total assets BOY: {asset_boy_elem[0].text}", exc_info=True)
                 pass
 
         # Extract total liabilities EOY
-        liability_eoy_elem = root.xpath(".//irs:TotalLiabilitiesEOYAmt", namespaces=ns)
+        liability_eoy_elem = self._xpath(root, ".//irs:TotalLiabilitiesEOYAmt", ns)
         if liability_eoy_elem and liability_eoy_elem[0].text:
             try:
-                return_data["total_liabilities_eoy"] = self._parse_decimal(liability_eoy_elem[0].text)
+                return_data.total_liabilities_eoy = self._parse_decimal(liability_eoy_elem[0].text)
             except (ValueError, TypeError):
                 logger.debug(f"Error parsing total liabilities EOY: {liability_eoy_elem[0].text}", exc_info=True)
                 pass
 
         # Extract total liabilities BOY
-        liability_boy_elem = root.xpath(".//irs:TotalLiabilitiesBOYAmt", namespaces=ns)
+        liability_boy_elem = self._xpath(root, ".//irs:TotalLiabilitiesBOYAmt", ns)
         if liability_boy_elem and liability_boy_elem[0].text:
             try:
-                return_data["total_liabilities_boy"] = self._parse_decimal(liability_boy_elem[0].text)
+                return_data.total_liabilities_boy = self._parse_decimal(liability_boy_elem[0].text)
             except (ValueError, TypeError):
                 logger.debug(f"Error parsing total liabilities BOY: {liability_boy_elem[0].text}", exc_info=True)
                 pass
@@ -0,0 +1,239 @@
+"""
+Optional Postgres declarative partitioning of the returns table by tax year.
+
+When enabled, organizations_organizationreturninformation is range partitioned on tax_period_end_date with one
+partition per calendar year plus a default partition, so filters on a tax year (e.g. `tax_period_end_date__year=2023`)
+only scan that year's partition. The ORM is not aware of the partitioning: the model keeps `id` as its primary key,
+while the table's primary key is (id, tax_period_end_date) since Postgres requires unique constraints on a partitioned
+table to include the partition key. For the same reason, foreign keys to returns cannot be enforced by the database.
+"""
+
+from datetime import date
+import logging
+import re
+
+from django.db import connection as default_connection, transaction
+from django.db.backends.base.base import BaseDatabaseWrapper
+
+logger = logging.getLogger(__name__)
+
+RETURNS_TABLE = "organizations_organizationreturninformation"
+PARTITION_KEY = "tax_period_end_date"
+DEFAULT_PARTITION = f"{RETURNS_TABLE}_default"
+
+# Whether the table is partitioned and which years have a partition, to avoid querying the catalog for every return
+# written. Processes that were already running when the table got partitioned keep writing to the default partition
+# until they are restarted.
+_is_partitioned: bool | None = None
+_known_partitions: set[int] = set()
+
+
+def partition_name(year: int) -> str:
+    return f"{RETURNS_TABLE}_y{year}"
+
+
+def _partition_bounds(year: int) -> str:
+    return f"FROM ('{date(year, 1, 1).isoformat()}') TO ('{date(year + 1, 1, 1).isoformat()}')"
+
+
+def is_partitioned(connection: BaseDatabaseWrapper = default_connection) -> bool:
+    """Check whether the returns table is partitioned (always False on databases other than Postgres)."""
+    if connection.vendor != "postgresql":
+        return False
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))", [RETURNS_TABLE]
+        )
+        return cursor.fetchone()[0]
+
+
+def get_partitions(connection: BaseDatabaseWrapper = default_connection) -> list[tuple[str, str, int]]:
+    """
+    List the partitions of the returns table.
+
+    Returns:
+        List of (partition name, partition bounds, estimated row count) tuples
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname, pg_get_expr(child.relpartbound, child.oid), greatest(child.reltuples, 0)::bigint "
+            "FROM pg_inherits JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = to_regclass(%s) ORDER BY child.relname",
+            [RETURNS_TABLE],
+        )
+        return cursor.fetchall()
+
+
+def create_partition(year: int, connection: BaseDatabaseWrapper = default_connection) -> bool:
+    """
+    Create the partition of a tax year if it does not exist yet.
+
+    Returns of that year that were written before the partition existed are stored in the default partition. They are
+    moved into the new partition, since a partition cannot be created while the default partition holds rows for it.
+
+    Args:
+        year: Tax year (the year of the tax period's end date)
+
+    Returns:
+        True if the partition was created, False if it already existed
+    """
+    name = partition_name(year)
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [name])
+        if cursor.fetchone()[0]:
+            _known_partitions.add(year)
+            return False
+
+        cursor.execute(f"CREATE TABLE {name} (LIKE {RETURNS_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "  # noqa: S608
+            f"WHERE {PARTITION_KEY} >= %s AND {PARTITION_KEY} < %s RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved",
+            [date(year, 1, 1), date(year + 1, 1, 1)],
+        )
+        if cursor.rowcount:
+            logger.info(f"Moved {cursor.rowcount} returns of tax year {year} out of the default partition.")
+        cursor.execute(f"ALTER TABLE {RETURNS_TABLE} ATTACH PARTITION {name} FOR VALUES {_partition_bounds(year)}")
+
+    _known_partitions.add(year)
+    logger.info(f"Created returns partition {name}.")
+    return True
+
+
+def ensure_partition(tax_period_end_date: date | None, connection: BaseDatabaseWrapper = default_connection) -> None:
+    """
+    Make sure the partition a return will be written to exists, if the returns table is partitioned.
+
+    Returns without a partition of their own still end up in the default partition, but filters on their tax year
+    then also have to scan the default partition.
+
+    Args:
+        tax_period_end_date: End of the return's tax period
+    """
+    global _is_partitioned
+
+    if tax_period_end_date is None or tax_period_end_date.year in _known_partitions:
+        return
+    if _is_partitioned is None:
+        _is_partitioned = is_partitioned(connection)
+    if _is_partitioned:
+        create_partition(tax_period_end_date.year, connection)
+
+
+def split_default_partition(connection: BaseDatabaseWrapper = default_connection) -> list[int]:
+    """
+    Move returns out of the default partition into partitions of their own tax year.
+
+    Returns:
+        Years whose partition was created
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT DISTINCT extract(year FROM {PARTITION_KEY})::int FROM {DEFAULT_PARTITION} ORDER BY 1"  # noqa: S608
+        )
+        years = [row[0] for row in cursor.fetchall()]
+
+    return [year for year in years if create_partition(year, connection)]
+
+
+def partition_returns_table(connection: BaseDatabaseWrapper = default_connection) -> None:
+    """
+    Convert the returns table into a table partitioned by tax year, keeping its data, indexes and constraints.
+
+    The table is locked for the duration of the conversion, since every row is copied. Unique constraints that do not
+    include the tax period end date cannot be kept, so the conversion fails if there are any.
+    """
+    if is_partitioned(connection):
+        return
+    _rebuild_returns_table(connection, partitioned=True)
+
+
+def unpartition_returns_table(connection: BaseDatabaseWrapper = default_connection) -> None:
+    """Convert a partitioned returns table back into a regular table, keeping its data, indexes and constraints."""
+    if not is_partitioned(connection):
+        return
+    _rebuild_returns_table(connection, partitioned=False)
+
+
+def _rebuild_returns_table(connection: BaseDatabaseWrapper, partitioned: bool) -> None:
+    global _is_partitioned
+
+    old_table = f"{RETURNS_TABLE}_old"
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT conrelid::regclass::text FROM pg_constraint WHERE confrelid = to_regclass(%s) AND contype = 'f'",
+            [RETURNS_TABLE],
+        )
+        referencing_tables = [row[0] for row in cursor.fetchall()]
+        if referencing_tables:
+            raise RuntimeError(
+                f"Foreign keys from {', '.join(referencing_tables)} reference {RETURNS_TABLE}, which cannot be kept "
+                "once it is partitioned. Use db_constraint=False on them."
+            )
+
+        if partitioned:
+            # Unique and exclusion constraints of a partitioned table must include the partition key
+            cursor.execute(
+                "SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype IN ('u', 'x') "
+                "AND NOT conkey @> ARRAY[(SELECT attnum FROM pg_attribute WHERE attrelid = to_regclass(%s) "
+                "AND attname = %s)]",
+                [RETURNS_TABLE, RETURNS_TABLE, PARTITION_KEY],
+            )
+            unpartitionable = [row[0] for row in cursor.fetchall()]
+            if unpartitionable:
+                raise RuntimeError(
+                    f"The constraints {', '.join(unpartitionable)} of {RETURNS_TABLE} do not include {PARTITION_KEY}, "
+                    "so they cannot be kept once it is partitioned."
+                )
+
+        # Indexes and constraints are recreated once the rows are copied, which is faster than maintaining them. Check
+        # constraints are copied along with the table.
+        cursor.execute(
+            "SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = to_regclass(%s) AND contype IN ('p', 'u', 'x', 'f')",
+            [RETURNS_TABLE],
+        )
+        constraints = cursor.fetchall()
+        primary_key_name = next(name for name, constraint_type, _ in constraints if constraint_type == "p")
+        other_constraints = [
+            (name, definition) for name, constraint_type, definition in constraints if constraint_type != "p"
+        ]
+        cursor.execute(
+            "SELECT indexdef FROM pg_indexes WHERE schemaname = current_schema() AND tablename = %s "
+            "AND indexname NOT IN (SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s))",
+            [RETURNS_TABLE, RETURNS_TABLE],
+        )
+        # Indexes of a partitioned table are defined "ON ONLY" the parent table
+        index_definitions = [
+            re.sub(r" ON (ONLY )?\S+ USING ", f" ON {RETURNS_TABLE} USING ", row[0]) for row in cursor.fetchall()
+        ]
+
+        cursor.execute(f"ALTER TABLE {RETURNS_TABLE} RENAME TO {old_table}")
+        create_table = f"CREATE TABLE {RETURNS_TABLE} (LIKE {old_table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        if partitioned:
+            cursor.execute(f"{create_table} PARTITION BY RANGE ({PARTITION_KEY})")
+            cursor.execute(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {RETURNS_TABLE} DEFAULT")
+            cursor.execute(
+                f"SELECT DISTINCT extract(year FROM {PARTITION_KEY})::int FROM {old_table} ORDER BY 1"  # noqa: S608
+            )
+            for (year,) in cursor.fetchall():
+                cursor.execute(
+                    f"CREATE TABLE {partition_name(year)} PARTITION OF {RETURNS_TABLE} FOR VALUES {_partition_bounds(year)}"
+                )
+        else:
+            cursor.execute(create_table)
+
+        cursor.execute(f"INSERT INTO {RETURNS_TABLE} SELECT * FROM {old_table}")  # noqa: S608
+        logger.info(f"Copied {cursor.rowcount} returns into the {'partitioned' if partitioned else 'regular'} table.")
+        cursor.execute(f"DROP TABLE {old_table}")
+
+        primary_key = f"id, {PARTITION_KEY}" if partitioned else "id"
+        cursor.execute(f"ALTER TABLE {RETURNS_TABLE} ADD CONSTRAINT {primary_key_name} PRIMARY KEY ({primary_key})")
+        for index_definition in index_definitions:
+            cursor.execute(index_definition)
+        for name, definition in other_constraints:
+            cursor.execute(f"ALTER TABLE {RETURNS_TABLE} ADD CONSTRAINT {name} {definition}")
+
+    _is_partitioned = partitioned
+    _known_partitions.clear()
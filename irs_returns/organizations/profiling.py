@@ -0,0 +1,82 @@
+"""Opt-in profiling of dataset processing, to find hot paths in production ingests."""
+
+import cProfile
+import os
+import pstats
+import tempfile
+from typing import Any
+
+
+class DatasetProfiler:
+    """
+    cProfile profiler that is only enabled while processing every Nth file of a dataset.
+
+    Profiling a sample of the files keeps the overhead low on large ingests while still showing where the time goes, since
+    every file goes through the same code. The same profiler can be used for several ZIP files to combine their profiles.
+    """
+
+    def __init__(self, every: int = 1):
+        self.every = max(every, 1)
+        self.profile = cProfile.Profile()
+        self.files = 0
+        self.profiled_files = 0
+
+    def start_file(self) -> bool:
+        """
+        Start profiling if the next file is sampled.
+
+        Returns:
+            Whether the file is profiled, in which case stop_file must be called once it is processed
+        """
+        self.files += 1
+        if (self.files - 1) % self.every:
+            return False
+
+        self.profiled_files += 1
+        self.profile.enable()
+        return True
+
+    def stop_file(self) -> None:
+        self.profile.disable()
+
+    def dump(self) -> bytes:
+        """Get the profile in the marshal format read by pstats and tools such as snakeviz."""
+        fd, path = tempfile.mkstemp(suffix=".prof")
+        try:
+            os.close(fd)
+            self.profile.dump_stats(path)
+            with open(path, "rb") as f:
+                return f.read()
+        finally:
+            os.unlink(path)
+
+    def summary(self, limit: int = 30) -> dict[str, Any]:
+        """
+        Get the functions that took the most time, excluding the time spent in the functions they called.
+
+        Args:
+            limit: Number of functions to include
+
+        Returns:
+            Number of files seen and profiled, and the top functions with their call count, own time and cumulative time
+        """
+        functions = []
+        if self.profiled_files:
+            stats = pstats.Stats(self.profile).stats
+            top = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:limit]
+            for (file_name, line_number, function_name), (_, call_count, own_time, cumulative_time, _) in top:
+                functions.append(
+                    {
+                        "function": f"{file_name}:{line_number}({function_name})",
+                        "calls": call_count,
+                        "own_seconds": round(own_time, 4),
+                        "cumulative_seconds": round(cumulative_time, 4),
+                    }
+                )
+
+        return {
+            "every": self.every,
+            "files": self.files,
+            "profiled_files": self.profiled_files,
+            "functions": functions,
+        }
@@ -0,0 +1,202 @@
+"""
+Publishing of dataset job progress, so that clients can watch jobs without polling the database.
+
+Every save of a DatasetJob or DatasetArchive publishes its state to the job's channel once committed. With a Redis
+DATASET_PROGRESS_BROKER_URL (the Celery broker by default), messages go through Redis pub/sub and reach the web
+processes from the Celery workers. Otherwise an in-process broker is used, which only reaches subscribers of the
+process that saved the job, e.g. in tests or with tasks run eagerly.
+"""
+
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterator
+from contextlib import asynccontextmanager, contextmanager
+import json
+import logging
+import queue
+import threading
+from typing import Any
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+import redis
+import redis.asyncio
+
+from organizations.models import DatasetArchive, DatasetJob
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATUSES = {DatasetJob.Status.COMPLETED, DatasetJob.Status.FAILED}
+
+JOB_FIELDS = [
+    "status",
+    "progress",
+    "total_files",
+    "processed_files",
+    "organizations_created",
+    "returns_created",
+    "error_message",
+    "finished_at",
+]
+
+ARCHIVE_FIELDS = [
+    "zip_url",
+    "status",
+    "progress",
+    "total_files",
+    "processed_files",
+    "organizations_created",
+    "returns_created",
+    "error_message",
+]
+
+
+def job_channel(job_id: Any) -> str:
+    return f"dataset-job:{job_id}"
+
+
+class InProcessBroker:
+    """Pub/sub between the threads and event loops of a single process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: dict[str, set[Callable[[str], None]]] = {}
+
+    def publish(self, channel: str, message: str) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscriber in subscribers:
+            subscriber(message)
+
+    @contextmanager
+    def subscribe(self, channel: str) -> Iterator[Callable[[float], str | None]]:
+        """Subscribe to a channel, giving a function waiting up to a timeout for the next message (None if none)."""
+        messages = queue.SimpleQueue()
+
+        def get(timeout: float) -> str | None:
+            try:
+                return messages.get(timeout=timeout)
+            except queue.Empty:
+                return None
+
+        self._add(channel, messages.put)
+        try:
+            yield get
+        finally:
+            self._remove(channel, messages.put)
+
+    @asynccontextmanager
+    async def asubscribe(self, channel: str) -> AsyncIterator[Callable[[float], Awaitable[str | None]]]:
+        """Async version of subscribe, for event loops."""
+        loop = asyncio.get_running_loop()
+        messages = asyncio.Queue()
+
+        def put(message: str) -> None:
+            loop.call_soon_threadsafe(messages.put_nowait, message)
+
+        async def get(timeout: float) -> str | None:
+            try:
+                return await asyncio.wait_for(messages.get(), timeout)
+            except TimeoutError:
+                return None
+
+        self._add(channel, put)
+        try:
+            yield get
+        finally:
+            self._remove(channel, put)
+
+    def _add(self, channel: str, subscriber: Callable[[str], None]) -> None:
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscriber)
+
+    def _remove(self, channel: str, subscriber: Callable[[str], None]) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(channel, set())
+            subscribers.discard(subscriber)
+            if not subscribers:
+                self._subscribers.pop(channel, None)
+
+
+class RedisBroker:
+    """Pub/sub through Redis, between the Celery workers and the web processes."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self._client = redis.Redis.from_url(url)
+
+    def publish(self, channel: str, message: str) -> None:
+        self._client.publish(channel, message)
+
+    @contextmanager
+    def subscribe(self, channel: str) -> Iterator[Callable[[float], str | None]]:
+        """Subscribe to a channel, giving a function waiting up to a timeout for the next message (None if none)."""
+        pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(channel)
+
+        def get(timeout: float) -> str | None:
+            message = pubsub.get_message(timeout=timeout)
+            return message["data"].decode() if message else None
+
+        try:
+            yield get
+        finally:
+            pubsub.close()
+
+    @asynccontextmanager
+    async def asubscribe(self, channel: str) -> AsyncIterator[Callable[[float], Awaitable[str | None]]]:
+        """Async version of subscribe, for event loops."""
+        # Async connections are bound to the event loop they were made in, so each subscription has its own client
+        client = redis.asyncio.Redis.from_url(self.url)
+        pubsub = client.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(channel)
+
+        async def get(timeout: float) -> str | None:
+            message = await pubsub.get_message(timeout=timeout)
+            return message["data"].decode() if message else None
+
+        try:
+            yield get
+        finally:
+            await pubsub.aclose()
+            await client.aclose()
+
+
+_broker: InProcessBroker | RedisBroker | None = None
+_broker_lock = threading.Lock()
+
+
+def get_broker() -> InProcessBroker | RedisBroker:
+    """Get the broker of DATASET_PROGRESS_BROKER_URL, created on first use so that each worker process has its own."""
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            url = settings.DATASET_PROGRESS_BROKER_URL
+            _broker = RedisBroker(url) if url.startswith(("redis://", "rediss://", "unix://")) else InProcessBroker()
+        return _broker
+
+
+def job_event(job: DatasetJob) -> dict[str, Any]:
+    return {"id": job.id, **{field: getattr(job, field) for field in JOB_FIELDS}}
+
+
+def archive_event(archive: DatasetArchive) -> dict[str, Any]:
+    return {"id": archive.id, "job": archive.job_id, **{field: getattr(archive, field) for field in ARCHIVE_FIELDS}}
+
+
+def _publish(job_id: Any, event: str, data: dict[str, Any]) -> None:
+    message = json.dumps({"event": event, "data": data}, cls=DjangoJSONEncoder)
+    try:
+        get_broker().publish(job_channel(job_id), message)
+    except Exception:
+        # Watchers missing an update must not fail the job
+        logger.exception(f"Failed to publish the progress of dataset job {job_id}.")
+
+
+def publish_progress(sender, instance: DatasetJob | DatasetArchive, **kwargs) -> None:
+    """Publish the state of a saved job or archive once committed (post_save signal handler)."""
+    if isinstance(instance, DatasetJob):
+        job_id, event, data = instance.id, "job", job_event(instance)
+    else:
+        job_id, event, data = instance.job_id, "archive", archive_event(instance)
+    transaction.on_commit(lambda: _publish(job_id, event, data))
@@ -0,0 +1,128 @@
+"""
+Percentile ranks of returns within their (return type, tax year) cohort.
+
+The sorted values of each metric of a cohort are stored in a PercentileIndex when the cohort's statistics are
+refreshed, so ranking a return is a binary search instead of a window function over the cohort. Web processes keep the
+arrays they have loaded in memory and reload them when the index is refreshed.
+"""
+
+from collections import OrderedDict
+from collections.abc import Iterable, Sequence
+from decimal import Decimal
+import threading
+from typing import Any
+
+from django.db.models import Q
+import numpy as np
+
+from organizations.models import OrganizationReturnInformation, PercentileIndex, ReturnStatistic
+
+# Number of sorted arrays kept in memory by each process, least recently used first out
+CACHE_SIZE = 64
+
+_cache: OrderedDict[tuple[str, int, str], tuple[Any, np.ndarray]] = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def save_percentile_index(return_type: str, tax_year: int, metric: str, sorted_values: Sequence[Decimal]) -> None:
+    """Store the sorted values of a metric for a cohort."""
+    values = np.array(sorted_values, dtype=np.float64)
+    PercentileIndex.objects.update_or_create(
+        return_type=return_type,
+        tax_year=tax_year,
+        metric=metric,
+        defaults={"count": len(values), "values": values.tobytes()},
+    )
+
+
+def percentile_rank(sorted_values: np.ndarray, value: float) -> float:
+    """
+    Percentile rank of a value: the percentage of values below it, counting values equal to it as half below.
+
+    Two binary searches find the values below and equal to it, so ties get the same rank whatever their position.
+    """
+    below = np.searchsorted(sorted_values, value, side="left")
+    at_or_below = np.searchsorted(sorted_values, value, side="right")
+    return float(100 * (below + (at_or_below - below) / 2) / len(sorted_values))
+
+
+def _get_sorted_values(cohorts: set[tuple[str, int]]) -> dict[tuple[str, int, str], np.ndarray]:
+    """
+    Get the sorted values of every metric of the cohorts, from memory when their index has not changed.
+
+    Only the timestamps of the indexes are read from the database unless an array has to be (re)loaded.
+    """
+    if not cohorts:
+        return {}
+
+    cohort_filter = Q()
+    for return_type, tax_year in cohorts:
+        cohort_filter |= Q(return_type=return_type, tax_year=tax_year)
+    indexes = PercentileIndex.objects.filter(cohort_filter).values_list(
+        "id", "return_type", "tax_year", "metric", "updated_at"
+    )
+
+    sorted_values = {}
+    stale = {}
+    with _cache_lock:
+        for index_id, return_type, tax_year, metric, updated_at in indexes:
+            key = (return_type, tax_year, metric)
+            cached = _cache.get(key)
+            if cached and cached[0] == updated_at:
+                _cache.move_to_end(key)
+                sorted_values[key] = cached[1]
+            else:
+                stale[index_id] = (key, updated_at)
+
+    if stale:
+        loaded = PercentileIndex.objects.filter(id__in=stale).values_list("id", "values")
+        with _cache_lock:
+            for index_id, values in loaded:
+                key, updated_at = stale[index_id]
+                sorted_values[key] = np.frombuffer(bytes(values), dtype=np.float64)
+                _cache[key] = (updated_at, sorted_values[key])
+                _cache.move_to_end(key)
+            while len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+
+    return sorted_values
+
+
+def get_percentile_ranks(returns: Iterable[OrganizationReturnInformation]) -> list[dict[str, Any]]:
+    """
+    Rank returns within their cohort on each metric of the statistics rollup.
+
+    Args:
+        returns: Returns to rank
+
+    Returns:
+        For each return, its cohort and the value, percentile rank and cohort size of each metric. The percentile is
+        null when the return has no value for the metric or its cohort has no index yet.
+    """
+    returns = list(returns)
+    sorted_values = _get_sorted_values({(ret.return_type, ret.tax_period_end_date.year) for ret in returns})
+
+    ranks = []
+    for ret in returns:
+        tax_year = ret.tax_period_end_date.year
+        metrics = {}
+        for metric in ReturnStatistic.Metric:
+            value = getattr(ret, metric.value)
+            cohort_values = sorted_values.get((ret.return_type, tax_year, metric.value))
+            ranked = value is not None and cohort_values is not None and len(cohort_values) > 0
+            metrics[metric.value] = {
+                "value": value,
+                "percentile": round(percentile_rank(cohort_values, float(value)), 1) if ranked else None,
+                "cohort_size": len(cohort_values) if cohort_values is not None else 0,
+            }
+
+        ranks.append(
+            {
+                "return_id": ret.id,
+                "return_type": ret.return_type,
+                "tax_year": tax_year,
+                "metrics": metrics,
+            }
+        )
+
+    return ranks
@@ -0,0 +1,282 @@
+"""
+Re-extraction of returns from the filings kept in the filing store, after the strategies changed.
+
+Filings extracted with an earlier PARSER_VERSION are parsed again with the current strategies in worker processes,
+while this process compares what they extract with the stored returns and only writes the fields that changed, in
+bulk. Filings are handled in the order of their object ID, like dataset jobs do, so that an amended return still
+wins over the original it replaced. Returns whose fields did not change only get their parser version bumped, which
+does not touch their updated_at, so they do not reappear in the change feed.
+
+The organization, tax period start and tax period end identify a return, so they are never changed here. A filing
+whose return could not be extracted before (e.g. its form type had no strategy) is ingested like a new file instead,
+unless the stored return of its organization and tax period was extracted from a later (amended) filing.
+
+Each run is registered as a running DatasetJob, so that the change feed holds back what it writes until it is done,
+like it does for dataset jobs. The job is flagged as a re-extraction, which the dataset API leaves out, and its progress
+is saved after each batch so that long runs are not failed as stale.
+"""
+
+from collections import defaultdict, deque
+from collections.abc import Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+import logging
+import multiprocessing
+from pathlib import Path
+from typing import Any
+from uuid import UUID
+
+import django
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from lxml import etree
+
+from organizations.filing_store import FilingStore
+from organizations.financial_metrics import refresh_derived_metrics
+from organizations.models import ArchivedFiling, DatasetJob, Organization, OrganizationReturnInformation
+from organizations.parsers import PARSER_VERSION, ParsedFiling, XMLParser
+from organizations.parsers.errors import NoStrategyFoundError
+from organizations.search import update_search_vectors
+from organizations.statistics import refresh_return_statistics
+from organizations.summaries import refresh_latest_returns
+from organizations.writers import (
+    ORGANIZATION_RECORD_FIELDS,
+    get_organization_fields,
+    get_return_fields,
+    save_parsed_data,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ReextractionResult:
+    filings: int = 0
+    returns_updated: int = 0
+    returns_unchanged: int = 0
+    returns_created: int = 0
+    organizations_updated: int = 0
+    # Filings no return could be extracted from, that are not stored, or whose return came from a later filing
+    skipped: int = 0
+
+
+def _extract(store_directory: Path, filings: list[tuple[UUID, str]]) -> list[tuple[UUID, ParsedFiling | None]]:
+    """Parse stored filings with the current strategies, in a worker process. Filings that cannot be parsed give None."""
+    store = FilingStore(store_directory)
+    extracted = []
+    for filing_id, sha256 in filings:
+        try:
+            extracted.append((filing_id, XMLParser(store.read(sha256)).parse()))
+        except (FileNotFoundError, NoStrategyFoundError, etree.XMLSyntaxError):
+            extracted.append((filing_id, None))
+        except Exception as e:
+            logger.error(f"Unknown error while re-extracting the filing {sha256}: {str(e)}")
+            extracted.append((filing_id, None))
+    return extracted
+
+
+def _iter_stale_filings(batch_size: int) -> Iterator[list[ArchivedFiling]]:
+    """Iterate over the filings extracted with an earlier parser version, in keyset-paginated batches."""
+    last_object_id = None
+    while True:
+        filings = ArchivedFiling.objects.filter(parser_version__lt=PARSER_VERSION).order_by("object_id")
+        if last_object_id is not None:
+            filings = filings.filter(object_id__gt=last_object_id)
+        batch = list(filings.only("id", "object_id", "sha256", "return_info_id")[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last_object_id = batch[-1].object_id
+
+
+def _changed_fields(instance: Any, values: dict[str, Any]) -> list[str]:
+    """Set the values that differ from an instance's on it, returning the fields that changed."""
+    changed = []
+    for name, value in values.items():
+        # Parsers give datetimes for dates and unrounded decimals, which must be compared as they would be stored
+        value = instance._meta.get_field(name).to_python(value)
+        if getattr(instance, name) != value:
+            setattr(instance, name, value)
+            changed.append(name)
+    return changed
+
+
+def _is_superseded(filing: ArchivedFiling, parsed_filing: ParsedFiling) -> bool:
+    """Whether the stored return of a filing's organization and tax period was extracted from a later filing."""
+    return_data = parsed_filing.return_info
+    if not (parsed_filing.organization.name and return_data.tax_period_start_date and return_data.tax_period_end_date):
+        return False
+    original_file_name = (
+        OrganizationReturnInformation.objects.filter(
+            organization__name=parsed_filing.organization.name,
+            tax_period_start_date=return_data.tax_period_start_date,
+            tax_period_end_date=return_data.tax_period_end_date,
+        )
+        .values_list("original_file_name", flat=True)
+        .first()
+    )
+    # Returns keep the name of the file they were last written from, whose stem is the object ID of its filing
+    return original_file_name is not None and Path(original_file_name).stem > filing.object_id
+
+
+def _apply_batch(
+    filings: list[ArchivedFiling],
+    extracted: list[tuple[UUID, ParsedFiling | None]],
+    result: ReextractionResult,
+    changed_organization_ids: set[UUID],
+) -> None:
+    """Write what changed in the returns and organizations of a batch of re-extracted filings."""
+    # A crash mid-batch must not leave its returns half rewritten
+    with transaction.atomic():
+        filings_by_id = {filing.id: filing for filing in filings}
+        return_ids = {filing.return_info_id for filing in filings if filing.return_info_id}
+        returns = OrganizationReturnInformation.objects.in_bulk(return_ids)
+        organizations = Organization.objects.only("id", "latest_return_id", *ORGANIZATION_RECORD_FIELDS).in_bulk(
+            {return_info.organization_id for return_info in returns.values()}
+        )
+        # A return replaced by an amended filing must keep what the latest of its filings gives, even if that one was
+        # already re-extracted
+        latest_object_ids = dict(
+            ArchivedFiling.objects.filter(return_info_id__in=return_ids)
+            .values("return_info_id")
+            .annotate(latest=Max("object_id"))
+            .values_list("return_info_id", "latest")
+        )
+
+        now = timezone.now()
+        updates: dict[tuple[str, ...], list[OrganizationReturnInformation]] = defaultdict(list)
+        unchanged_return_ids = []
+        changed_organizations: dict[UUID, Organization] = {}
+        linked_filings = []
+        for filing_id, parsed_filing in extracted:
+            filing = filings_by_id[filing_id]
+            result.filings += 1
+            return_info = returns.get(filing.return_info_id)
+            if parsed_filing is None or (return_info and latest_object_ids[return_info.id] != filing.object_id):
+                result.skipped += 1
+                continue
+
+            if return_info is None:
+                if filing.return_info_id is None and not _is_superseded(filing, parsed_filing):
+                    _, return_created, filing.return_info = save_parsed_data(parsed_filing, f"{filing.object_id}.xml")
+                    result.returns_created += return_created
+                    linked_filings.append(filing)
+                else:
+                    # The return was deleted since, or was extracted from a later filing
+                    result.skipped += 1
+                continue
+
+            changed = _changed_fields(return_info, get_return_fields(parsed_filing.return_info))
+            return_info.parser_version = PARSER_VERSION
+            if changed:
+                return_info.updated_at = now
+                updates[tuple(changed)].append(return_info)
+                changed_organization_ids.add(return_info.organization_id)
+                result.returns_updated += 1
+            else:
+                unchanged_return_ids.append(return_info.id)
+                result.returns_unchanged += 1
+
+            # Organizations keep what their latest return's filing gives
+            organization = organizations.get(return_info.organization_id)
+            if organization and organization.latest_return_id == return_info.id:
+                if _changed_fields(organization, get_organization_fields(parsed_filing.organization)):
+                    organization.updated_at = now
+                    changed_organizations[organization.id] = organization
+
+        # bulk_update writes every given field of every object, so returns are grouped by the fields that changed
+        for fields, changed_returns in updates.items():
+            OrganizationReturnInformation.objects.bulk_update(
+                changed_returns, [*fields, "parser_version", "updated_at"], batch_size=1000
+            )
+        OrganizationReturnInformation.objects.filter(id__in=unchanged_return_ids).update(parser_version=PARSER_VERSION)
+        Organization.objects.bulk_update(
+            list(changed_organizations.values()), [*ORGANIZATION_RECORD_FIELDS, "updated_at"], batch_size=1000
+        )
+        result.organizations_updated += len(changed_organizations)
+
+        ArchivedFiling.objects.bulk_update(linked_filings, ["return_info"])
+        ArchivedFiling.objects.filter(id__in=filings_by_id).update(parser_version=PARSER_VERSION, updated_at=now)
+
+
+def reextract_filings(workers: int = 4, batch_size: int = 500) -> ReextractionResult:
+    """
+    Re-extract the returns of the stored filings extracted with an earlier parser version.
+
+    Batches of filings are parsed by a pool of worker processes, a few batches ahead of the ones being written.
+    Afterwards, the search vectors, derived metrics, latest return summaries and statistics of what changed are
+    refreshed, as after a dataset job.
+
+    Args:
+        workers: Number of worker processes parsing filings
+        batch_size: Number of filings parsed and written per batch
+
+    Returns:
+        Counts of the filings re-extracted and of what changed
+    """
+    # The change feed holds back the changes made while a dataset job is running, so the run is registered as one
+    job = DatasetJob.objects.create(status=DatasetJob.Status.PROCESSING, reextraction=True)
+    try:
+        result = _reextract_filings(job, workers, batch_size)
+    except BaseException as e:
+        # Also when interrupted, as a job left running would hold back the change feed until it is failed as stale
+        job.status = DatasetJob.Status.FAILED
+        job.error_message = f"Re-extraction error: {str(e) or type(e).__name__}"
+        job.finished_at = timezone.now()
+        job.save(update_fields=["status", "error_message", "finished_at"])
+        raise
+
+    job.status = DatasetJob.Status.COMPLETED
+    job.progress = 100
+    job.total_files = job.processed_files = result.filings
+    job.returns_created = result.returns_created
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "progress", "total_files", "processed_files", "returns_created", "finished_at"])
+    return result
+
+
+def _save_progress(job: DatasetJob, result: ReextractionResult) -> None:
+    """Save the progress of a run after each batch, which also tells the change feed that it is still running."""
+    job.processed_files = result.filings
+    job.returns_created = result.returns_created
+    job.save(update_fields=["processed_files", "returns_created"])
+
+
+def _reextract_filings(job: DatasetJob, workers: int, batch_size: int) -> ReextractionResult:
+    start = job.created_at
+    result = ReextractionResult()
+    changed_organization_ids: set[UUID] = set()
+    store_directory = settings.DATASET_FILING_STORE_DIR
+
+    # Workers are spawned rather than forked, so that they do not inherit this process' database connections
+    pool = ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn"), initializer=django.setup
+    )
+    pending: deque[tuple[list[ArchivedFiling], Future]] = deque()
+    with pool:
+        for filings in _iter_stale_filings(batch_size):
+            work = [(filing.id, filing.sha256) for filing in filings]
+            pending.append((filings, pool.submit(_extract, store_directory, work)))
+            # The next batches are parsed while this one is written, and at most twice as many as there are workers
+            # are held in memory
+            if len(pending) >= 2 * workers:
+                done_filings, extraction = pending.popleft()
+                _apply_batch(done_filings, extraction.result(), result, changed_organization_ids)
+                _save_progress(job, result)
+                logger.info(f"Re-extracted {result.filings} filings, {result.returns_updated} returns updated.")
+
+        while pending:
+            done_filings, extraction = pending.popleft()
+            _apply_batch(done_filings, extraction.result(), result, changed_organization_ids)
+            _save_progress(job, result)
+        logger.info(f"Re-extracted {result.filings} filings, {result.returns_updated} returns updated.")
+
+    if result.returns_updated or result.returns_created or result.organizations_updated:
+        update_search_vectors(since=start)
+        refresh_latest_returns(changed_organization_ids)
+        refresh_derived_metrics(since=start)
+        refresh_return_statistics(since=start)
+
+    return result
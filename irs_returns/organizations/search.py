@@ -0,0 +1,87 @@
+"""Server-side search over organization names and mission descriptions."""
+
+from datetime import datetime
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramSimilarity
+from django.db import connection
+from django.db.models import Case, F, FloatField, Q, QuerySet, Value, When
+
+from organizations.models import Organization
+
+SEARCH_CONFIG = "english"
+
+# Names weigh more than mission descriptions when ranking full-text matches
+ORGANIZATION_SEARCH_VECTOR = SearchVector("name", weight="A", config=SEARCH_CONFIG) + SearchVector(
+    "mission_description", weight="B", config=SEARCH_CONFIG
+)
+
+
+def _is_postgres() -> bool:
+    return connection.vendor == "postgresql"
+
+
+def update_search_vectors(since: datetime | None = None) -> int:
+    """
+    Recompute the full-text search vectors of organizations.
+
+    This is a no-op on databases other than Postgres, where search falls back to plain substring matching.
+
+    Args:
+        since: Only update organizations created or updated after this time (e.g. the creation time of a DatasetJob)
+
+    Returns:
+        Number of organizations updated
+    """
+    if not _is_postgres():
+        return 0
+
+    organizations = Organization.objects.all()
+    if since:
+        organizations = organizations.filter(updated_at__gte=since)
+
+    # QuerySet.update() does not touch auto_now fields, so this does not count as a change to the organization.
+    return organizations.update(search_vector=ORGANIZATION_SEARCH_VECTOR)
+
+
+def search_organizations(query: str) -> QuerySet[Organization]:
+    """
+    Search organizations by name and mission description, ordered by relevance.
+
+    On Postgres this combines full-text search over the indexed search vector with trigram similarity on the name so
+    that misspelled names still match. Other databases (e.g. SQLite in tests) fall back to case-insensitive substring
+    matching with a simple relevance order.
+
+    Args:
+        query: Free-text search query
+
+    Returns:
+        QuerySet of matching organizations annotated with a `relevance` score
+    """
+    query = query.strip()
+    if not query:
+        return Organization.objects.none()
+
+    if _is_postgres():
+        search_query = SearchQuery(query, search_type="websearch", config=SEARCH_CONFIG)
+        return (
+            # The `@@` and `%` operators can both use their GIN indexes
+            Organization.objects.filter(Q(search_vector=search_query) | Q(name__trigram_similar=query))
+            .annotate(
+                relevance=SearchRank(F("search_vector"), search_query) + TrigramSimilarity("name", query),
+            )
+            .order_by("-relevance", "name")
+        )
+
+    return (
+        Organization.objects.filter(Q(name__icontains=query) | Q(mission_description__icontains=query))
+        .annotate(
+            relevance=Case(
+                When(name__iexact=query, then=Value(1.0)),
+                When(name__istartswith=query, then=Value(0.75)),
+                When(name__icontains=query, then=Value(0.5)),
+                default=Value(0.25),
+                output_field=FloatField(),
+            ),
+        )
+        .order_by("-relevance", "name")
+    )
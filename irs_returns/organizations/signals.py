@@ -0,0 +1,13 @@
+"""Signal handlers of the organizations app, connected in OrganizationsConfig.ready()."""
+
+from organizations.models import DeletedRecord, Organization, OrganizationReturnInformation
+
+DELETED_RECORD_KINDS = {
+    Organization: DeletedRecord.Kind.ORGANIZATION,
+    OrganizationReturnInformation: DeletedRecord.Kind.RETURN,
+}
+
+
+def record_deletion(sender, instance, **kwargs) -> None:
+    """Leave a tombstone for a deleted organization or return (post_delete signal handler), see organizations.changes."""
+    DeletedRecord.objects.create(kind=DELETED_RECORD_KINDS[sender], object_id=instance.pk)
@@ -0,0 +1,126 @@
+"""Rollup of aggregate statistics over organization returns."""
+
+from datetime import datetime
+from decimal import Decimal
+import logging
+
+from django.db import transaction
+from django.db.models.functions import ExtractYear
+
+from organizations.models import OrganizationReturnInformation, PercentileIndex, ReturnStatistic
+from organizations.rankings import save_percentile_index
+
+logger = logging.getLogger(__name__)
+
+PERCENTILES = {
+    "p10": Decimal("0.10"),
+    "p25": Decimal("0.25"),
+    "median": Decimal("0.50"),
+    "p75": Decimal("0.75"),
+    "p90": Decimal("0.90"),
+}
+
+CENTS = Decimal("0.01")
+
+
+def _percentile(sorted_values: list[Decimal], fraction: Decimal) -> Decimal:
+    """Return the percentile of a sorted list using linear interpolation (same as Postgres' percentile_cont)."""
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    weight = position - lower
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * weight
+
+
+def _get_cohorts(since: datetime | None = None) -> set[tuple[str, int]]:
+    """
+    Get the (return_type, tax_year) cohorts with returns updated since the given time (or all cohorts).
+
+    A return updated by a later filing can change return type (e.g. an amended 990-EZ filed as a 990), which also
+    changes the cohort it left. Its tax period identifies the return, so its tax year never changes, and the cohorts it
+    can have left are the ones with statistics for the same tax year. Those are refreshed as well.
+    """
+    returns = OrganizationReturnInformation.objects.all()
+    if since:
+        returns = returns.filter(updated_at__gte=since)
+
+    cohorts = set(
+        returns.annotate(tax_year=ExtractYear("tax_period_end_date"))
+        .order_by()
+        .values_list("return_type", "tax_year")
+        .distinct()
+    )
+    if since:
+        tax_years = {tax_year for _, tax_year in cohorts}
+        cohorts |= set(
+            ReturnStatistic.objects.filter(tax_year__in=tax_years)
+            .order_by()
+            .values_list("return_type", "tax_year")
+            .distinct()
+        )
+    return cohorts
+
+
+def _refresh_cohort(return_type: str, tax_year: int) -> None:
+    """Recompute the statistics and percentile index of every metric for a single cohort."""
+    # Filtering by year on the date column (rather than on an extracted year) keeps the filter index friendly.
+    cohort_returns = OrganizationReturnInformation.objects.filter(
+        return_type=return_type,
+        tax_period_end_date__year=tax_year,
+    )
+
+    with transaction.atomic():
+        for metric in ReturnStatistic.Metric:
+            values = list(
+                cohort_returns.filter(**{f"{metric.value}__isnull": False})
+                .order_by(metric.value)
+                .values_list(metric.value, flat=True)
+            )
+            if not values:
+                ReturnStatistic.objects.filter(return_type=return_type, tax_year=tax_year, metric=metric).delete()
+                PercentileIndex.objects.filter(return_type=return_type, tax_year=tax_year, metric=metric).delete()
+                continue
+
+            total = sum(values, Decimal(0))
+            ReturnStatistic.objects.update_or_create(
+                return_type=return_type,
+                tax_year=tax_year,
+                metric=metric,
+                defaults={
+                    "count": len(values),
+                    "total": total,
+                    "minimum": values[0],
+                    "maximum": values[-1],
+                    "mean": (total / len(values)).quantize(CENTS),
+                    **{name: _percentile(values, fraction).quantize(CENTS) for name, fraction in PERCENTILES.items()},
+                },
+            )
+            save_percentile_index(return_type, tax_year, metric.value, values)
+
+
+def refresh_return_statistics(since: datetime | None = None) -> int:
+    """
+    Refresh the rollup of return statistics, along with the percentile indexes of the same cohorts.
+
+    Only the cohorts containing returns that were created or updated since the given time are recomputed, along with
+    the other cohorts of their tax years that these returns may have left. If no time is given, every cohort is
+    recomputed and statistics of cohorts that no longer have returns are removed.
+
+    Args:
+        since: Only refresh cohorts touched after this time (e.g. the creation time of a DatasetJob)
+
+    Returns:
+        Number of cohorts refreshed
+    """
+    cohorts = _get_cohorts(since)
+    if since is None:
+        existing_cohorts = set(ReturnStatistic.objects.order_by().values_list("return_type", "tax_year").distinct())
+        for return_type, tax_year in existing_cohorts - cohorts:
+            ReturnStatistic.objects.filter(return_type=return_type, tax_year=tax_year).delete()
+            PercentileIndex.objects.filter(return_type=return_type, tax_year=tax_year).delete()
+
+    for return_type, tax_year in sorted(cohorts):
+        logger.info(f"Refreshing return statistics for {return_type or 'unknown'} returns of tax year {tax_year}.")
+        _refresh_cohort(return_type, tax_year)
+
+    return len(cohorts)
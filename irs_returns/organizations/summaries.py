@@ -0,0 +1,147 @@
+"""Denormalized summary of each organization's most recent return."""
+
+from collections.abc import Iterable
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+from organizations.financial_metrics import DERIVED_METRICS
+from organizations.models import Organization, OrganizationReturnInformation
+
+# Return fields copied onto the organization as `latest_<field>`
+LATEST_RETURN_FIELDS = [
+    "tax_period_end_date",
+    "filed_on",
+    "return_type",
+    "employee_count",
+    "py_employee_count",
+    "total_revenue",
+    "py_total_revenue",
+    "total_expenses",
+    "py_total_expenses",
+    "total_assets_eoy",
+    "total_assets_boy",
+    *DERIVED_METRICS,
+]
+
+LATEST_SUMMARY_UPDATE_FIELDS = [
+    "latest_return",
+    "latest_tax_year",
+    *[f"latest_{field}" for field in LATEST_RETURN_FIELDS],
+]
+
+
+def _as_date(value: Any) -> Any:
+    """Parsers produce datetimes for date fields, which cannot be compared with the dates loaded from the database."""
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def _is_at_least_as_recent(return_info: OrganizationReturnInformation, organization: Organization) -> bool:
+    """Check whether a return is at least as recent as the organization's current latest return."""
+    if organization.latest_return_id is None or organization.latest_return_id == return_info.id:
+        return True
+
+    current = (organization.latest_tax_period_end_date, organization.latest_filed_on)
+    candidate = (_as_date(return_info.tax_period_end_date), _as_date(return_info.filed_on))
+    if None in current:
+        return True
+    if None in candidate:
+        return False
+
+    return candidate >= current
+
+
+def _copy_latest_return(organization: Organization, return_info: OrganizationReturnInformation | None) -> None:
+    organization.latest_return = return_info
+    organization.latest_tax_year = return_info.tax_period_end_date.year if return_info else None
+    for field in LATEST_RETURN_FIELDS:
+        default = "" if field == "return_type" else None
+        setattr(organization, f"latest_{field}", _as_date(getattr(return_info, field)) if return_info else default)
+
+
+def update_latest_return(organization: Organization, return_info: OrganizationReturnInformation) -> bool:
+    """
+    Update an organization's latest return summary after one of its returns was created or updated.
+
+    Returns are ordered by the end of their tax period and then by filing date. The organization is only written to
+    if the return is at least as recent as its current latest return.
+
+    Args:
+        organization: Organization that filed the return
+        return_info: Return that was just created or updated
+
+    Returns:
+        True if the summary was updated, False otherwise
+    """
+    if not _is_at_least_as_recent(return_info, organization):
+        return False
+
+    _copy_latest_return(organization, return_info)
+    # QuerySet.update() keeps the organization's updated_at untouched since none of its own data changed
+    Organization.objects.filter(pk=organization.pk).update(
+        **{field: getattr(organization, field) for field in LATEST_SUMMARY_UPDATE_FIELDS}
+    )
+    return True
+
+
+def refresh_latest_returns(organization_ids: Iterable[UUID] | None = None, batch_size: int = 2000) -> int:
+    """
+    Recompute the latest return summary of organizations from their stored returns.
+
+    Used to backfill summaries and after bulk loads that bypass update_latest_return().
+
+    Args:
+        organization_ids: Only refresh these organizations (all organizations if None)
+        batch_size: Number of organizations refreshed per batch
+
+    Returns:
+        Number of organizations refreshed
+    """
+    if organization_ids is None:
+        organization_ids = _iter_organization_ids(batch_size)
+
+    refreshed = 0
+    batch: list[UUID] = []
+    for organization_id in organization_ids:
+        batch.append(organization_id)
+        if len(batch) >= batch_size:
+            refreshed += _refresh_latest_returns_batch(batch)
+            batch = []
+    if batch:
+        refreshed += _refresh_latest_returns_batch(batch)
+
+    return refreshed
+
+
+def _iter_organization_ids(batch_size: int) -> Iterable[UUID]:
+    """Iterate over all organization ids in keyset-paginated batches so that writes can happen in between."""
+    last_id = None
+    while True:
+        organization_ids = Organization.objects.order_by("pk")
+        if last_id is not None:
+            organization_ids = organization_ids.filter(pk__gt=last_id)
+        batch = list(organization_ids.values_list("pk", flat=True)[:batch_size])
+        if not batch:
+            return
+        yield from batch
+        last_id = batch[-1]
+
+
+def _refresh_latest_returns_batch(organization_ids: list[UUID]) -> int:
+    latest_returns: dict[UUID, OrganizationReturnInformation] = {}
+    returns = (
+        OrganizationReturnInformation.objects.filter(organization_id__in=organization_ids)
+        .only("organization_id", *LATEST_RETURN_FIELDS)
+        .order_by("organization_id", "-tax_period_end_date", "-filed_on")
+    )
+    for return_info in returns:
+        latest_returns.setdefault(return_info.organization_id, return_info)
+
+    organizations = list(Organization.objects.filter(pk__in=organization_ids).only("pk"))
+    for organization in organizations:
+        _copy_latest_return(organization, latest_returns.get(organization.pk))
+
+    Organization.objects.bulk_update(organizations, LATEST_SUMMARY_UPDATE_FIELDS)
+    return len(organizations)
@@ -1,25 +1,189 @@
 """Celery tasks for processing dataset ZIP files."""
 
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 import logging
 from pathlib import Path
 import shutil
 import tempfile
+import time
 import zipfile
 
 from celery import shared_task
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.utils import timezone
 import requests
 
 from organizations.datasets import process_dataset
-from organizations.models import DatasetJob
+from organizations.downloads import DownloadProgress, download_file
+from organizations.financial_metrics import refresh_derived_metrics
+from organizations.models import DatasetArchive, DatasetJob
+from organizations.parse_report import ParseReport
+from organizations.profiling import DatasetProfiler
+from organizations.search import update_search_vectors
+from organizations.statistics import refresh_return_statistics
 
 logger = logging.getLogger(__name__)
 
+# Seconds between saves of the progress of a download
+DOWNLOAD_PROGRESS_INTERVAL = 1
+
+
+def _wait_for_download(
+    download: Future, progress: DownloadProgress, instances: list[DatasetJob | DatasetArchive]
+) -> None:
+    """Wait for a download running in another thread, saving its progress meanwhile in the 0 - 10% range."""
+    while not wait([download], timeout=DOWNLOAD_PROGRESS_INTERVAL).done:
+        percent = int(progress.fraction * 10)
+        for instance in instances:
+            if instance.progress != percent:
+                instance.progress = percent
+                instance.save(update_fields=["progress"])
+
+
+def _process_archive(
+    archive: DatasetArchive,
+    download: Future,
+    zip_path: Path,
+    index_path: Path | None,
+    dry_run: bool,
+    report: ParseReport | None,
+    profiler: DatasetProfiler | None,
+) -> None:
+    """Process one downloaded ZIP file of a batch job, recording a failure on the archive instead of raising it."""
+    extract_dir = zip_path.with_suffix("")
+    try:
+        download.result()
+        extract_dir.mkdir()
+        archive.organizations_created, archive.returns_created = process_dataset(
+            zip_path.as_posix(),
+            extract_dir.as_posix(),
+            archive,
+            index_path=index_path.as_posix() if index_path else None,
+            dry_run=dry_run,
+            report=report,
+            profiler=profiler,
+        )
+        archive.status = DatasetJob.Status.COMPLETED
+        archive.progress = 100
+        archive.processed_files = archive.total_files or 0
+    except requests.RequestException as e:
+        archive.status = DatasetJob.Status.FAILED
+        archive.error_message = f"Failed to download ZIP file: {str(e)}"
+    except zipfile.BadZipFile as e:
+        archive.status = DatasetJob.Status.FAILED
+        archive.error_message = f"Invalid ZIP file: {str(e)}"
+    except Exception as e:
+        logger.exception(f"Processing error in {archive.zip_url}")
+        archive.status = DatasetJob.Status.FAILED
+        archive.error_message = f"Processing error: {str(e)}"
+    finally:
+        # Only the archives being downloaded or processed are kept on disk
+        zip_path.unlink(missing_ok=True)
+        shutil.rmtree(extract_dir, ignore_errors=True)
+
+    archive.save(
+        update_fields=[
+            "status",
+            "progress",
+            "processed_files",
+            "organizations_created",
+            "returns_created",
+            "error_message",
+        ]
+    )
+
+
+def _process_archives(
+    job: DatasetJob,
+    temp_dir: Path,
+    index_path: Path | None,
+    report: ParseReport | None,
+    profiler: DatasetProfiler | None,
+) -> list[DatasetArchive]:
+    """
+    Download and process the ZIP files of a batch job.
+
+    ZIP files are downloaded concurrently, DATASET_DOWNLOAD_CONCURRENCY at a time, while the ones already downloaded are
+    processed one after the other in the order they were submitted. Downloads only use threads for network and disk
+    I/O, so they run while the current archive is parsed, and every database write happens in this thread, including
+    the download progress of the archive being waited for.
+
+    Returns:
+        The job's archives, with their results
+    """
+    archives = list(job.archives.all())
+    remaining = iter(enumerate(archives))
+    downloads: deque[tuple[DatasetArchive, Future, DownloadProgress, Path]] = deque()
+
+    with ThreadPoolExecutor(max_workers=settings.DATASET_DOWNLOAD_CONCURRENCY) as download_pool:
+
+        def start_next_download() -> None:
+            next_archive = next(remaining, None)
+            if next_archive is None:
+                return
+            i, archive = next_archive
+            zip_path = temp_dir / f"dataset_{i}.zip"
+            archive.status = DatasetJob.Status.DOWNLOADING
+            archive.progress = 0
+            archive.save(update_fields=["status", "progress"])
+            progress = DownloadProgress()
+            download = download_pool.submit(download_file, archive.zip_url, zip_path, progress)
+            downloads.append((archive, download, progress, zip_path))
+
+        for _ in range(settings.DATASET_DOWNLOAD_CONCURRENCY):
+            start_next_download()
+
+        processed_archives = 0
+        while downloads:
+            archive, download, progress, zip_path = downloads.popleft()
+            # Wait for this archive before starting another download, so that at most
+            # DATASET_DOWNLOAD_CONCURRENCY ZIP files are downloaded at once. The job only follows the progress of the
+            # first one, while it is downloading.
+            download_start = time.perf_counter()
+            downloading = [archive, job] if job.status == DatasetJob.Status.DOWNLOADING else [archive]
+            _wait_for_download(download, progress, downloading)
+            if report is not None:
+                # Only the time the downloads held up processing, since they overlap with it
+                report.download_seconds += time.perf_counter() - download_start
+            start_next_download()
+
+            if job.status != DatasetJob.Status.PROCESSING:
+                job.status = DatasetJob.Status.PROCESSING
+                job.save(update_fields=["status"])
+            _process_archive(archive, download, zip_path, index_path, job.dry_run, report, profiler)
+            processed_archives += 1
+
+            job.total_files = sum(archive.total_files or 0 for archive in archives)
+            job.processed_files = sum(archive.processed_files for archive in archives)
+            job.organizations_created = sum(archive.organizations_created for archive in archives)
+            job.returns_created = sum(archive.returns_created for archive in archives)
+            job.progress = 10 + int(processed_archives / len(archives) * 80)  # 10 - 90% range
+            job.save(
+                update_fields=["total_files", "processed_files", "organizations_created", "returns_created", "progress"]
+            )
+
+    return archives
+
+
+def _save_profile(job: DatasetJob, profiler: DatasetProfiler) -> None:
+    """Store the profile of a job and a summary of its slowest functions."""
+    try:
+        job.profile_file.save(f"{job.id}.prof", ContentFile(profiler.dump()), save=False)
+        job.profile_summary = profiler.summary()
+        job.save(update_fields=["profile_file", "profile_summary"])
+    except Exception:
+        logger.exception(f"Failed to save the profile of dataset job {job.id}")
+
 
 @shared_task(bind=True, max_retries=3, time_limit=3600, soft_time_limit=3300)
 def process_dataset_task(self, job_id: str):
     """
     Process a dataset ZIP file: download, extract, parse XML files, and load into database.
 
+    Batch jobs process each of their archives' ZIP files this way, see _process_archives.
+
     Args:
         job_id: UUID of the DatasetJob to process
     """
@@ -30,57 +194,103 @@ def process_dataset_task(self, job_id: str):
         raise self.retry(countdown=10, max_retries=3, exc=e)
 
     temp_dir = None
+    profiler = None
 
     try:
         # Update status to DOWNLOADING
         job.status = DatasetJob.Status.DOWNLOADING
-        job.progress = 10
+        job.progress = 0
         job.save(update_fields=["status", "progress"])
 
-        # Download ZIP file
+        # Download the filing index if only new filings should be ingested
         temp_dir = Path(tempfile.mkdtemp())
-        zip_path = temp_dir / "dataset.zip"
+        index_path = None
+        if job.index_url:
+            index_path = temp_dir / "index.csv"
+            download_file(job.index_url, index_path)
 
-        response = requests.get(
-            job.zip_url,
-            timeout=300,  # 5 minute timeout
-            stream=True,
-        )
-        response.raise_for_status()
-
-        with open(zip_path, "wb") as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
+        # Dry runs only parse the files, and report how that went instead of writing anything
+        report = ParseReport() if job.dry_run else None
+        profiler = DatasetProfiler(job.profile_every) if job.profile_every else None
+        failed_archives = []
+        if job.zip_url:
+            zip_path = temp_dir / "dataset.zip"
+            download_start = time.perf_counter()
+            progress = DownloadProgress()
+            with ThreadPoolExecutor(max_workers=1) as download_pool:
+                download = download_pool.submit(download_file, job.zip_url, zip_path, progress)
+                _wait_for_download(download, progress, [job])
+                download.result()
+            if report is not None:
+                report.download_seconds += time.perf_counter() - download_start
+            job.organizations_created, job.returns_created = process_dataset(
+                zip_path.as_posix(),
+                temp_dir.as_posix(),
+                job,
+                index_path=index_path.as_posix() if index_path else None,
+                dry_run=job.dry_run,
+                report=report,
+                profiler=profiler,
+            )
+        else:
+            archives = _process_archives(job, temp_dir, index_path, report, profiler)
+            failed_archives = [archive for archive in archives if archive.status == DatasetJob.Status.FAILED]
 
-        orgs_created, returns_created = process_dataset(zip_path.as_posix(), temp_dir.as_posix(), job)
+        if report is not None:
+            job.report = report.as_dict()
+            job.save(update_fields=["report"])
+        else:
+            # Only the rows touched by this job need their search vectors, metrics and statistics recomputed
+            update_search_vectors(since=job.created_at)
+            refresh_derived_metrics(since=job.created_at)
+            refresh_return_statistics(since=job.created_at)
 
-        # Update job with results
-        job.status = DatasetJob.Status.COMPLETED
-        job.organizations_created = orgs_created
-        job.returns_created = returns_created
+        # Update job with results. A batch job whose archives did not all succeed still keeps what the others loaded.
+        if failed_archives:
+            job.status = DatasetJob.Status.FAILED
+            job.error_message = f"{len(failed_archives)} of {len(archives)} ZIP files failed, see their error messages."
+        else:
+            job.status = DatasetJob.Status.COMPLETED
         job.progress = 100
-        job.save(update_fields=["status", "organizations_created", "returns_created", "progress"])
+        job.finished_at = timezone.now()
+        job.save(
+            update_fields=[
+                "status",
+                "error_message",
+                "organizations_created",
+                "returns_created",
+                "progress",
+                "finished_at",
+            ]
+        )
 
-        return True
+        return not failed_archives
     except requests.RequestException as e:
         job.status = DatasetJob.Status.FAILED
-        job.error_message = f"Failed to download ZIP file: {str(e)}"
-        job.save(update_fields=["status", "error_message"])
+        job.error_message = f"Failed to download dataset files: {str(e)}"
+        job.finished_at = timezone.now()
+        job.save(update_fields=["status", "error_message", "finished_at"])
         raise
 
     except zipfile.BadZipFile as e:
         job.status = DatasetJob.Status.FAILED
         job.error_message = f"Invalid ZIP file: {str(e)}"
-        job.save(update_fields=["status", "error_message"])
+        job.finished_at = timezone.now()
+        job.save(update_fields=["status", "error_message", "finished_at"])
         raise
 
     except Exception as e:
         job.status = DatasetJob.Status.FAILED
         job.error_message = f"Processing error: {str(e)}"
-        job.save(update_fields=["status", "error_message"])
+        job.finished_at = timezone.now()
+        job.save(update_fields=["status", "error_message", "finished_at"])
         raise
 
     finally:
+        # The profile is kept even if the job failed, since it may show why it was slow
+        if profiler is not None:
+            _save_profile(job, profiler)
+
         # Cleanup temporary files
         if temp_dir and temp_dir.exists():
             shutil.rmtree(temp_dir, ignore_errors=True)
@@ -0,0 +1,176 @@
+from collections.abc import Iterator
+import csv
+from dataclasses import dataclass, field
+from datetime import date
+import hashlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import re
+import sys
+import threading
+from typing import Any
+import zipfile
+
+from django.db import connection
+import pytest
+
+from organizations.models import Organization, OrganizationReturnInformation
+from organizations.parsers.warmup import SAMPLE_RETURN
+
+# For the features that only exist on Postgres, e.g. when DJANGO_DATABASE_URL points the tests to a Postgres server
+requires_postgres = pytest.mark.skipif(connection.vendor != "postgresql", reason="Requires Postgres")
+
+INDEX_COLUMNS = [
+    "RETURN_ID",
+    "FILING_TYPE",
+    "EIN",
+    "TAX_PERIOD",
+    "SUB_DATE",
+    "TAXPAYER_NAME",
+    "RETURN_TYPE",
+    "OBJECT_ID",
+]
+
+
+def make_filing(name: str, return_type: str = "990", revenue: int = 1000, filed_on: str = "2024-05-15") -> str:
+    """Make the XML of a filing, based on the sample return the parsers are warmed up with."""
+    return (
+        SAMPLE_RETURN.format(return_type=return_type)
+        .replace("Warm Up Foundation", name)
+        .replace("1,000", f"{revenue:,}")
+        .replace("2024-05-15", filed_on)
+    )
+
+
+def make_dataset_zip(path: Path, filings: dict[str, str]) -> Path:
+    """Write a dataset ZIP file of filings by object ID, named like the IRS names them."""
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        for object_id, xml in filings.items():
+            zip_file.writestr(f"{object_id}_public.xml", xml)
+    return path
+
+
+def make_filing_index(path: Path, entries: list[tuple[str, str, str, str]]) -> Path:
+    """Write an IRS filing index of (object ID, EIN, tax period, return type) entries."""
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(INDEX_COLUMNS)
+        for i, (object_id, ein, tax_period, return_type) in enumerate(entries):
+            writer.writerow([i, "EFILE", ein, tax_period, "2024", f"Taxpayer {ein}", return_type, object_id])
+    return path
+
+
+def make_return(
+    organization: Organization, tax_year: int, return_type: str = "990", **fields: Any
+) -> OrganizationReturnInformation:
+    """Create a return of an organization for a calendar tax year, unless given other dates."""
+    fields = {
+        "filed_on": date(tax_year + 1, 5, 15),
+        "tax_period_start_date": date(tax_year, 1, 1),
+        "tax_period_end_date": date(tax_year, 12, 31),
+        **fields,
+    }
+    return OrganizationReturnInformation.objects.create(organization=organization, return_type=return_type, **fields)
+
+
+@dataclass
+class FileServer:
+    """
+    Local HTTP stand-in for the IRS file server, serving the files of a directory.
+
+    Like the IRS server, it sends ETags unless `etags` is off, and answers range requests matching If-Range with
+    partial content unless `ranges` is off. The next `failures` partial responses are cut off halfway, as if the
+    connection dropped.
+    """
+
+    directory: Path
+    base_url: str = ""
+    ranges: bool = True
+    etags: bool = True
+    failures: int = 0
+    # Headers of every request received
+    requests: list[dict[str, str]] = field(default_factory=list)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def url(self, name: str) -> str:
+        return f"{self.base_url}/{name}"
+
+    @property
+    def range_requests(self) -> list[str]:
+        return [headers["Range"] for headers in self.requests if "Range" in headers]
+
+
+class _FileServerHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        stand_in: FileServer = self.server.stand_in
+        with stand_in.lock:
+            stand_in.requests.append(dict(self.headers))
+
+        path = stand_in.directory / self.path.lstrip("/")
+        if not path.is_file():
+            self.send_error(404)
+            return
+
+        content = path.read_bytes()
+        etag = f'"{hashlib.sha256(content).hexdigest()[:16]}"'
+        if stand_in.etags and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        start, end = 0, len(content) - 1
+        range_match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        partial = bool(stand_in.ranges and range_match and self.headers.get("If-Range", etag) == etag)
+        if partial:
+            start = int(range_match[1])
+            end = min(int(range_match[2]), end) if range_match[2] else end
+
+        body = content[start : end + 1]
+        self.send_response(206 if partial else 200)
+        if stand_in.etags:
+            self.send_header("ETag", etag)
+        if stand_in.ranges:
+            self.send_header("Accept-Ranges", "bytes")
+        if partial:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(content)}")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+
+        with stand_in.lock:
+            fail = partial and stand_in.failures > 0
+            stand_in.failures -= fail
+        if fail:
+            self.wfile.write(body[: len(body) // 2])
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+
+class _FileHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Downloads close their connection once they read the bytes they need, which is not an error
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+@pytest.fixture
+def file_server(tmp_path) -> Iterator[FileServer]:
+    """Serve the files written to the stand-in's directory over HTTP on a local port."""
+    directory = tmp_path / "served"
+    directory.mkdir()
+    server = _FileHTTPServer(("127.0.0.1", 0), _FileServerHandler)
+    server.stand_in = FileServer(directory, base_url=f"http://127.0.0.1:{server.server_port}")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server.stand_in
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,116 @@
+from django.core.paginator import EmptyPage
+from django.urls import reverse
+import pytest
+
+from organizations import admin
+from organizations.admin import EstimatedCountPaginator
+from organizations.models import Organization, OrganizationReturnInformation
+from organizations.tests.conftest import make_return
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def organizations():
+    return Organization.objects.bulk_create(Organization(name=f"Organization {i:02}") for i in range(30))
+
+
+@pytest.fixture
+def estimate(monkeypatch):
+    """Make the planner's estimate of every queryset the given number of rows, used when it is over 10 rows."""
+
+    def _estimate(rows):
+        monkeypatch.setattr(admin, "ESTIMATED_COUNT_THRESHOLD", 10)
+        monkeypatch.setattr(admin, "estimate_count", lambda queryset: rows)
+
+    return _estimate
+
+
+def _paginator():
+    return EstimatedCountPaginator(Organization.objects.order_by("name"), 10)
+
+
+def test_full_page_keeps_estimate(organizations, estimate):
+    estimate(1000)
+    paginator = _paginator()
+
+    page = paginator.page(2)
+
+    assert len(page) == 10
+    assert paginator.count == 1000
+    assert paginator.num_pages == 100
+
+
+def test_short_page_counts_results(organizations, estimate):
+    Organization.objects.filter(name__gte="Organization 25").delete()
+    estimate(1000)
+    paginator = _paginator()
+
+    page = paginator.page(3)
+
+    assert len(page) == 5
+    assert paginator.count == 25
+    assert not page.has_next()
+
+
+def test_empty_page_counts_results(organizations, estimate):
+    estimate(1000)
+    paginator = _paginator()
+
+    with pytest.raises(EmptyPage):
+        paginator.page(4)
+    assert paginator.count == 30
+    assert paginator.num_pages == 3
+
+
+def test_page_past_low_estimate_counts_results(organizations, estimate):
+    estimate(15)
+    paginator = _paginator()
+
+    page = paginator.page(3)
+
+    assert [organization.name for organization in page] == [f"Organization {i}" for i in range(20, 30)]
+    assert paginator.count == 30
+    assert paginator.num_pages == 3
+
+
+def test_small_results_are_counted(organizations, estimate):
+    estimate(5)
+
+    assert _paginator().count == 30
+
+
+def test_changelist_shows_count_when_estimate_is_off(admin_client, organizations, estimate):
+    estimate(1000)
+
+    response = admin_client.get(reverse("admin:organizations_organization_changelist"))
+
+    assert response.status_code == 200
+    changelist = response.context["cl"]
+    assert changelist.result_count == 30
+    assert len(changelist.result_list) == 30
+    assert not changelist.multi_page
+
+
+def test_change_view_paginates_returns(admin_client):
+    organization = Organization.objects.create(name="Many Returns Foundation")
+    for tax_year in range(2000, 2025):
+        make_return(organization, tax_year)
+    url = reverse("admin:organizations_organization_change", args=[organization.pk])
+
+    first_page = admin_client.get(url).context["inline_admin_formsets"][0].formset
+    second_page = admin_client.get(url, {"returns_page": "2"}).context["inline_admin_formsets"][0].formset
+
+    assert [form.instance.tax_period_end_date.year for form in first_page.forms] == list(range(2024, 2004, -1))
+    assert [form.instance.tax_period_end_date.year for form in second_page.forms] == list(range(2004, 1999, -1))
+    assert second_page.page.paginator.count == OrganizationReturnInformation.objects.count() == 25
+
+
+def test_return_changelist(admin_client, organizations, estimate):
+    make_return(organizations[0], 2023)
+    estimate(1000)
+
+    response = admin_client.get(reverse("admin:organizations_organizationreturninformation_changelist"))
+
+    assert response.status_code == 200
+    assert response.context["cl"].result_count == 1
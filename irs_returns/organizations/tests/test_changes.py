@@ -0,0 +1,127 @@
+from datetime import timedelta
+import uuid
+
+from django.utils import timezone
+import pytest
+
+from organizations.changes import ChangeCursor, fail_stale_jobs, get_changes, get_feed_end
+from organizations.models import DatasetArchive, DatasetJob, DeletedRecord, Organization
+
+pytestmark = pytest.mark.django_db
+
+
+def _organization(name, updated_at):
+    organization = Organization.objects.create(name=name)
+    Organization.objects.filter(pk=organization.pk).update(updated_at=updated_at)
+    return organization
+
+
+def _tombstone(updated_at):
+    record = DeletedRecord.objects.create(kind=DeletedRecord.Kind.ORGANIZATION, object_id=uuid.uuid4())
+    DeletedRecord.objects.filter(pk=record.pk).update(deleted_at=updated_at)
+    return record
+
+
+def _read_feed(limit, cursor=None):
+    """Read the whole organization feed a page at a time, returning the ids of the changes and the number of pages."""
+    ids = []
+    pages = 0
+    while True:
+        page = get_changes("organizations", cursor, limit)
+        pages += 1
+        ids += [change.instance.id for change in page.changes]
+        cursor = page.next_cursor
+        if not page.has_more:
+            return ids, pages, cursor
+
+
+def test_pages_interleave_changes_and_tombstones():
+    start = timezone.now() - timedelta(hours=1)
+    tied = start + timedelta(minutes=3)
+    expected = [
+        _organization("First", start),
+        _tombstone(start + timedelta(minutes=1)),
+        _tombstone(start + timedelta(minutes=2)),
+        _organization("Tied", tied),
+        _tombstone(tied),
+        _organization("Last", start + timedelta(minutes=4)),
+    ]
+    # Changes at the same time are ordered by id
+    expected[3:5] = sorted(expected[3:5], key=lambda instance: instance.id)
+
+    for limit in [1, 2, 4, 10]:
+        ids, pages, cursor = _read_feed(limit)
+
+        assert ids == [instance.id for instance in expected]
+        assert pages == max(-(-len(expected) // limit), 1)
+        # The last cursor resumes after every change read
+        assert get_changes("organizations", cursor).changes == []
+
+
+def test_cursor_resumes_after_new_changes():
+    _organization("First", timezone.now() - timedelta(minutes=2))
+    _, _, cursor = _read_feed(10)
+    new = Organization.objects.create(name="New")
+    deleted = _tombstone(timezone.now())
+
+    ids, _, _ = _read_feed(1, ChangeCursor.decode(cursor.encode()))
+
+    assert ids == [new.id, deleted.id]
+
+
+def test_running_job_holds_back_feed():
+    before = _organization("Before", timezone.now() - timedelta(minutes=1))
+    job = DatasetJob.objects.create(status=DatasetJob.Status.PROCESSING)
+    during = Organization.objects.create(name="During")
+
+    assert get_feed_end() == job.created_at
+    assert [change.instance.id for change in get_changes("organizations").changes] == [before.id]
+
+    job.status = DatasetJob.Status.COMPLETED
+    job.save(update_fields=["status"])
+
+    assert [change.instance.id for change in get_changes("organizations").changes] == [before.id, during.id]
+
+
+@pytest.mark.parametrize(
+    "job_fields",
+    [{"status": DatasetJob.Status.PENDING}, {"status": DatasetJob.Status.FAILED}, {"dry_run": True}],
+)
+def test_jobs_that_do_not_write_do_not_hold_back_feed(job_fields):
+    DatasetJob.objects.create(**{"status": DatasetJob.Status.PROCESSING, **job_fields})
+    organization = Organization.objects.create(name="During")
+
+    assert [change.instance.id for change in get_changes("organizations").changes] == [organization.id]
+
+
+def test_saving_progress_keeps_job_alive(settings):
+    job = DatasetJob.objects.create(status=DatasetJob.Status.PROCESSING)
+    last_saved = timezone.now() - timedelta(seconds=settings.CELERY_TASK_TIME_LIMIT + 60)
+    DatasetJob.objects.filter(pk=job.pk).update(created_at=last_saved, updated_at=last_saved)
+
+    job.progress = 50
+    job.save(update_fields=["progress"])
+
+    assert fail_stale_jobs() == 0
+    assert get_feed_end() == last_saved
+
+
+def test_stale_job_is_failed_and_stops_holding_back_feed(settings):
+    job = DatasetJob.objects.create(status=DatasetJob.Status.DOWNLOADING)
+    archive = DatasetArchive.objects.create(job=job, zip_url="https://example.com/a.zip", status=job.status)
+    finished_archive = DatasetArchive.objects.create(
+        job=job, zip_url="https://example.com/b.zip", status=DatasetJob.Status.COMPLETED
+    )
+    last_saved = timezone.now() - timedelta(seconds=settings.CELERY_TASK_TIME_LIMIT + 60)
+    DatasetJob.objects.filter(pk=job.pk).update(created_at=last_saved, updated_at=last_saved)
+
+    assert get_feed_end() > job.created_at
+
+    job.refresh_from_db()
+    assert job.status == DatasetJob.Status.FAILED
+    assert job.finished_at is not None
+    assert "stopped without finishing" in job.error_message
+    archive.refresh_from_db()
+    assert archive.status == DatasetJob.Status.FAILED
+    finished_archive.refresh_from_db()
+    assert finished_archive.status == DatasetJob.Status.COMPLETED
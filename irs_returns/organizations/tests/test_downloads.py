@@ -0,0 +1,128 @@
+import os
+
+import pytest
+
+from organizations import downloads
+from organizations.downloads import DownloadChangedError, DownloadProgress, download_file
+
+SIZE = 10_000
+
+
+@pytest.fixture(autouse=True)
+def small_parts(settings, monkeypatch):
+    """Split even small files into 4 byte ranges read in chunks of 500 bytes, and retry them right away."""
+    settings.DATASET_DOWNLOAD_PARTS = 4
+    monkeypatch.setattr(downloads, "MIN_PART_SIZE", 1024)
+    monkeypatch.setattr(downloads, "CHUNK_SIZE", 500)
+    monkeypatch.setattr(downloads.time, "sleep", lambda seconds: None)
+
+
+@pytest.fixture
+def content(file_server):
+    content = os.urandom(SIZE)
+    (file_server.directory / "dataset.zip").write_bytes(content)
+    return content
+
+
+def test_download_in_byte_ranges(file_server, content, tmp_path):
+    progress = DownloadProgress()
+
+    download_file(file_server.url("dataset.zip"), tmp_path / "dataset.zip", progress)
+
+    assert (tmp_path / "dataset.zip").read_bytes() == content
+    # The first range is read from the response to the request for the whole file
+    assert sorted(file_server.range_requests) == ["bytes=2500-4999", "bytes=5000-7499", "bytes=7500-9999"]
+    assert all(headers["If-Range"] for headers in file_server.requests if "Range" in headers)
+    assert (progress.downloaded, progress.total, progress.fraction) == (SIZE, SIZE, 1.0)
+
+
+def test_interrupted_ranges_resume_where_they_stopped(settings, file_server, content, tmp_path):
+    # With 2 parts, a single range is requested, so which response is cut off is deterministic
+    settings.DATASET_DOWNLOAD_PARTS = 2
+    file_server.failures = 2
+    progress = DownloadProgress()
+
+    download_file(file_server.url("dataset.zip"), tmp_path / "dataset.zip", progress)
+
+    assert (tmp_path / "dataset.zip").read_bytes() == content
+    # The range is cut off halfway twice, and each retry asks for what follows the last whole chunk only
+    assert file_server.range_requests == ["bytes=5000-9999", "bytes=7500-9999", "bytes=8500-9999"]
+    assert progress.downloaded == SIZE
+
+
+def test_range_retries_are_limited(file_server, content, tmp_path):
+    file_server.failures = 3 * (downloads.RANGE_RETRIES + 1)
+
+    with pytest.raises(downloads.requests.RequestException):
+        download_file(file_server.url("dataset.zip"), tmp_path / "dataset.zip")
+
+
+def test_server_without_ranges_streams_whole_file(file_server, content, tmp_path):
+    file_server.ranges = False
+
+    download_file(file_server.url("dataset.zip"), tmp_path / "dataset.zip")
+
+    assert (tmp_path / "dataset.zip").read_bytes() == content
+    assert len(file_server.requests) == 1
+    assert not file_server.range_requests
+
+
+def test_file_changing_during_download_fails(file_server, content, tmp_path, monkeypatch):
+    range_validator = downloads._range_validator
+
+    def _replace_file(response):
+        # The file is replaced on the server once the request for the whole of it was answered
+        (file_server.directory / "dataset.zip").write_bytes(os.urandom(SIZE))
+        return range_validator(response)
+
+    monkeypatch.setattr(downloads, "_range_validator", _replace_file)
+
+    with pytest.raises(DownloadChangedError):
+        download_file(file_server.url("dataset.zip"), tmp_path / "dataset.zip")
+
+
+def test_cached_download_is_revalidated(settings, file_server, content, tmp_path):
+    settings.DATASET_DOWNLOAD_CACHE_MAX_GB = 1
+    settings.DATASET_DOWNLOAD_CACHE_DIR = tmp_path / "cache"
+    url = file_server.url("dataset.zip")
+
+    download_file(url, tmp_path / "first.zip")
+    requests_made = len(file_server.requests)
+    progress = DownloadProgress()
+    download_file(url, tmp_path / "second.zip", progress)
+
+    assert (tmp_path / "second.zip").read_bytes() == content
+    # The second download is a single conditional request, answered with 304 Not Modified
+    assert len(file_server.requests) == requests_made + 1
+    assert file_server.requests[-1]["If-None-Match"]
+    assert progress.fraction == 1.0
+
+
+def test_changed_file_replaces_cached_download(settings, file_server, content, tmp_path):
+    settings.DATASET_DOWNLOAD_CACHE_MAX_GB = 1
+    settings.DATASET_DOWNLOAD_CACHE_DIR = tmp_path / "cache"
+    url = file_server.url("dataset.zip")
+
+    download_file(url, tmp_path / "first.zip")
+    new_content = os.urandom(SIZE)
+    (file_server.directory / "dataset.zip").write_bytes(new_content)
+    download_file(url, tmp_path / "second.zip")
+
+    assert (tmp_path / "first.zip").read_bytes() == content
+    assert (tmp_path / "second.zip").read_bytes() == new_content
+
+
+def test_response_without_validators_leaves_cached_download_intact(settings, file_server, content, tmp_path):
+    settings.DATASET_DOWNLOAD_CACHE_MAX_GB = 1
+    settings.DATASET_DOWNLOAD_CACHE_DIR = tmp_path / "cache"
+    url = file_server.url("dataset.zip")
+
+    download_file(url, tmp_path / "dataset.zip")
+    file_server.etags = False
+    new_content = os.urandom(SIZE)
+    (file_server.directory / "dataset.zip").write_bytes(new_content)
+    # The path is a hard link to the cached file when the response without an ETag arrives
+    download_file(url, tmp_path / "dataset.zip")
+
+    assert (tmp_path / "dataset.zip").read_bytes() == new_content
+    assert [path.read_bytes() for path in (tmp_path / "cache").glob("*.data")] == [content]
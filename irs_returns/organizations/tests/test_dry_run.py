@@ -0,0 +1,65 @@
+import json
+
+from django.core.management import call_command
+import pytest
+
+from organizations.models import DatasetArchive, DatasetJob, Organization, OrganizationReturnInformation
+from organizations.tasks import process_dataset_task
+from organizations.tests.conftest import make_dataset_zip, make_filing
+
+pytestmark = pytest.mark.django_db
+
+FILINGS = {
+    "202400000001": make_filing("First Foundation"),
+    "202400000002": make_filing("Second Foundation", return_type="990EZ"),
+    "202400000003": make_filing("Unrelated Business", return_type="990T"),
+    "202400000004": "<Return><ReturnHeader>",
+    "202400000005": make_filing(""),
+}
+
+
+def _assert_report(report, files=5):
+    assert report["files"] == files
+    assert report["strategies"] == {"IRS Form 990": 2 * files // 5, "IRS Form 990EZ": files // 5}
+    assert report["skipped"] == {"no strategy for form type 990T": files // 5, "invalid XML": files // 5}
+    assert report["not_saved"] == {"no organization name": files // 5}
+    assert report["fill_rates"]["IRS Form 990EZ"]["organization.name"] == 1
+    assert report["fill_rates"]["IRS Form 990"]["organization.name"] == 0.5
+
+
+def test_dry_run_job_reports_without_writing(file_server):
+    make_dataset_zip(file_server.directory / "dataset.zip", FILINGS)
+    job = DatasetJob.objects.create(zip_url=file_server.url("dataset.zip"), dry_run=True)
+
+    process_dataset_task(str(job.id))
+
+    job.refresh_from_db()
+    assert job.status == DatasetJob.Status.COMPLETED
+    _assert_report(job.report)
+    assert not Organization.objects.exists()
+    assert not OrganizationReturnInformation.objects.exists()
+
+
+def test_dry_run_batch_job_adds_up_its_archives(file_server):
+    for name in ["first.zip", "second.zip"]:
+        make_dataset_zip(file_server.directory / name, FILINGS)
+    job = DatasetJob.objects.create(dry_run=True)
+    DatasetArchive.objects.bulk_create(
+        DatasetArchive(job=job, zip_url=file_server.url(name)) for name in ["first.zip", "second.zip"]
+    )
+
+    process_dataset_task(str(job.id))
+
+    job.refresh_from_db()
+    _assert_report(job.report, files=10)
+    assert not Organization.objects.exists()
+
+
+def test_dry_run_command_writes_report(tmp_path):
+    zip_path = make_dataset_zip(tmp_path / "dataset.zip", FILINGS)
+    output = tmp_path / "report.json"
+
+    call_command("dry_run_dataset", str(zip_path), output=str(output))
+
+    _assert_report(json.loads(output.read_text()))
+    assert not Organization.objects.exists()
@@ -0,0 +1,120 @@
+from collections import Counter
+from datetime import date
+
+import pytest
+
+from organizations.downloads import download_file
+from organizations.filing_index import read_filing_index, select_new_filings
+from organizations.models import DatasetJob, Organization, OrganizationReturnInformation
+from organizations.tasks import process_dataset_task
+from organizations.tests.conftest import make_dataset_zip, make_filing, make_filing_index
+
+pytestmark = pytest.mark.django_db
+
+NEW = "202400000001"
+UNSUPPORTED = "202400000002"
+NOT_IN_INDEX = "202400000003"
+SUPERSEDED = "202400000004"
+STORED = "202400000005"
+# Amends SUPERSEDED, and is in another ZIP file of the same year
+AMENDED = "202400000009"
+# A 990T of the same EIN and tax period as NEW, which is a separate return rather than an amendment
+LATER_990T = "202400000010"
+
+
+@pytest.fixture
+def dataset(file_server):
+    """Serve a dataset ZIP file and the filing index of its year."""
+    make_dataset_zip(
+        file_server.directory / "dataset.zip",
+        {
+            NEW: make_filing("New Foundation"),
+            UNSUPPORTED: make_filing("Unrelated Business", return_type="990T"),
+            NOT_IN_INDEX: make_filing("Unlisted Foundation", return_type="990EZ"),
+            SUPERSEDED: make_filing("Amended Foundation", revenue=1),
+            STORED: make_filing("Stored Foundation", return_type="990PF"),
+        },
+    )
+    make_filing_index(
+        file_server.directory / "index.csv",
+        [
+            (NEW, "100000001", "202312", "990"),
+            (UNSUPPORTED, "100000002", "202312", "990T"),
+            (SUPERSEDED, "100000004", "202312", "990"),
+            (STORED, "100000005", "202312", "990PF"),
+            (AMENDED, "100000004", "202312", "990"),
+            (LATER_990T, "100000001", "202312", "990T"),
+        ],
+    )
+    return file_server
+
+
+def _store_return(name: str, file_name: str) -> None:
+    OrganizationReturnInformation.objects.create(
+        organization=Organization.objects.create(name=name),
+        return_type="990PF",
+        filed_on=date(2024, 5, 15),
+        tax_period_start_date=date(2023, 1, 1),
+        tax_period_end_date=date(2023, 12, 31),
+        original_file_name=file_name,
+    )
+
+
+def test_read_filing_index_matches_columns_case_insensitively(tmp_path):
+    index_path = tmp_path / "index.csv"
+    index_path.write_text("object_id,Return_Type,ein\n202400000001,990ez,123\n")
+
+    entries = list(read_filing_index(index_path.as_posix()))
+
+    assert [(entry.object_id, entry.ein, entry.return_type) for entry in entries] == [("202400000001", "123", "990EZ")]
+
+
+def test_read_filing_index_rejects_other_files(tmp_path):
+    index_path = tmp_path / "index.csv"
+    index_path.write_text("NAME,EIN\nSomething,123\n")
+
+    with pytest.raises(ValueError, match="Not an IRS filing index"):
+        list(read_filing_index(index_path.as_posix()))
+
+
+def test_select_new_filings_skips_stored_superseded_and_unsupported_filings(dataset, tmp_path):
+    _store_return("Stored Foundation", f"{STORED}_public.xml")
+    index_path, zip_path = tmp_path / "index.csv", tmp_path / "dataset.zip"
+    download_file(dataset.url("index.csv"), index_path)
+    download_file(dataset.url("dataset.zip"), zip_path)
+
+    selected, skipped = select_new_filings(index_path.as_posix(), zip_path.as_posix())
+
+    assert selected == [f"{NEW}_public.xml"]
+    assert skipped == Counter(
+        {"unsupported form type 990T": 1, "not in index": 1, "superseded": 1, "already stored": 1}
+    )
+
+
+def test_job_with_index_only_ingests_new_filings(dataset):
+    _store_return("Stored Foundation", f"{STORED}_public.xml")
+    job = DatasetJob.objects.create(zip_url=dataset.url("dataset.zip"), index_url=dataset.url("index.csv"))
+
+    process_dataset_task(str(job.id))
+
+    job.refresh_from_db()
+    assert job.status == DatasetJob.Status.COMPLETED
+    assert job.total_files == 1
+    assert set(Organization.objects.values_list("name", flat=True)) == {"New Foundation", "Stored Foundation"}
+
+
+def test_job_without_index_ingests_every_supported_filing(dataset):
+    job = DatasetJob.objects.create(zip_url=dataset.url("dataset.zip"))
+
+    process_dataset_task(str(job.id))
+
+    job.refresh_from_db()
+    assert job.status == DatasetJob.Status.COMPLETED
+    assert job.total_files == 5
+    # The 990T has no parsing strategy, and the superseded filing is ingested since nothing tells it was amended
+    assert set(Organization.objects.values_list("name", flat=True)) == {
+        "New Foundation",
+        "Unlisted Foundation",
+        "Amended Foundation",
+        "Stored Foundation",
+    }
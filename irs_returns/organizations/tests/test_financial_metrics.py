@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from organizations.financial_metrics import DERIVED_METRICS, SOURCE_FIELDS, compute_derived_metrics
+
+NAN = np.nan
+
+
+def _compute(**columns):
+    """Compute the metrics of returns given some of their source fields, the others being missing."""
+    size = len(next(iter(columns.values())))
+    arrays = {name: np.array(columns.get(name, [NAN] * size), dtype=float) for name in SOURCE_FIELDS}
+    return compute_derived_metrics(arrays)
+
+
+def _assert_metric(values, expected):
+    np.testing.assert_allclose(values, np.array(expected, dtype=float), equal_nan=True)
+
+
+def test_metrics_of_complete_return():
+    metrics = _compute(
+        total_revenue=[200],
+        py_total_revenue=[100],
+        total_expenses=[150],
+        py_total_expenses=[200],
+        total_assets_boy=[1000],
+        total_assets_eoy=[1100],
+        total_liabilities_eoy=[275],
+    )
+
+    assert list(metrics) == DERIVED_METRICS
+    _assert_metric(metrics["profit_margin"], [0.25])
+    _assert_metric(metrics["revenue_growth"], [1.0])
+    _assert_metric(metrics["expense_growth"], [-0.25])
+    _assert_metric(metrics["asset_growth"], [0.1])
+    _assert_metric(metrics["liability_ratio"], [0.25])
+
+
+def test_profit_margin_needs_positive_revenue_and_expenses():
+    metrics = _compute(total_revenue=[0, -100, NAN, 100, 100], total_expenses=[50, 50, 50, NAN, 150])
+
+    _assert_metric(metrics["profit_margin"], [NAN, NAN, NAN, NAN, -0.5])
+
+
+def test_growth_from_zero_or_missing_amount_is_undefined():
+    metrics = _compute(total_revenue=[100, 100, NAN, 0, 50], py_total_revenue=[0, NAN, 100, 100, -100])
+
+    # Growth from a negative amount is signed by the direction of the change
+    _assert_metric(metrics["revenue_growth"], [NAN, NAN, NAN, -1.0, 1.5])
+
+
+def test_liability_ratio_needs_positive_assets():
+    metrics = _compute(total_assets_eoy=[0, -10, 100, NAN], total_liabilities_eoy=[10, 10, NAN, 10])
+
+    _assert_metric(metrics["liability_ratio"], [NAN, NAN, NAN, NAN])
+
+
+@pytest.mark.filterwarnings("error")
+def test_missing_amounts_do_not_warn():
+    metrics = _compute(total_revenue=[NAN, 0], total_expenses=[NAN, 0], total_assets_eoy=[NAN, 0])
+
+    for metric in DERIVED_METRICS:
+        assert np.isnan(metrics[metric]).all()
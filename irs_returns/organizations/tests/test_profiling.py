@@ -0,0 +1,80 @@
+import pstats
+
+import pytest
+
+from organizations.models import DatasetArchive, DatasetJob
+from organizations.profiling import DatasetProfiler
+from organizations.tasks import process_dataset_task
+from organizations.tests.conftest import make_dataset_zip, make_filing
+
+FILINGS = {f"20240000000{i}": make_filing(f"Foundation {i}") for i in range(1, 6)}
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path / "media"
+
+
+def _process_files(profiler, files):
+    for _ in range(files):
+        if profiler.start_file():
+            sorted(range(1000), key=str)
+            profiler.stop_file()
+
+
+@pytest.mark.parametrize(("every", "profiled_files"), [(1, 7), (3, 3), (10, 1)])
+def test_profiler_samples_every_nth_file(every, profiled_files):
+    profiler = DatasetProfiler(every)
+
+    _process_files(profiler, 7)
+
+    summary = profiler.summary(limit=5)
+    assert (summary["files"], summary["profiled_files"]) == (7, profiled_files)
+    assert 0 < len(summary["functions"]) <= 5
+    own_seconds = [function["own_seconds"] for function in summary["functions"]]
+    assert own_seconds == sorted(own_seconds, reverse=True)
+
+
+def test_profile_dump_is_read_by_pstats(tmp_path):
+    profiler = DatasetProfiler()
+    _process_files(profiler, 2)
+    path = tmp_path / "dataset.prof"
+
+    path.write_bytes(profiler.dump())
+
+    assert "<built-in method builtins.sorted>" in {function for _, _, function in pstats.Stats(str(path)).stats}
+
+
+def test_summary_without_profiled_files():
+    assert DatasetProfiler(5).summary() == {"every": 5, "files": 0, "profiled_files": 0, "functions": []}
+
+
+@pytest.mark.django_db
+def test_job_stores_its_profile(file_server):
+    make_dataset_zip(file_server.directory / "dataset.zip", FILINGS)
+    job = DatasetJob.objects.create(zip_url=file_server.url("dataset.zip"), profile_every=2)
+
+    process_dataset_task(str(job.id))
+
+    job.refresh_from_db()
+    assert job.status == DatasetJob.Status.COMPLETED
+    assert (job.profile_summary["files"], job.profile_summary["profiled_files"]) == (5, 3)
+    assert any("parse" in function["function"] for function in job.profile_summary["functions"])
+    with job.profile_file.open("rb") as f:
+        assert f.read() != b""
+
+
+@pytest.mark.django_db
+def test_failed_job_keeps_its_profile(file_server):
+    make_dataset_zip(file_server.directory / "dataset.zip", FILINGS)
+    job = DatasetJob.objects.create(profile_every=1)
+    DatasetArchive.objects.bulk_create(
+        DatasetArchive(job=job, zip_url=file_server.url(name)) for name in ["dataset.zip", "missing.zip"]
+    )
+
+    process_dataset_task(str(job.id))
+
+    job.refresh_from_db()
+    assert job.status == DatasetJob.Status.FAILED
+    assert job.profile_summary["profiled_files"] == 5
+    assert job.profile_file
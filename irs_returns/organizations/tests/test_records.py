@@ -0,0 +1,36 @@
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+import pickle
+
+import pytest
+
+from organizations.parsers.records import OrganizationRecord, ParsedFiling, ReturnRecord, _Record
+
+
+@dataclass(slots=True)
+class SingleFieldRecord(_Record):
+    value: int | None = None
+
+
+@dataclass(slots=True)
+class EmptyRecord(_Record):
+    pass
+
+
+@pytest.mark.parametrize(
+    "record",
+    [
+        SingleFieldRecord(42),
+        EmptyRecord(),
+        OrganizationRecord(name="Warm Up Foundation"),
+        ParsedFiling(
+            "990",
+            OrganizationRecord(name="Warm Up Foundation", website_url="example.org"),
+            ReturnRecord(return_type="990", tax_period_end_date=datetime(2023, 12, 31), total_revenue=Decimal("1000")),
+        ),
+    ],
+    ids=lambda record: type(record).__name__,
+)
+def test_records_round_trip_through_pickle(record):
+    assert pickle.loads(pickle.dumps(record)) == record  # noqa: S301
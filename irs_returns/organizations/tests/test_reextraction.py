@@ -0,0 +1,145 @@
+from decimal import Decimal
+
+import pytest
+
+from organizations import reextraction
+from organizations.changes import get_feed_end
+from organizations.filing_store import FilingStore
+from organizations.models import ArchivedFiling, DatasetJob, OrganizationReturnInformation
+from organizations.parsers import PARSER_VERSION, XMLParser
+from organizations.reextraction import reextract_filings
+from organizations.tests.conftest import make_filing
+from organizations.writers import save_parsed_data
+
+ORIGINAL = "202401001_public"
+AMENDED = "202402001_public"
+
+
+@pytest.fixture
+def store(settings, tmp_path):
+    settings.DATASET_FILING_STORE_DIR = tmp_path
+    return FilingStore(tmp_path)
+
+
+def _archive(store, object_id, xml, return_info=None, parser_version=0):
+    return ArchivedFiling.objects.create(
+        object_id=object_id,
+        sha256=store.add(xml.encode()),
+        size=len(xml),
+        return_info=return_info,
+        parser_version=parser_version,
+    )
+
+
+def _ingest(store, object_id, xml):
+    _, _, return_info = save_parsed_data(XMLParser(xml.encode()).parse(), f"{object_id}.xml")
+    return _archive(store, object_id, xml, return_info, PARSER_VERSION)
+
+
+@pytest.mark.django_db
+def test_filing_without_return_is_ingested(store):
+    _archive(store, ORIGINAL, make_filing("Original Foundation"))
+
+    result = reextract_filings(workers=1)
+
+    assert result.returns_created == 1
+    return_info = OrganizationReturnInformation.objects.get()
+    assert return_info.original_file_name == f"{ORIGINAL}.xml"
+    assert ArchivedFiling.objects.get().return_info == return_info
+
+
+@pytest.mark.django_db
+def test_filing_without_return_does_not_overwrite_amended_return(store):
+    _ingest(store, AMENDED, make_filing("Amended Foundation", revenue=2000))
+    _archive(store, ORIGINAL, make_filing("Amended Foundation", revenue=1000))
+
+    result = reextract_filings(workers=1)
+
+    assert result.skipped == 1
+    assert result.returns_created == 0
+    return_info = OrganizationReturnInformation.objects.get()
+    assert return_info.original_file_name == f"{AMENDED}.xml"
+    assert return_info.total_revenue == Decimal(2000)
+    assert ArchivedFiling.objects.get(object_id=ORIGINAL).return_info is None
+
+
+@pytest.mark.django_db
+def test_run_holds_back_change_feed(store, monkeypatch):
+    _archive(store, ORIGINAL, make_filing("Original Foundation"))
+    feed_ends = []
+    apply_batch = reextraction._apply_batch
+
+    def _apply_batch(*args):
+        apply_batch(*args)
+        feed_ends.append(get_feed_end())
+
+    monkeypatch.setattr(reextraction, "_apply_batch", _apply_batch)
+
+    reextract_filings(workers=1)
+
+    job = DatasetJob.objects.get()
+    assert job.reextraction
+    assert feed_ends == [job.created_at]
+    assert OrganizationReturnInformation.objects.get().updated_at > job.created_at
+    assert job.status == DatasetJob.Status.COMPLETED
+    assert job.total_files == 1
+    assert job.returns_created == 1
+
+
+@pytest.mark.django_db
+def test_failed_batch_is_rolled_back(store, monkeypatch):
+    _archive(store, ORIGINAL, make_filing("Original Foundation"))
+
+    def _fail(*args, **kwargs):
+        raise RuntimeError("Connection lost")
+
+    monkeypatch.setattr(ArchivedFiling.objects, "bulk_update", _fail)
+
+    with pytest.raises(RuntimeError):
+        reextract_filings(workers=1)
+
+    assert not OrganizationReturnInformation.objects.exists()
+    assert ArchivedFiling.objects.get().parser_version == 0
+    job = DatasetJob.objects.get()
+    assert job.status == DatasetJob.Status.FAILED
+    assert job.error_message == "Re-extraction error: Connection lost"
+    assert get_feed_end() > job.created_at
+
+
+@pytest.mark.django_db
+def test_progress_is_saved_after_each_batch(store, monkeypatch):
+    _archive(store, ORIGINAL, make_filing("Original Foundation"))
+    _archive(store, AMENDED, make_filing("Amended Foundation"))
+    saved = []
+    apply_batch = reextraction._apply_batch
+
+    def _apply_batch(*args):
+        job = DatasetJob.objects.get()
+        saved.append((job.processed_files, job.updated_at))
+        apply_batch(*args)
+
+    monkeypatch.setattr(reextraction, "_apply_batch", _apply_batch)
+
+    reextract_filings(workers=1, batch_size=1)
+
+    assert [processed_files for processed_files, _ in saved] == [0, 1]
+    # Saving the progress keeps the job from being failed as stale by the change feed
+    assert saved[1][1] > saved[0][1]
+
+
+@pytest.mark.django_db
+def test_interrupted_run_is_marked_failed(store, monkeypatch):
+    _archive(store, ORIGINAL, make_filing("Original Foundation"))
+
+    def _interrupt(*args):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(reextraction, "_apply_batch", _interrupt)
+
+    with pytest.raises(KeyboardInterrupt):
+        reextract_filings(workers=1)
+
+    job = DatasetJob.objects.get()
+    assert job.status == DatasetJob.Status.FAILED
+    assert job.error_message == "Re-extraction error: KeyboardInterrupt"
+    assert job.finished_at is not None
@@ -0,0 +1,76 @@
+from django.db import connection
+from django.utils import timezone
+import pytest
+
+from organizations.models import Organization
+from organizations.search import search_organizations, update_search_vectors
+from organizations.tests.conftest import requires_postgres
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def organizations():
+    names = {
+        "Food Bank": "Feeding families",
+        "Food Bank of the Rockies": "Feeding families in Colorado",
+        "Springfield Community Food Bank": "Feeding Springfield",
+        "Animal Rescue League": "Sheltering pets and running a food bank for them",
+        "Harbor Arts Council": "Supporting local artists",
+    }
+    organizations = Organization.objects.bulk_create(
+        Organization(name=name, mission_description=mission) for name, mission in names.items()
+    )
+    update_search_vectors()
+    return organizations
+
+
+def _names(queryset):
+    return [organization.name for organization in queryset]
+
+
+@pytest.mark.parametrize("query", ["", "   "])
+def test_blank_query_matches_nothing(organizations, query):
+    assert not search_organizations(query).exists()
+
+
+@pytest.mark.skipif(connection.vendor == "postgresql", reason="Substring fallback of other databases")
+def test_fallback_ranks_exact_then_prefix_then_substring_then_mission(organizations):
+    assert _names(search_organizations("food bank")) == [
+        "Food Bank",
+        "Food Bank of the Rockies",
+        "Springfield Community Food Bank",
+        "Animal Rescue League",
+    ]
+
+
+@pytest.mark.skipif(connection.vendor == "postgresql", reason="Search vectors are only maintained on Postgres")
+def test_search_vectors_are_not_maintained_on_other_databases(organizations):
+    assert update_search_vectors() == 0
+
+
+@requires_postgres
+def test_name_matches_rank_above_mission_matches(organizations):
+    names = _names(search_organizations("food bank"))
+
+    assert set(names[:3]) == {"Food Bank", "Food Bank of the Rockies", "Springfield Community Food Bank"}
+    assert names[3] == "Animal Rescue League"
+    assert "Harbor Arts Council" not in names
+
+
+@requires_postgres
+def test_misspelled_name_matches_by_similarity(organizations):
+    assert _names(search_organizations("Harbour Arts Counsil"))[0] == "Harbor Arts Council"
+
+
+@requires_postgres
+def test_update_search_vectors_since(organizations):
+    since = timezone.now()
+    new = Organization.objects.create(name="Riverside Literacy Project", mission_description="Teaching adults to read")
+    Organization.objects.filter(name="Harbor Arts Council").update(
+        name="Harbor Music Council", updated_at=timezone.now()
+    )
+
+    assert update_search_vectors(since=since) == 2
+    assert _names(search_organizations("literacy")) == [new.name]
+    assert _names(search_organizations("music")) == ["Harbor Music Council"]
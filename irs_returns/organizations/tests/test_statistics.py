@@ -0,0 +1,86 @@
+from decimal import Decimal
+
+from django.utils import timezone
+import pytest
+
+from organizations.models import Organization, PercentileIndex, ReturnStatistic
+from organizations.statistics import _percentile, refresh_return_statistics
+from organizations.tests.conftest import make_return
+
+pytestmark = pytest.mark.django_db
+
+
+def _statistic(return_type, tax_year, metric="total_revenue"):
+    return ReturnStatistic.objects.get(return_type=return_type, tax_year=tax_year, metric=metric)
+
+
+@pytest.fixture
+def organizations():
+    return Organization.objects.bulk_create(Organization(name=f"Organization {i}") for i in range(4))
+
+
+@pytest.mark.parametrize(
+    ("fraction", "expected"),
+    [("0", "10"), ("0.25", "17.5"), ("0.5", "25"), ("0.9", "37"), ("1", "40")],
+)
+def test_percentile_interpolates_like_percentile_cont(fraction, expected):
+    values = [Decimal(10), Decimal(20), Decimal(30), Decimal(40)]
+    assert _percentile(values, Decimal(fraction)) == Decimal(expected)
+
+
+def test_cohort_aggregates(organizations):
+    for organization, revenue in zip(organizations, [100, 200, 300, 400], strict=True):
+        make_return(organization, 2023, total_revenue=Decimal(revenue), total_expenses=None)
+
+    assert refresh_return_statistics() == 1
+
+    statistic = _statistic("990", 2023)
+    assert statistic.count == 4
+    assert statistic.total == Decimal(1000)
+    assert (statistic.minimum, statistic.maximum, statistic.mean) == (Decimal(100), Decimal(400), Decimal(250))
+    assert (statistic.p25, statistic.median, statistic.p75) == (Decimal(175), Decimal(250), Decimal(325))
+    # Metrics without values in the cohort get no statistics
+    assert not ReturnStatistic.objects.filter(metric="total_expenses").exists()
+    assert PercentileIndex.objects.get(metric="total_revenue").count == 4
+
+
+def test_incremental_refresh_only_touches_updated_cohorts(organizations):
+    make_return(organizations[0], 2022, total_revenue=Decimal(100))
+    make_return(organizations[1], 2023, return_type="990EZ", total_revenue=Decimal(100))
+    refresh_return_statistics()
+    untouched = _statistic("990", 2022).updated_at
+
+    since = timezone.now()
+    make_return(organizations[2], 2023, return_type="990EZ", total_revenue=Decimal(300))
+
+    assert refresh_return_statistics(since=since) == 1
+    assert _statistic("990EZ", 2023).count == 2
+    assert _statistic("990", 2022).updated_at == untouched
+
+
+def test_incremental_refresh_updates_cohort_a_return_left(organizations):
+    make_return(organizations[0], 2023, return_type="990EZ", total_revenue=Decimal(100))
+    amended = make_return(organizations[1], 2023, return_type="990EZ", total_revenue=Decimal(200))
+    refresh_return_statistics()
+
+    since = timezone.now()
+    amended.return_type = "990"
+    amended.save()
+    refresh_return_statistics(since=since)
+
+    assert _statistic("990EZ", 2023).count == 1
+    assert _statistic("990EZ", 2023).total == Decimal(100)
+    assert _statistic("990", 2023).count == 1
+
+
+def test_full_refresh_removes_cohorts_without_returns(organizations):
+    old_return = make_return(organizations[0], 2020, total_revenue=Decimal(100))
+    make_return(organizations[1], 2023, total_revenue=Decimal(100))
+    refresh_return_statistics()
+    old_return.delete()
+
+    refresh_return_statistics()
+
+    assert not ReturnStatistic.objects.filter(tax_year=2020).exists()
+    assert not PercentileIndex.objects.filter(tax_year=2020).exists()
+    assert ReturnStatistic.objects.filter(tax_year=2023).exists()
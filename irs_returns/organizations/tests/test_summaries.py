@@ -0,0 +1,93 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from organizations.models import Organization
+from organizations.summaries import refresh_latest_returns, update_latest_return
+from organizations.tests.conftest import make_return
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def organization():
+    return Organization.objects.create(name="Summary Foundation")
+
+
+def _update(organization, return_info):
+    updated = update_latest_return(organization, return_info)
+    organization.refresh_from_db()
+    return updated
+
+
+def test_more_recent_return_becomes_latest(organization):
+    _update(organization, make_return(organization, 2022, total_revenue=Decimal(100)))
+    newer = make_return(organization, 2023, return_type="990EZ", total_revenue=Decimal(200))
+
+    assert _update(organization, newer)
+    assert organization.latest_return == newer
+    assert organization.latest_tax_year == 2023
+    assert organization.latest_return_type == "990EZ"
+    assert organization.latest_total_revenue == Decimal(200)
+
+
+def test_older_return_does_not_replace_latest(organization):
+    newer = make_return(organization, 2023)
+    _update(organization, newer)
+
+    assert not _update(organization, make_return(organization, 2021))
+    assert organization.latest_return == newer
+
+
+def test_later_filing_of_same_period_becomes_latest(organization):
+    original = make_return(organization, 2023)
+    _update(organization, original)
+    # A return for a period ending on the same day but filed later wins over the return that was filed first
+    amended = make_return(organization, 2023, filed_on=date(2024, 11, 1), tax_period_start_date=date(2023, 2, 1))
+
+    assert _update(organization, amended)
+    assert organization.latest_return == amended
+    assert organization.latest_filed_on == date(2024, 11, 1)
+
+
+def test_update_does_not_touch_updated_at(organization):
+    updated_at = organization.updated_at
+
+    _update(organization, make_return(organization, 2023))
+
+    assert organization.updated_at == updated_at
+
+
+def test_refresh_recomputes_every_organization_in_batches():
+    organizations = Organization.objects.bulk_create(Organization(name=f"Organization {i}") for i in range(5))
+    for i, organization in enumerate(organizations[:4]):
+        make_return(organization, 2021, total_revenue=Decimal(i))
+        make_return(organization, 2022 + i % 2, total_revenue=Decimal(10 * i))
+    # A stale summary pointing to a return that no longer exists is cleared
+    Organization.objects.filter(pk=organizations[4].pk).update(latest_tax_year=2020, latest_return_type="990")
+
+    assert refresh_latest_returns(batch_size=2) == 5
+
+    summaries = {
+        organization.name: (organization.latest_tax_year, organization.latest_total_revenue)
+        for organization in Organization.objects.all()
+    }
+    assert summaries == {
+        "Organization 0": (2022, Decimal(0)),
+        "Organization 1": (2023, Decimal(10)),
+        "Organization 2": (2022, Decimal(20)),
+        "Organization 3": (2023, Decimal(30)),
+        "Organization 4": (None, None),
+    }
+    assert Organization.objects.get(name="Organization 4").latest_return_type == ""
+
+
+def test_refresh_only_given_organizations():
+    first, second = Organization.objects.bulk_create(Organization(name=name) for name in ["First", "Second"])
+    make_return(first, 2023)
+    make_return(second, 2023)
+
+    assert refresh_latest_returns([first.pk]) == 1
+    assert Organization.objects.get(pk=first.pk).latest_tax_year == 2023
+    assert Organization.objects.get(pk=second.pk).latest_return is None
@@ -0,0 +1,104 @@
+"""The COPY writer gives the same organizations and returns as the ORM writer, for the same filings."""
+
+from decimal import Decimal
+from pathlib import Path
+
+from django.db import DataError
+import pytest
+
+from organizations.models import Organization, OrganizationReturnInformation
+from organizations.parsers import PARSER_VERSION, XMLParser
+from organizations.tests.conftest import make_filing, requires_postgres
+from organizations.writers import CopyWriter, ORMWriter
+
+# The COPY writer's staging tables are dropped when its transaction commits, which a test transaction never does
+pytestmark = [pytest.mark.django_db(transaction=True), requires_postgres]
+
+ORIGINAL = make_filing("Amended Foundation", revenue=1000)
+AMENDED = make_filing("Amended Foundation", revenue=2000, filed_on="2024-11-01")
+OTHER = make_filing("Other Foundation", revenue=500)
+
+
+def _write(writer, filings, skipped=()):
+    """Write filings by object ID, checking that the ones in skipped are rejected."""
+    for object_id, xml in filings.items():
+        parsed_filing = XMLParser(xml.encode()).parse()
+        if object_id in skipped:
+            with pytest.raises((ValueError, DataError)):
+                writer.add(Path(f"{object_id}_public.xml"), parsed_filing, None, 0)
+        else:
+            writer.add(Path(f"{object_id}_public.xml"), parsed_filing, None, 0)
+    writer.flush()
+    return writer
+
+
+def _snapshot():
+    returns = OrganizationReturnInformation.objects.order_by("organization__name", "tax_period_end_date")
+    organizations = Organization.objects.order_by("name")
+    return (
+        list(
+            returns.values_list(
+                "organization__name",
+                "original_file_name",
+                "return_type",
+                "filed_on",
+                "tax_period_end_date",
+                "total_revenue",
+                "parser_version",
+            )
+        ),
+        list(organizations.values_list("name", "latest_tax_year", "latest_filed_on", "latest_total_revenue")),
+    )
+
+
+def _write_both(filings, skipped=()):
+    """Write filings with the ORM writer then, from scratch, with the COPY writer, returning what each one wrote."""
+    orm_writer = _write(ORMWriter(), filings, skipped)
+    orm_snapshot = _snapshot()
+    Organization.objects.all().delete()
+
+    copy_writer = _write(CopyWriter(chunk_size=len(filings)), filings, skipped)
+
+    assert copy_writer.returns_created == orm_writer.returns_created
+    return orm_snapshot, _snapshot()
+
+
+def test_amended_return_in_same_chunk_replaces_original():
+    orm_snapshot, copy_snapshot = _write_both({"202401001": ORIGINAL, "202402001": AMENDED, "202403001": OTHER})
+
+    assert copy_snapshot == orm_snapshot
+    returns, organizations = copy_snapshot
+
+    assert [(name, file_name, revenue) for name, file_name, _, _, _, revenue, _ in returns] == [
+        ("Amended Foundation", "202402001_public.xml", Decimal(2000)),
+        ("Other Foundation", "202403001_public.xml", Decimal(500)),
+    ]
+    assert organizations[0][3] == Decimal(2000)
+
+
+def test_oversized_value_skips_filing():
+    oversized = make_filing("Oversized Foundation", revenue=10**13)
+
+    orm_snapshot, copy_snapshot = _write_both({"202401001": oversized, "202403001": OTHER}, skipped={"202401001"})
+
+    assert copy_snapshot[0] == orm_snapshot[0]
+    assert [name for name, *_ in copy_snapshot[0]] == ["Other Foundation"]
+    # The ORM writer has saved the organization when the return fails, while the COPY writer skips the whole filing
+    assert [name for name, *_ in orm_snapshot[1]] == ["Other Foundation", "Oversized Foundation"]
+    assert copy_snapshot[1] == orm_snapshot[1][:1]
+
+
+def test_unchanged_reingest_leaves_updated_at():
+    filings = {"202401001": ORIGINAL, "202403001": OTHER}
+    _write(CopyWriter(chunk_size=2), filings)
+    snapshot = _snapshot()
+    updated_at = sorted(OrganizationReturnInformation.objects.values_list("updated_at", flat=True))
+    organizations_updated_at = sorted(Organization.objects.values_list("updated_at", flat=True))
+
+    writer = _write(CopyWriter(chunk_size=2), filings)
+
+    assert (writer.organizations_created, writer.returns_created) == (0, 0)
+    assert _snapshot() == snapshot
+    assert sorted(OrganizationReturnInformation.objects.values_list("updated_at", flat=True)) == updated_at
+    assert sorted(Organization.objects.values_list("updated_at", flat=True)) == organizations_updated_at
+    assert set(OrganizationReturnInformation.objects.values_list("parser_version", flat=True)) == {PARSER_VERSION}
@@ -0,0 +1,434 @@
+"""
+Writing of parsed filings to organizations and returns.
+
+The ORM writer saves each filing as soon as it is parsed, with update_or_create. On Postgres, the COPY writer buffers
+DATASET_WRITE_CHUNK_SIZE filings instead, streams them into a temporary staging table with COPY, and merges them into
+the organizations and returns tables with a few set-based statements, in one transaction per chunk. It gives the same
+result as the ORM writer, except that:
+
+- Rows whose values did not change are left untouched, so re-ingesting a release does not flood the change feed.
+- An organization name shared by several organizations resolves to the oldest of them instead of failing the file.
+- A filing with a value that does not fit in its column is skipped as a whole, since it would fail its whole chunk.
+
+Within a chunk, as across chunks, the last filing wins, so that amended returns still replace the original.
+"""
+
+from datetime import date
+from decimal import Decimal
+import logging
+from pathlib import Path
+from typing import Any
+from uuid import UUID
+
+from django.conf import settings
+from django.db import connection, models, transaction
+from django.utils import timezone
+
+from organizations.models import ArchivedFiling, Organization, OrganizationReturnInformation
+from organizations.parsers import PARSER_VERSION, OrganizationRecord, ParsedFiling, ReturnRecord
+from organizations.partitions import ensure_partition
+from organizations.summaries import LATEST_RETURN_FIELDS, update_latest_return
+
+logger = logging.getLogger(__name__)
+
+# Organization fields written from an OrganizationRecord, besides the name that identifies the organization
+ORGANIZATION_RECORD_FIELDS = ["website_url", "mission_description"]
+
+# Return fields written from a ReturnRecord, besides the organization and tax period that identify the return
+RETURN_RECORD_FIELDS = [
+    "return_type",
+    "filed_on",
+    "employee_count",
+    "py_employee_count",
+    "total_revenue",
+    "py_total_revenue",
+    "total_expenses",
+    "py_total_expenses",
+    "total_assets_eoy",
+    "total_assets_boy",
+    "total_liabilities_eoy",
+    "total_liabilities_boy",
+]
+
+
+def get_organization_fields(organization: OrganizationRecord) -> dict:
+    """Get the organization fields written from the organization record of a parsed file, other than its name."""
+    return {field: getattr(organization, field) or "" for field in ORGANIZATION_RECORD_FIELDS}
+
+
+def get_return_fields(return_info: ReturnRecord) -> dict:
+    """Get the return fields written from the return record of a parsed file, other than its organization and period."""
+    return {field: getattr(return_info, field) for field in RETURN_RECORD_FIELDS}
+
+
+def save_parsed_data(
+    parsed_filing: ParsedFiling, file_name: str
+) -> tuple[bool, bool, OrganizationReturnInformation | None]:
+    """
+    Create or update the organization and return of a parsed file.
+
+    Returns:
+        Whether the organization and the return were created, and the return if the file had one
+    """
+    org_data = parsed_filing.organization
+    if not org_data.name:
+        return False, False, None
+
+    organization, org_created = Organization.objects.update_or_create(
+        name=org_data.name,
+        defaults=get_organization_fields(org_data),
+    )
+
+    return_data = parsed_filing.return_info
+    if not (return_data.tax_period_start_date and return_data.tax_period_end_date):
+        return org_created, False, None
+
+    ensure_partition(return_data.tax_period_end_date)
+    return_info, return_created = OrganizationReturnInformation.objects.update_or_create(
+        organization=organization,
+        tax_period_start_date=return_data.tax_period_start_date,
+        tax_period_end_date=return_data.tax_period_end_date,
+        defaults={
+            "original_file_name": file_name,
+            **get_return_fields(return_data),
+            "parser_version": PARSER_VERSION,
+        },
+    )
+    update_latest_return(organization, return_info)
+    return org_created, return_created, return_info
+
+
+def archive_filing(xml_file: Path, sha256: str, size: int, return_info: OrganizationReturnInformation | None) -> None:
+    """Record which stored filing a file was, and the return extracted from it if any."""
+    ArchivedFiling.objects.bulk_create(
+        [
+            ArchivedFiling(
+                object_id=xml_file.stem,
+                sha256=sha256,
+                size=size,
+                return_info=return_info,
+                parser_version=PARSER_VERSION,
+            )
+        ],
+        update_conflicts=True,
+        unique_fields=["object_id"],
+        update_fields=["sha256", "size", "return_info", "parser_version", "updated_at"],
+    )
+
+
+class ORMWriter:
+    """Save each parsed filing right away, with the ORM."""
+
+    def __init__(self):
+        self.organizations_created = 0
+        self.returns_created = 0
+
+    @property
+    def full(self) -> bool:
+        return False
+
+    def add(self, xml_file: Path, parsed_filing: ParsedFiling, sha256: str | None, size: int) -> None:
+        """
+        Write a parsed filing, and record it as archived if it was added to the filing store (sha256 not None).
+
+        Raises:
+            Exception: If the filing cannot be written, in which case it is not recorded as archived
+        """
+        org_created, return_created, return_info = save_parsed_data(parsed_filing, xml_file.name)
+        self.organizations_created += org_created
+        self.returns_created += return_created
+        if sha256 is not None:
+            archive_filing(xml_file, sha256, size, return_info)
+
+    def flush(self) -> None:
+        pass
+
+
+# Columns of the staging table besides the position of each row: the archived filing, the organization and the return
+_STAGED_FIELDS = [
+    (ArchivedFiling, "object_id"),
+    (ArchivedFiling, "sha256"),
+    (ArchivedFiling, "size"),
+    (Organization, "name"),
+    *[(Organization, name) for name in ORGANIZATION_RECORD_FIELDS],
+    (OrganizationReturnInformation, "original_file_name"),
+    (OrganizationReturnInformation, "tax_period_start_date"),
+    (OrganizationReturnInformation, "tax_period_end_date"),
+    *[(OrganizationReturnInformation, name) for name in RETURN_RECORD_FIELDS],
+]
+
+STAGING_TABLE = "ingest_filing_staging"
+STAGED_ORGANIZATIONS_TABLE = "ingest_organization_staging"
+STAGED_RETURNS_TABLE = "ingest_return_staging"
+
+
+def _check_fits(field: models.Field, value: Any) -> None:
+    """Raise a ValueError if a value cannot be written to its column, which would fail the COPY of a whole chunk."""
+    if value is None:
+        if not field.null:
+            raise ValueError(f"{field.name} is required.")
+    elif isinstance(value, str):
+        if "\x00" in value:
+            raise ValueError(f"{field.name} contains NUL characters.")
+        if field.max_length is not None and len(value) > field.max_length:
+            raise ValueError(f"{field.name} is longer than {field.max_length} characters.")
+    elif isinstance(field, models.DecimalField):
+        rounded = value.quantize(Decimal(1).scaleb(-field.decimal_places))
+        if rounded and rounded.adjusted() >= field.max_digits - field.decimal_places:
+            raise ValueError(f"{field.name} has more than {field.max_digits} digits.")
+    elif isinstance(field, models.IntegerField):
+        min_value, max_value = connection.ops.integer_field_range(field.get_internal_type())
+        if not min_value <= value <= max_value:
+            raise ValueError(f"{field.name} is out of range.")
+
+
+def _assign(fields: list[str], source: str) -> str:
+    return ", ".join(f"{field} = {source}.{field}" for field in fields)
+
+
+def _is_distinct(fields: list[str], target: str, source: str) -> str:
+    targets = ", ".join(f"{target}.{field}" for field in fields)
+    sources = ", ".join(f"{source}.{field}" for field in fields)
+    return f"({targets}) IS DISTINCT FROM ({sources})"
+
+
+class CopyWriter:
+    """Buffer parsed filings and write them in chunks, with COPY and set-based merges (Postgres only)."""
+
+    def __init__(self, chunk_size: int):
+        self.chunk_size = chunk_size
+        self.organizations_created = 0
+        self.returns_created = 0
+        self._rows: list[list[Any]] = []
+        self._tax_years: set[int] = set()
+
+    @property
+    def full(self) -> bool:
+        return len(self._rows) >= self.chunk_size
+
+    def add(self, xml_file: Path, parsed_filing: ParsedFiling, sha256: str | None, size: int) -> None:
+        """
+        Buffer a parsed filing until the next flush, which also records it as archived if it was added to the filing
+        store (sha256 not None).
+
+        Raises:
+            ValueError: If the filing cannot be written, in which case it is not buffered
+        """
+        organization = parsed_filing.organization
+        return_info = parsed_filing.return_info
+        values = {
+            "object_id": xml_file.stem,
+            "sha256": sha256,
+            "size": size if sha256 is not None else None,
+            "name": organization.name or None,
+            **get_organization_fields(organization),
+            "original_file_name": xml_file.name,
+            "tax_period_start_date": return_info.tax_period_start_date,
+            "tax_period_end_date": return_info.tax_period_end_date,
+            **get_return_fields(return_info),
+        }
+        # Like save_parsed_data, a filing without a name or a tax period has no organization or return to write. Only
+        # the values that are written are checked.
+        has_organization = values["name"] is not None
+        has_return = has_organization and bool(return_info.tax_period_start_date and return_info.tax_period_end_date)
+        checked = {
+            ArchivedFiling: sha256 is not None,
+            Organization: has_organization,
+            OrganizationReturnInformation: has_return,
+        }
+
+        row = [len(self._rows)]
+        for model, name in _STAGED_FIELDS:
+            field = model._meta.get_field(name)
+            # Converted as the ORM would before saving (e.g. datetimes to dates)
+            value = field.get_db_prep_save(values[name], connection)
+            if checked[model]:
+                _check_fits(field, value)
+            values[name] = value
+            row.append(value)
+
+        self._rows.append(row)
+        if has_return:
+            self._tax_years.add(return_info.tax_period_end_date.year)
+
+    def flush(self) -> None:
+        """Write the buffered filings, in one transaction."""
+        if not self._rows:
+            return
+
+        # Partitions are created beforehand, so that moving returns out of the default partition is not held up by the
+        # chunk's transaction
+        for year in sorted(self._tax_years):
+            ensure_partition(date(year, 12, 31))
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            self._stage(cursor)
+            organizations_created, organizations_updated = self._merge_organizations(cursor)
+            returns_created, returns_updated, changed_organization_ids = self._merge_returns(cursor)
+            self._merge_archived_filings(cursor)
+            self._refresh_latest_returns(cursor, changed_organization_ids)
+
+        logger.info(
+            f"Wrote {len(self._rows)} filings: {organizations_created} organizations created, {organizations_updated} "
+            f"updated, {returns_created} returns created, {returns_updated} updated."
+        )
+        self.organizations_created += organizations_created
+        self.returns_created += returns_created
+        self._rows = []
+        self._tax_years = set()
+
+    def _stage(self, cursor) -> None:
+        """Copy the buffered filings into the staging table, whose columns have the types of the model fields."""
+        columns = ["seq integer"]
+        for model, name in _STAGED_FIELDS:
+            field = model._meta.get_field(name)
+            columns.append(f"{field.column} {field.db_type(connection)}")
+        cursor.execute(f"CREATE TEMPORARY TABLE {STAGING_TABLE} ({', '.join(columns)}) ON COMMIT DROP")
+        with cursor.cursor.copy(f"COPY {STAGING_TABLE} FROM STDIN") as copy:
+            for row in self._rows:
+                copy.write_row(row)
+
+    def _merge_organizations(self, cursor) -> tuple[int, int]:
+        """
+        Resolve the staged organizations by name, updating the ones that exist and creating the others.
+
+        Returns:
+            Number of organizations created and updated
+        """
+        table = Organization._meta.db_table
+        fields = ", ".join(ORGANIZATION_RECORD_FIELDS)
+        now = timezone.now()
+        cursor.execute(
+            f"CREATE TEMPORARY TABLE {STAGED_ORGANIZATIONS_TABLE} ON COMMIT DROP AS "  # noqa: S608
+            f"SELECT DISTINCT ON (name) name, {fields}, NULL::uuid AS id, false AS created "
+            f"FROM {STAGING_TABLE} WHERE name IS NOT NULL ORDER BY name, seq DESC"
+        )
+        # Organization names are not indexed, so they are all resolved with a single join
+        cursor.execute(
+            f"UPDATE {STAGED_ORGANIZATIONS_TABLE} staged SET id = existing.id FROM ("  # noqa: S608
+            f"SELECT DISTINCT ON (organization.name) organization.name, organization.id FROM {table} organization "
+            f"JOIN {STAGED_ORGANIZATIONS_TABLE} USING (name) "
+            f"ORDER BY organization.name, organization.created_at, organization.id"
+            f") existing WHERE staged.name = existing.name"
+        )
+        cursor.execute(
+            f"UPDATE {table} organization SET {_assign(ORGANIZATION_RECORD_FIELDS, 'staged')}, "  # noqa: S608
+            f"updated_at = %s FROM {STAGED_ORGANIZATIONS_TABLE} staged WHERE organization.id = staged.id "
+            f"AND {_is_distinct(ORGANIZATION_RECORD_FIELDS, 'organization', 'staged')}",
+            [now],
+        )
+        updated = cursor.rowcount
+
+        cursor.execute(
+            f"UPDATE {STAGED_ORGANIZATIONS_TABLE} SET id = gen_random_uuid(), created = true WHERE id IS NULL"  # noqa: S608
+        )
+        # The latest return summary is filled in once the returns are written
+        cursor.execute(
+            f"INSERT INTO {table} (id, created_at, updated_at, name, {fields}, latest_return_type) "  # noqa: S608
+            f"SELECT id, %s, %s, name, {fields}, '' FROM {STAGED_ORGANIZATIONS_TABLE} WHERE created",
+            [now, now],
+        )
+        return cursor.rowcount, updated
+
+    def _merge_returns(self, cursor) -> tuple[int, int, set[UUID]]:
+        """
+        Update the staged returns that exist and create the others.
+
+        Returns:
+            Number of returns created and updated, and the organizations whose returns changed
+        """
+        table = OrganizationReturnInformation._meta.db_table
+        fields = ", ".join(RETURN_RECORD_FIELDS)
+        data_fields = ["original_file_name", *RETURN_RECORD_FIELDS]
+        now = timezone.now()
+        cursor.execute(
+            f"CREATE TEMPORARY TABLE {STAGED_RETURNS_TABLE} ON COMMIT DROP AS "  # noqa: S608
+            f"SELECT DISTINCT ON (organization.id, staged.tax_period_start_date, staged.tax_period_end_date) "
+            f"organization.id AS organization_id, staged.original_file_name, staged.tax_period_start_date, "
+            f"staged.tax_period_end_date, {', '.join(f'staged.{field}' for field in RETURN_RECORD_FIELDS)}, "
+            f"NULL::uuid AS id, false AS created "
+            f"FROM {STAGING_TABLE} staged JOIN {STAGED_ORGANIZATIONS_TABLE} organization USING (name) "
+            f"WHERE staged.tax_period_start_date IS NOT NULL AND staged.tax_period_end_date IS NOT NULL "
+            f"ORDER BY organization.id, staged.tax_period_start_date, staged.tax_period_end_date, staged.seq DESC"
+        )
+        cursor.execute(
+            f"UPDATE {STAGED_RETURNS_TABLE} staged SET id = return_info.id FROM {table} return_info "  # noqa: S608
+            f"WHERE return_info.organization_id = staged.organization_id "
+            f"AND return_info.tax_period_start_date = staged.tax_period_start_date "
+            f"AND return_info.tax_period_end_date = staged.tax_period_end_date"
+        )
+
+        # The tax period end date lets Postgres only look in the partition of each return
+        match = "return_info.id = staged.id AND return_info.tax_period_end_date = staged.tax_period_end_date"
+        cursor.execute(
+            f"UPDATE {table} return_info SET {_assign(data_fields, 'staged')}, "  # noqa: S608
+            f"parser_version = %s, updated_at = %s FROM {STAGED_RETURNS_TABLE} staged "
+            f"WHERE {match} AND {_is_distinct(data_fields, 'return_info', 'staged')} "
+            f"RETURNING return_info.organization_id",
+            [PARSER_VERSION, now],
+        )
+        changed_organization_ids = {row[0] for row in cursor.fetchall()}
+        updated = cursor.rowcount
+        # Like re-extraction, returns that did not change only get their parser version bumped, keeping their updated_at
+        cursor.execute(
+            f"UPDATE {table} return_info SET parser_version = %s FROM {STAGED_RETURNS_TABLE} staged "  # noqa: S608
+            f"WHERE {match} AND return_info.parser_version <> %s",
+            [PARSER_VERSION, PARSER_VERSION],
+        )
+
+        cursor.execute(
+            f"UPDATE {STAGED_RETURNS_TABLE} SET id = gen_random_uuid(), created = true WHERE id IS NULL"  # noqa: S608
+        )
+        cursor.execute(
+            f"INSERT INTO {table} (id, created_at, updated_at, organization_id, original_file_name, "  # noqa: S608
+            f"tax_period_start_date, tax_period_end_date, {fields}, parser_version) "
+            f"SELECT id, %s, %s, organization_id, original_file_name, tax_period_start_date, tax_period_end_date, "
+            f"{fields}, %s FROM {STAGED_RETURNS_TABLE} WHERE created RETURNING organization_id",
+            [now, now, PARSER_VERSION],
+        )
+        changed_organization_ids.update(row[0] for row in cursor.fetchall())
+        return cursor.rowcount, updated, changed_organization_ids
+
+    def _refresh_latest_returns(self, cursor, organization_ids: set[UUID]) -> None:
+        """
+        Recompute the latest return summary of the organizations whose returns changed, like refresh_latest_returns()
+        does but in a single statement, since building its bulk update takes longer than writing the chunk.
+        """
+        if not organization_ids:
+            return
+        latest_fields = ", ".join(f"latest_{field} = latest.{field}" for field in LATEST_RETURN_FIELDS)
+        cursor.execute(
+            f"UPDATE {Organization._meta.db_table} organization SET latest_return_id = latest.id, "  # noqa: S608
+            f"latest_tax_year = extract(year FROM latest.tax_period_end_date), {latest_fields} FROM ("
+            f"SELECT DISTINCT ON (organization_id) organization_id, id, {', '.join(LATEST_RETURN_FIELDS)} "
+            f"FROM {OrganizationReturnInformation._meta.db_table} WHERE organization_id = ANY(%s) "
+            f"ORDER BY organization_id, tax_period_end_date DESC, filed_on DESC"
+            f") latest WHERE organization.id = latest.organization_id",
+            [list(organization_ids)],
+        )
+
+    def _merge_archived_filings(self, cursor) -> None:
+        """Record the staged filings that were added to the filing store, with the return each one was written to."""
+        now = timezone.now()
+        cursor.execute(
+            f"INSERT INTO {ArchivedFiling._meta.db_table} "  # noqa: S608
+            f"(id, created_at, updated_at, object_id, sha256, size, return_info_id, parser_version) "
+            f"SELECT gen_random_uuid(), %s, %s, staged.object_id, staged.sha256, staged.size, return_info.id, %s "
+            f"FROM {STAGING_TABLE} staged "
+            f"LEFT JOIN {STAGED_ORGANIZATIONS_TABLE} organization USING (name) "
+            f"LEFT JOIN {STAGED_RETURNS_TABLE} return_info ON return_info.organization_id = organization.id "
+            f"AND return_info.tax_period_start_date = staged.tax_period_start_date "
+            f"AND return_info.tax_period_end_date = staged.tax_period_end_date "
+            f"WHERE staged.sha256 IS NOT NULL "
+            f"ON CONFLICT (object_id) DO UPDATE SET sha256 = EXCLUDED.sha256, size = EXCLUDED.size, "
+            f"return_info_id = EXCLUDED.return_info_id, parser_version = EXCLUDED.parser_version, "
+            f"updated_at = EXCLUDED.updated_at",
+            [now, now, PARSER_VERSION],
+        )
+
+
+def get_writer() -> ORMWriter | CopyWriter:
+    """Get the writer of DATASET_WRITE_BACKEND. COPY is only available on Postgres, the ORM is used elsewhere."""
+    if settings.DATASET_WRITE_BACKEND == "copy" and connection.vendor == "postgresql":
+        return CopyWriter(settings.DATASET_WRITE_CHUNK_SIZE)
+    return ORMWriter()
@@ -1,5 +1,11 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class RestApiConfig(AppConfig):
-    name = 'rest_api'
+    name = "rest_api"
+
+    def ready(self):
+        from rest_api.metrics import install_query_recorder
+
+        connection_created.connect(install_query_recorder, dispatch_uid="rest_api_query_recorder")
@@ -0,0 +1,135 @@
+"""
+Async read-only views for the public companies and statistics endpoints.
+
+These mirror the responses of the sync DRF viewsets but query the database with Django's async ORM, so slow queries
+do not hold a worker while they wait. They are only routed when ASYNC_READ_API is enabled and the app is served
+through ASGI (see core.asgi). Endpoints that write or require authentication stay on the sync DRF viewsets.
+"""
+
+from uuid import UUID
+
+from asgiref.sync import sync_to_async
+from django.db.models import QuerySet
+from django.http import HttpRequest, HttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.serializers import BaseSerializer
+
+from organizations.models import Organization, ReturnStatistic
+from organizations.search import search_organizations
+from rest_api.pagination import StandardPagination
+from rest_api.serializers.organizations.companies import CompanySerializer, CompanySummarySerializer
+from rest_api.serializers.statistics import ReturnStatisticSerializer
+from rest_api.viewsets.organizations.companies import CompanyViewSet, filter_companies
+from rest_api.viewsets.statistics import filter_statistics
+
+
+def _render(data, status: int = 200) -> HttpResponse:
+    """Render data the same way DRF's JSONRenderer does for the sync endpoints."""
+    return HttpResponse(JSONRenderer().render(data), status=status, content_type="application/json")
+
+
+async def _render_serialized(serializer: BaseSerializer, paginator: StandardPagination | None = None) -> HttpResponse:
+    """
+    Serialize and render a response in a worker thread, in the pagination envelope of the paginator if given.
+
+    Serializing is CPU-bound, so serializing many companies and their returns on the event loop would hold up every
+    other request of the worker. What is serialized is loaded beforehand, so the thread does not query the database.
+    """
+
+    def render() -> bytes:
+        data = serializer.data
+        return JSONRenderer().render(data if paginator is None else paginator.get_paginated_response(data).data)
+
+    content = await sync_to_async(render, thread_sensitive=False)()
+    return HttpResponse(content, content_type="application/json")
+
+
+def _get_ordering(request: HttpRequest) -> list[str]:
+    """Parse the `ordering` query param, allowing the same fields as CompanyViewSet."""
+    ordering = []
+    for field in request.GET.get("ordering", "").split(","):
+        field = field.strip()
+        if field.lstrip("-") in CompanyViewSet.ordering_fields:
+            ordering.append(field)
+    return ordering or CompanyViewSet.ordering
+
+
+async def _paginate(request: HttpRequest, queryset: QuerySet) -> tuple[list, StandardPagination] | None:
+    """
+    Paginate a queryset with StandardPagination, like the sync viewsets.
+
+    Returns:
+        Tuple of the page's objects and the paginator to build the response with, or None if the page does not exist
+    """
+    paginator = StandardPagination()
+    try:
+        objects = await paginator.apaginate_queryset(queryset, Request(request))
+    except NotFound:
+        return None
+    return objects, paginator
+
+
+@require_GET
+async def company_list(request: HttpRequest) -> HttpResponse:
+    """GET /api/companies/"""
+    queryset = Organization.objects.prefetch_related("returns").order_by(*_get_ordering(request))
+    try:
+        queryset = filter_companies(queryset, request.GET)
+    except ValidationError as e:
+        return _render(e.detail, status=400)
+    companies = [company async for company in queryset]
+    return await _render_serialized(CompanySerializer(companies, many=True, context={"request": request}))
+
+
+@require_GET
+async def company_detail(request: HttpRequest, id: UUID) -> HttpResponse:
+    """GET /api/companies/<id>/"""
+    try:
+        company = await Organization.objects.prefetch_related("returns").aget(pk=id)
+    except Organization.DoesNotExist:
+        return _render({"detail": "No Organization matches the given query."}, status=404)
+    return await _render_serialized(CompanySerializer(company, context={"request": request}))
+
+
+@require_GET
+async def company_summary(request: HttpRequest) -> HttpResponse:
+    """GET /api/companies/summary/"""
+    queryset = Organization.objects.filter(latest_return__isnull=False).defer("search_vector")
+    try:
+        queryset = filter_companies(queryset.order_by(*_get_ordering(request)), request.GET)
+    except ValidationError as e:
+        return _render(e.detail, status=400)
+    page = await _paginate(request, queryset)
+    if page is None:
+        return _render({"detail": "Invalid page."}, status=404)
+
+    companies, paginator = page
+    return await _render_serialized(
+        CompanySummarySerializer(companies, many=True, context={"request": request}), paginator
+    )
+
+
+@require_GET
+async def company_search(request: HttpRequest) -> HttpResponse:
+    """GET /api/companies/search/?q="""
+    query = request.GET.get("q", "").strip()
+    if not query:
+        return _render({"q": ["This query parameter is required."]}, status=400)
+
+    page = await _paginate(request, search_organizations(query).prefetch_related("returns"))
+    if page is None:
+        return _render({"detail": "Invalid page."}, status=404)
+
+    companies, paginator = page
+    return await _render_serialized(CompanySerializer(companies, many=True, context={"request": request}), paginator)
+
+
+@require_GET
+async def statistics_list(request: HttpRequest) -> HttpResponse:
+    """GET /api/stats/"""
+    queryset = filter_statistics(ReturnStatistic.objects.all(), request.GET)
+    statistics = [statistic async for statistic in queryset]
+    return await _render_serialized(ReturnStatisticSerializer(statistics, many=True))
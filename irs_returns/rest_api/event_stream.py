@@ -0,0 +1,99 @@
+"""
+Server-sent event streams of dataset job progress, pushed from organizations.progress instead of polled.
+
+Each stream starts with the current state of the job and of its archives, then relays every update published for the
+job until it finishes. Under ASGI the stream is an async generator, so watchers only hold a connection to the broker
+while they wait. Under WSGI each watcher holds a worker thread for as long as it is connected.
+"""
+
+from collections.abc import AsyncIterator, Iterator
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.http import HttpRequest
+from rest_framework.renderers import BaseRenderer
+
+from organizations.models import DatasetJob
+from organizations.progress import FINISHED_STATUSES, archive_event, get_broker, job_channel, job_event
+
+# Seconds between comments sent while there are no updates, which keep proxies from closing idle streams
+HEARTBEAT_SECONDS = 15
+
+HEARTBEAT = b": keep-alive\n\n"
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Accept `text/event-stream` requests. Only error responses are rendered, as JSON, since events are streamed."""
+
+    media_type = "text/event-stream"
+    format = "event-stream"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, cls=DjangoJSONEncoder).encode()
+
+
+def is_asgi_request(request: HttpRequest) -> bool:
+    """Whether a request is served through ASGI rather than WSGI, whose environ always has a `wsgi.input` stream."""
+    return "wsgi.input" not in request.META
+
+
+def _format_event(event: str, data: str) -> bytes:
+    return f"event: {event}\ndata: {data}\n\n".encode()
+
+
+def _initial_events(job: DatasetJob) -> list[bytes]:
+    events = [_format_event("job", json.dumps(job_event(job), cls=DjangoJSONEncoder))]
+    events += [
+        _format_event("archive", json.dumps(archive_event(archive), cls=DjangoJSONEncoder))
+        for archive in job.archives.all()
+    ]
+    return events
+
+
+def _relay(message: str) -> tuple[bytes, bool]:
+    """Format a published message as an event, and tell whether it is the job finishing."""
+    message = json.loads(message)
+    finished = message["event"] == "job" and message["data"]["status"] in FINISHED_STATUSES
+    return _format_event(message["event"], json.dumps(message["data"])), finished
+
+
+def _close_connection() -> None:
+    # Watchers can stay connected for the whole job, which must not hold a database connection
+    connection.close()
+
+
+def job_event_stream(job_id) -> Iterator[bytes]:
+    with get_broker().subscribe(job_channel(job_id)) as get_message:
+        # The job is read once subscribed so that no update can be missed in between
+        job = DatasetJob.objects.prefetch_related("archives").get(id=job_id)
+        finished = job.status in FINISHED_STATUSES
+        _close_connection()
+        yield from _initial_events(job)
+
+        while not finished:
+            message = get_message(HEARTBEAT_SECONDS)
+            if message is None:
+                yield HEARTBEAT
+                continue
+            event, finished = _relay(message)
+            yield event
+
+
+async def ajob_event_stream(job_id) -> AsyncIterator[bytes]:
+    async with get_broker().asubscribe(job_channel(job_id)) as get_message:
+        job = await DatasetJob.objects.prefetch_related("archives").aget(id=job_id)
+        finished = job.status in FINISHED_STATUSES
+        await sync_to_async(_close_connection)()
+        for event in _initial_events(job):
+            yield event
+
+        while not finished:
+            message = await get_message(HEARTBEAT_SECONDS)
+            if message is None:
+                yield HEARTBEAT
+                continue
+            event, finished = _relay(message)
+            yield event
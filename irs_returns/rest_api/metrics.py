@@ -0,0 +1,195 @@
+"""
+Request metrics of the REST API: latency histograms, database queries, serializer time and response sizes per endpoint.
+
+Metrics are kept in memory by each process, so with several web workers each one reports the requests it served.
+The measurements of the current request are kept in a context variable, which Django copies into the threads that run
+sync code for async views, so queries made from those threads are counted too.
+"""
+
+from bisect import bisect_left
+from collections.abc import Callable
+from contextvars import ContextVar
+import threading
+import time
+from typing import Any
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+LATENCY_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+
+class RequestMetrics:
+    """Measurements of a single request."""
+
+    __slots__ = ("start", "queries", "query_seconds", "serializer_seconds", "_serializer_depth")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self._serializer_depth = 0
+
+
+_current_request: ContextVar[RequestMetrics | None] = ContextVar("current_request_metrics", default=None)
+
+
+def start_request() -> tuple[RequestMetrics, Any]:
+    """Start measuring a request, returning its metrics and the token to pass to end_request."""
+    metrics = RequestMetrics()
+    return metrics, _current_request.set(metrics)
+
+
+def end_request(token: Any) -> None:
+    _current_request.reset(token)
+
+
+def record_query(execute: Callable, sql: str, params: Any, many: bool, context: dict) -> Any:
+    """Database execute wrapper counting the queries of the current request and the time they take."""
+    metrics = _current_request.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.query_seconds += time.perf_counter() - start
+
+
+def install_query_recorder(sender, connection, **kwargs) -> None:
+    """Add record_query to every new database connection (connection_created signal handler)."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class TimedSerializerMixin:
+    """
+    Record the time spent serializing objects in the current request's metrics.
+
+    Only meant for the top-level serializers of responses. Serializers nested in them are included in their time.
+    """
+
+    def to_representation(self, instance):
+        metrics = _current_request.get()
+        if metrics is None:
+            return super().to_representation(instance)
+
+        metrics._serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            metrics._serializer_depth -= 1
+            if not metrics._serializer_depth:
+                metrics.serializer_seconds += time.perf_counter() - start
+
+
+class EndpointMetrics:
+    """Aggregated metrics of the requests to an endpoint."""
+
+    def __init__(self):
+        self.requests = 0
+        self.statuses: dict[str, int] = {}
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.latency_ms_total = 0.0
+        self.latency_ms_max = 0.0
+        self.queries_total = 0
+        self.queries_max = 0
+        self.query_ms_total = 0.0
+        self.serializer_ms_total = 0.0
+        self.response_bytes_total = 0
+        self.query_budget_exceeded = 0
+
+    def add(self, status_code: int, latency_ms: float, metrics: RequestMetrics, response_bytes: int, over_budget: bool):
+        self.requests += 1
+        status_class = f"{status_code // 100}xx"
+        self.statuses[status_class] = self.statuses.get(status_class, 0) + 1
+        self.latency_buckets[bisect_left(LATENCY_BUCKETS_MS, latency_ms)] += 1
+        self.latency_ms_total += latency_ms
+        self.latency_ms_max = max(self.latency_ms_max, latency_ms)
+        self.queries_total += metrics.queries
+        self.queries_max = max(self.queries_max, metrics.queries)
+        self.query_ms_total += metrics.query_seconds * 1000
+        self.serializer_ms_total += metrics.serializer_seconds * 1000
+        self.response_bytes_total += response_bytes
+        self.query_budget_exceeded += over_budget
+
+    def _latency_percentile(self, fraction: float) -> float | None:
+        """Estimate a latency percentile as the upper bound of the bucket it falls into."""
+        rank = fraction * self.requests
+        seen = 0
+        for upper_bound, count in zip(LATENCY_BUCKETS_MS, self.latency_buckets, strict=False):
+            seen += count
+            if seen >= rank:
+                return upper_bound
+        return self.latency_ms_max
+
+    def as_dict(self) -> dict[str, Any]:
+        requests = self.requests or 1
+        return {
+            "requests": self.requests,
+            "statuses": self.statuses,
+            "latency_ms": {
+                "mean": round(self.latency_ms_total / requests, 2),
+                "max": round(self.latency_ms_max, 2),
+                "p50": self._latency_percentile(0.5),
+                "p95": self._latency_percentile(0.95),
+                "p99": self._latency_percentile(0.99),
+                # Number of requests by latency bucket upper bound
+                "buckets": {
+                    **{
+                        str(bound): count
+                        for bound, count in zip(LATENCY_BUCKETS_MS, self.latency_buckets, strict=False)
+                    },
+                    "+Inf": self.latency_buckets[-1],
+                },
+            },
+            "queries": {
+                "mean": round(self.queries_total / requests, 2),
+                "max": self.queries_max,
+                "mean_ms": round(self.query_ms_total / requests, 2),
+                "budget_exceeded": self.query_budget_exceeded,
+            },
+            "serializer_ms_mean": round(self.serializer_ms_total / requests, 2),
+            "response_bytes_mean": round(self.response_bytes_total / requests),
+        }
+
+
+class MetricsRegistry:
+    """Thread-safe metrics of every endpoint served by this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints: dict[str, EndpointMetrics] = {}
+        self.started_at = time.time()
+
+    def record(
+        self,
+        endpoint: str,
+        status_code: int,
+        latency_ms: float,
+        metrics: RequestMetrics,
+        response_bytes: int,
+        over_budget: bool = False,
+    ) -> None:
+        with self._lock:
+            endpoint_metrics = self._endpoints.get(endpoint)
+            if endpoint_metrics is None:
+                endpoint_metrics = self._endpoints[endpoint] = EndpointMetrics()
+            endpoint_metrics.add(status_code, latency_ms, metrics, response_bytes, over_budget)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "started_at": self.started_at,
+                "endpoints": {endpoint: metrics.as_dict() for endpoint, metrics in sorted(self._endpoints.items())},
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._endpoints.clear()
+            self.started_at = time.time()
+
+
+registry = MetricsRegistry()
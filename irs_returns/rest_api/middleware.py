@@ -0,0 +1,132 @@
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpRequest, HttpResponseBase
+from django.urls import Resolver404, resolve
+
+from core.db_routers import read_from_replica
+from rest_api.metrics import RequestMetrics, end_request, registry, start_request
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsMiddleware:
+    """
+    Record the latency, database queries, serializer time and response size of every REST API request.
+
+    Requests are grouped by the name of the view they resolved to, such as `rest_api:company-list`. With
+    API_SERVER_TIMING, the measurements are also returned in a `Server-Timing` header that browsers' developer tools
+    display. Requests making more queries than their endpoint's budget in API_QUERY_BUDGETS are logged as warnings.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest):
+        if self.is_async:
+            return self.__acall__(request)
+        if not settings.API_METRICS:
+            return self.get_response(request)
+
+        metrics, token = start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            end_request(token)
+        self._record(request, response, metrics)
+        return response
+
+    async def __acall__(self, request: HttpRequest):
+        if not settings.API_METRICS:
+            return await self.get_response(request)
+
+        metrics, token = start_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            end_request(token)
+        self._record(request, response, metrics)
+        return response
+
+    def _record(self, request: HttpRequest, response: HttpResponseBase, metrics: RequestMetrics) -> None:
+        match = request.resolver_match
+        if match is None or "rest_api" not in match.namespaces:
+            return
+
+        latency_ms = (time.perf_counter() - metrics.start) * 1000
+        endpoint = f"{request.method} {match.view_name}"
+        budget = settings.API_QUERY_BUDGETS.get(match.view_name)
+        over_budget = budget is not None and metrics.queries > budget
+        if over_budget:
+            logger.warning(
+                f"{endpoint} made {metrics.queries} database queries, over its budget of {budget}: {request.path}"
+            )
+
+        if response.streaming:
+            response_bytes = int(response.get("Content-Length") or 0)
+        else:
+            response_bytes = len(response.content)
+        registry.record(endpoint, response.status_code, latency_ms, metrics, response_bytes, over_budget)
+
+        if settings.API_SERVER_TIMING:
+            response["Server-Timing"] = ", ".join(
+                [
+                    f'db;dur={metrics.query_seconds * 1000:.1f};desc="{metrics.queries} queries"',
+                    f"serialize;dur={metrics.serializer_seconds * 1000:.1f}",
+                    f"total;dur={latency_ms:.1f}",
+                ]
+            )
+
+
+class ReplicaReadMiddleware:
+    """
+    Serve the reads of read-only REST API requests from a read replica, see core.db_routers.
+
+    Requests with other methods, and requests to other URLs like the admin and authentication, read from the primary.
+    Views needing to read what was just written can still read from the primary within read_from_primary(), as the
+    dataset jobs do. Streamed responses are iterated after the middleware returned, so they read from the primary.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest):
+        if self.is_async:
+            return self.__acall__(request)
+        if not self._reads_from_replica(request):
+            return self.get_response(request)
+
+        with read_from_replica():
+            return self.get_response(request)
+
+    async def __acall__(self, request: HttpRequest):
+        if not self._reads_from_replica(request):
+            return await self.get_response(request)
+
+        with read_from_replica():
+            return await self.get_response(request)
+
+    def _reads_from_replica(self, request: HttpRequest) -> bool:
+        if not settings.DATABASE_REPLICAS or request.method not in ("GET", "HEAD", "OPTIONS"):
+            return False
+        # The URL is only resolved after the request middleware ran, so it is resolved here to know whether it is part
+        # of the REST API
+        try:
+            match = resolve(request.path_info, getattr(request, "urlconf", None))
+        except Resolver404:
+            return False
+        return "rest_api" in match.namespaces
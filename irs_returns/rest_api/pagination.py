@@ -0,0 +1,37 @@
+from django.core.paginator import InvalidPage
+from django.db.models import QuerySet
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.request import Request
+
+
+class StandardPagination(PageNumberPagination):
+    """Page number pagination with a client-selectable page size."""
+
+    page_size = 25
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    async def apaginate_queryset(self, queryset: QuerySet, request: Request) -> list:
+        """
+        Paginate a queryset like paginate_queryset, counting it and loading the page with the async ORM.
+
+        Used by the async views (see rest_api.async_views), which then build their response envelope with
+        get_paginated_response like the sync viewsets.
+
+        Raises:
+            NotFound: If the page is invalid or does not exist
+        """
+        self.request = request
+        paginator = self.django_paginator_class(queryset, self.get_page_size(request))
+        # Paginator.count is a cached property, which would count synchronously when the page is validated
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(page_number=page_number, message=str(exc))
+            raise NotFound(msg) from exc
+
+        self.page.object_list = [obj async for obj in self.page.object_list]
+        return self.page.object_list
@@ -0,0 +1,51 @@
+from rest_framework import serializers
+
+from organizations.models import Organization, OrganizationReturnInformation
+
+
+class OrganizationChangeSerializer(serializers.ModelSerializer):
+    """Serializer for organizations in the change feed, with their data as stored rather than formatted for display."""
+
+    class Meta:
+        model = Organization
+        fields = [
+            "id",
+            "name",
+            "website_url",
+            "mission_description",
+            "created_at",
+            "updated_at",
+        ]
+
+
+class ReturnChangeSerializer(serializers.ModelSerializer):
+    """Serializer for returns in the change feed."""
+
+    class Meta:
+        model = OrganizationReturnInformation
+        fields = [
+            "id",
+            "organization",
+            "original_file_name",
+            "return_type",
+            "filed_on",
+            "tax_period_start_date",
+            "tax_period_end_date",
+            "employee_count",
+            "py_employee_count",
+            "total_revenue",
+            "py_total_revenue",
+            "total_expenses",
+            "py_total_expenses",
+            "total_assets_eoy",
+            "total_assets_boy",
+            "total_liabilities_eoy",
+            "total_liabilities_boy",
+            "profit_margin",
+            "revenue_growth",
+            "expense_growth",
+            "asset_growth",
+            "liability_ratio",
+            "created_at",
+            "updated_at",
+        ]
@@ -1,12 +1,19 @@
 from rest_framework import serializers
 
-from organizations.models import DatasetJob
+from organizations.models import DatasetArchive, DatasetJob
+from rest_api.metrics import TimedSerializerMixin
 
 
 class DatasetJobCreateSerializer(serializers.Serializer):
     """Serializer for creating a new dataset processing job."""
 
-    zip_url = serializers.URLField(required=True, max_length=2048)
+    zip_url = serializers.URLField(required=False, max_length=2048)
+    zip_urls = serializers.ListField(
+        child=serializers.URLField(max_length=2048), required=False, allow_empty=False, max_length=100
+    )
+    index_url = serializers.URLField(required=False, allow_blank=True, max_length=2048)
+    dry_run = serializers.BooleanField(required=False, default=False)
+    profile_every = serializers.IntegerField(required=False, allow_null=True, min_value=1)
 
     def validate_zip_url(self, value):
         """Validate that the URL points to a ZIP file."""
@@ -16,15 +23,48 @@ class DatasetJobCreateSerializer(serializers.Serializer):
             pass
         return value
 
+    def validate(self, attrs):
+        """Validate that either a single ZIP file or a batch of ZIP files is given."""
+        if ("zip_url" in attrs) == ("zip_urls" in attrs):
+            raise serializers.ValidationError("Provide either zip_url or zip_urls.")
+        return attrs
 
-class DatasetJobSerializer(serializers.ModelSerializer):
+
+class DatasetArchiveSerializer(serializers.ModelSerializer):
+    """Serializer for the status of one of the ZIP files of a batch job."""
+
+    class Meta:
+        model = DatasetArchive
+        fields = [
+            "id",
+            "zip_url",
+            "status",
+            "progress",
+            "total_files",
+            "processed_files",
+            "organizations_created",
+            "returns_created",
+            "error_message",
+        ]
+        read_only_fields = fields
+
+
+class DatasetJobSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for dataset job status and details."""
 
+    archives = DatasetArchiveSerializer(many=True, read_only=True)
+
     class Meta:
         model = DatasetJob
         fields = [
             "id",
             "zip_url",
+            "index_url",
+            "archives",
+            "dry_run",
+            "report",
+            "profile_every",
+            "profile_summary",
             "status",
             "progress",
             "total_files",
@@ -32,11 +72,16 @@ class DatasetJobSerializer(serializers.ModelSerializer):
             "organizations_created",
             "returns_created",
             "error_message",
+            "finished_at",
             "created_at",
             "updated_at",
         ]
         read_only_fields = [
             "id",
+            "archives",
+            "dry_run",
+            "report",
+            "profile_summary",
             "status",
             "progress",
             "total_files",
@@ -44,6 +89,7 @@ class DatasetJobSerializer(serializers.ModelSerializer):
             "organizations_created",
             "returns_created",
             "error_message",
+            "finished_at",
             "created_at",
             "updated_at",
         ]
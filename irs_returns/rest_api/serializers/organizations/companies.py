@@ -2,6 +2,7 @@ from rest_framework import serializers
 
 from organizations.models import Organization, OrganizationReturnInformation
 from rest_api.formatters.common import to_paragraph_case
+from rest_api.metrics import TimedSerializerMixin
 
 
 class OrganizationReturnInformationNestedSerializer(serializers.ModelSerializer):
@@ -27,6 +28,11 @@ class OrganizationReturnInformationNestedSerializer(serializers.ModelSerializer)
             "total_assets_boy",
             "total_liabilities_eoy",
             "total_liabilities_boy",
+            "profit_margin",
+            "revenue_growth",
+            "expense_growth",
+            "asset_growth",
+            "liability_ratio",
         ]
 
     def get_filed_on(self, obj: OrganizationReturnInformation) -> str | None:
@@ -48,7 +54,7 @@ class OrganizationReturnInformationNestedSerializer(serializers.ModelSerializer)
         return obj.tax_period_end_date.isoformat()
 
 
-class CompanySerializer(serializers.ModelSerializer):
+class CompanySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for Organization with nested related OrganizationReturnInformation."""
 
     name = serializers.SerializerMethodField()
@@ -95,3 +101,54 @@ class CompanySerializer(serializers.ModelSerializer):
             return None
 
         return to_paragraph_case(obj.mission_description)
+
+
+class LatestReturnSummarySerializer(serializers.Serializer):
+    """Serializer for the latest return summary denormalized onto Organization."""
+
+    id = serializers.UUIDField(source="latest_return_id", read_only=True)
+    tax_year = serializers.IntegerField(source="latest_tax_year", read_only=True)
+    tax_period_end_date = serializers.DateField(source="latest_tax_period_end_date", read_only=True)
+    filed_on = serializers.DateField(source="latest_filed_on", read_only=True)
+    return_type = serializers.CharField(source="latest_return_type", read_only=True)
+    employee_count = serializers.IntegerField(source="latest_employee_count", read_only=True)
+    py_employee_count = serializers.IntegerField(source="latest_py_employee_count", read_only=True)
+    total_revenue = serializers.DecimalField(
+        source="latest_total_revenue", max_digits=14, decimal_places=2, read_only=True
+    )
+    py_total_revenue = serializers.DecimalField(
+        source="latest_py_total_revenue", max_digits=14, decimal_places=2, read_only=True
+    )
+    total_expenses = serializers.DecimalField(
+        source="latest_total_expenses", max_digits=14, decimal_places=2, read_only=True
+    )
+    py_total_expenses = serializers.DecimalField(
+        source="latest_py_total_expenses", max_digits=14, decimal_places=2, read_only=True
+    )
+    total_assets_eoy = serializers.DecimalField(
+        source="latest_total_assets_eoy", max_digits=14, decimal_places=2, read_only=True
+    )
+    total_assets_boy = serializers.DecimalField(
+        source="latest_total_assets_boy", max_digits=14, decimal_places=2, read_only=True
+    )
+    profit_margin = serializers.FloatField(source="latest_profit_margin", read_only=True)
+    revenue_growth = serializers.FloatField(source="latest_revenue_growth", read_only=True)
+    expense_growth = serializers.FloatField(source="latest_expense_growth", read_only=True)
+    asset_growth = serializers.FloatField(source="latest_asset_growth", read_only=True)
+    liability_ratio = serializers.FloatField(source="latest_liability_ratio", read_only=True)
+
+
+class CompanySummarySerializer(CompanySerializer):
+    """Slim serializer for Organization with only its latest return summary (no nested returns)."""
+
+    latest_return = LatestReturnSummarySerializer(source="*", read_only=True)
+
+    class Meta:
+        model = Organization
+        fields = [
+            "id",
+            "name",
+            "website_url",
+            "mission_description",
+            "latest_return",
+        ]
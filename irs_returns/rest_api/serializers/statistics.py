@@ -0,0 +1,27 @@
+from rest_framework import serializers
+
+from organizations.models import ReturnStatistic
+from rest_api.metrics import TimedSerializerMixin
+
+
+class ReturnStatisticSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Serializer for precomputed return statistics of a (return type, tax year) cohort."""
+
+    class Meta:
+        model = ReturnStatistic
+        fields = [
+            "return_type",
+            "tax_year",
+            "metric",
+            "count",
+            "total",
+            "minimum",
+            "maximum",
+            "mean",
+            "p10",
+            "p25",
+            "median",
+            "p75",
+            "p90",
+            "updated_at",
+        ]
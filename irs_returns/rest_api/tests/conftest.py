@@ -0,0 +1,71 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from rest_framework.test import APIClient
+from rest_framework_api_key.models import APIKey
+
+from organizations.financial_metrics import refresh_derived_metrics
+from organizations.models import Organization, OrganizationReturnInformation
+from organizations.search import update_search_vectors
+from organizations.statistics import refresh_return_statistics
+from organizations.summaries import refresh_latest_returns
+
+# Enough organizations that a query per organization or return goes well over any budget
+SEEDED_WORDS = [
+    f"{color} {animal}" for color in ["Red", "Green", "Blue"] for animal in ["Fox", "Owl", "Elk", "Bee", "Cat"]
+]
+SEEDED_WORDS += [f"Bright {word}" for word in SEEDED_WORDS]
+SEEDED_ORGANIZATIONS = len(SEEDED_WORDS)
+
+RETURN_TYPES = ["990", "990EZ", "990PF"]
+
+
+@pytest.fixture
+def seeded_organizations(db) -> list[Organization]:
+    """
+    Organizations with a return for each of the tax years 2021 to 2023, and the summaries, metrics, search vectors,
+    statistics and percentile indexes a dataset job refreshes.
+    """
+    organizations = Organization.objects.bulk_create(
+        Organization(name=f"Seeded {word} Foundation", mission_description=f"Helping with {word.lower()}")
+        for word in SEEDED_WORDS
+    )
+    OrganizationReturnInformation.objects.bulk_create(
+        OrganizationReturnInformation(
+            organization=organization,
+            return_type=RETURN_TYPES[i % len(RETURN_TYPES)],
+            filed_on=date(tax_year + 1, 5, 15),
+            tax_period_start_date=date(tax_year, 1, 1),
+            tax_period_end_date=date(tax_year, 12, 31),
+            employee_count=i,
+            total_revenue=Decimal(1000 * (i + 1) + tax_year),
+            py_total_revenue=Decimal(1000 * (i + 1)),
+            total_expenses=Decimal(900 * (i + 1)),
+            py_total_expenses=Decimal(800 * (i + 1)),
+            total_assets_eoy=Decimal(5000 * (i + 1)),
+            total_assets_boy=Decimal(4000 * (i + 1)),
+            total_liabilities_eoy=Decimal(100 * i),
+        )
+        for i, organization in enumerate(organizations)
+        for tax_year in [2021, 2022, 2023]
+    )
+    refresh_latest_returns()
+    refresh_derived_metrics()
+    update_search_vectors()
+    refresh_return_statistics()
+    return list(Organization.objects.order_by("name"))
+
+
+@pytest.fixture
+def api_client() -> APIClient:
+    return APIClient()
+
+
+@pytest.fixture
+def api_key_client(db) -> APIClient:
+    """Client authenticated with an API key, as the dataset and change feed endpoints require."""
+    _, key = APIKey.objects.create_key(name="tests")
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Api-Key {key}")
+    return client
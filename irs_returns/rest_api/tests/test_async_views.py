@@ -0,0 +1,72 @@
+"""
+The async views give the same responses as the sync DRF viewsets they mirror.
+
+The async views are only routed under ASGI with ASYNC_READ_API, so they are called directly here, and compared with
+the responses of the sync viewsets to the same URL.
+"""
+
+from asgiref.sync import async_to_sync
+from django.test import RequestFactory
+from django.urls import reverse
+import pytest
+
+from rest_api import async_views
+
+pytestmark = pytest.mark.django_db
+
+PAGE_PARAMS = [
+    {},
+    {"page": "2", "page_size": "7"},
+    {"page": "last", "page_size": "7"},
+    {"page": "0"},
+    {"page": "abc"},
+    {"page": "999"},
+    {"page": "2.0"},
+    {"page_size": "0"},
+    {"page_size": "1000"},
+    {"ordering": "-latest_total_revenue", "page_size": "5"},
+]
+
+
+def _compare(api_client, view, url, params):
+    sync_response = api_client.get(url, params)
+    async_response = async_to_sync(view)(RequestFactory().get(url, params))
+
+    assert async_response.status_code == sync_response.status_code
+    assert async_response.content == sync_response.content
+    return async_response
+
+
+@pytest.mark.parametrize("params", PAGE_PARAMS)
+def test_summary_matches_sync_viewset(api_client, seeded_organizations, params):
+    _compare(api_client, async_views.company_summary, reverse("rest_api:company-summary"), params)
+
+
+@pytest.mark.parametrize("params", PAGE_PARAMS)
+def test_search_matches_sync_viewset(api_client, seeded_organizations, params):
+    _compare(api_client, async_views.company_search, reverse("rest_api:company-search"), {"q": "seeded", **params})
+
+
+def test_invalid_page_is_not_found(api_client, seeded_organizations):
+    response = _compare(api_client, async_views.company_summary, reverse("rest_api:company-summary"), {"page": "0"})
+
+    assert response.status_code == 404
+
+
+def test_list_detail_and_statistics_match_sync_viewsets(api_client, seeded_organizations):
+    organization = seeded_organizations[0]
+    _compare(api_client, async_views.company_list, reverse("rest_api:company-list"), {"ordering": "-latest_tax_year"})
+    _compare(api_client, async_views.statistics_list, reverse("rest_api:stats-list"), {"tax_year": "2023"})
+
+    url = reverse("rest_api:company-detail", args=[organization.id])
+    sync_response = api_client.get(url)
+    async_response = async_to_sync(async_views.company_detail)(RequestFactory().get(url), id=organization.id)
+    assert async_response.content == sync_response.content
+
+
+@pytest.mark.parametrize("params", [{"min_profit_margin": "abc"}, {"max_asset_growth": "nan", "tax_year": "-1"}])
+def test_invalid_filters_match_sync_viewset(api_client, seeded_organizations, params):
+    response = _compare(api_client, async_views.company_summary, reverse("rest_api:company-summary"), params)
+    _compare(api_client, async_views.company_list, reverse("rest_api:company-list"), params)
+
+    assert response.status_code == 400
@@ -0,0 +1,69 @@
+from datetime import date
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+import pytest
+
+from organizations.tests.conftest import make_return
+from rest_api.tests.conftest import SEEDED_ORGANIZATIONS
+
+pytestmark = pytest.mark.django_db
+
+
+def _names(companies):
+    return {company["name"] for company in companies}
+
+
+def test_tax_year_keeps_companies_with_a_return_for_that_year(api_client, seeded_organizations):
+    missing_year = seeded_organizations[0]
+    missing_year.returns.filter(tax_period_end_date__year=2021).delete()
+    # A fiscal year ending in June is in the tax year it ends in, and a second return does not list a company twice
+    make_return(seeded_organizations[1], 2024, tax_period_end_date=date(2024, 6, 30))
+    make_return(seeded_organizations[1], 2024, filed_on=date(2025, 2, 1))
+
+    response = api_client.get(reverse("rest_api:company-summary"), {"tax_year": "2021", "page_size": 100})
+    assert response.json()["count"] == SEEDED_ORGANIZATIONS - 1
+    assert missing_year.name not in _names(response.json()["results"])
+
+    response = api_client.get(reverse("rest_api:company-list"), {"tax_year": "2024"})
+    assert _names(response.json()) == {seeded_organizations[1].name}
+
+
+def test_tax_year_filters_on_a_range_of_tax_period_end_dates(api_client, seeded_organizations):
+    with CaptureQueriesContext(connection) as queries:
+        api_client.get(reverse("rest_api:company-summary"), {"tax_year": "2023"})
+
+    sql = queries.captured_queries[0]["sql"]
+    assert '"tax_period_end_date" >= ' in sql
+    assert '"tax_period_end_date" < ' in sql
+
+
+def test_blank_filters_are_ignored(api_client, seeded_organizations):
+    response = api_client.get(reverse("rest_api:company-summary"), {"tax_year": "", "min_profit_margin": ""})
+
+    assert response.json()["count"] == SEEDED_ORGANIZATIONS
+
+
+@pytest.mark.parametrize(
+    ("params", "errors"),
+    [
+        ({"tax_year": "abc"}, {"tax_year": ["A valid integer is required."]}),
+        ({"tax_year": "0"}, {"tax_year": ["Ensure this value is greater than or equal to 1."]}),
+        ({"min_profit_margin": "abc"}, {"min_profit_margin": ["A valid number is required."]}),
+        ({"max_revenue_growth": "nan"}, {"max_revenue_growth": ["A valid number is required."]}),
+        (
+            {"min_asset_growth": "inf", "max_liability_ratio": "-Infinity", "min_profit_margin": "0.1"},
+            {
+                "min_asset_growth": ["A valid number is required."],
+                "max_liability_ratio": ["A valid number is required."],
+            },
+        ),
+    ],
+)
+@pytest.mark.parametrize("view_name", ["company-summary", "company-list"])
+def test_invalid_filters_are_rejected(api_client, seeded_organizations, view_name, params, errors):
+    response = api_client.get(reverse(f"rest_api:{view_name}"), params)
+
+    assert response.status_code == 400
+    assert response.json() == errors
@@ -0,0 +1,42 @@
+from decimal import Decimal
+
+from django.urls import reverse
+import pytest
+
+from organizations.models import Organization
+from rest_api.tests.conftest import SEEDED_ORGANIZATIONS
+
+pytestmark = pytest.mark.django_db
+
+
+def test_summary_lists_only_companies_with_returns(api_client, seeded_organizations):
+    Organization.objects.create(name="No Returns Foundation")
+
+    response = api_client.get(reverse("rest_api:company-summary"), {"page_size": 100})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["count"] == SEEDED_ORGANIZATIONS
+    assert "No Returns Foundation" not in [company["name"] for company in body["results"]]
+
+
+def test_summary_has_latest_return_and_no_nested_returns(api_client, seeded_organizations):
+    organization = seeded_organizations[0]
+    latest_return = organization.returns.order_by("-tax_period_end_date").first()
+
+    response = api_client.get(reverse("rest_api:company-summary"))
+
+    company = response.json()["results"][0]
+    assert company["id"] == str(organization.id)
+    assert "returns" not in company
+    assert company["latest_return"]["id"] == str(latest_return.id)
+    assert company["latest_return"]["tax_year"] == 2023
+    assert company["latest_return"]["return_type"] == latest_return.return_type
+    assert Decimal(company["latest_return"]["total_revenue"]) == latest_return.total_revenue
+
+
+def test_summary_ordering(api_client, seeded_organizations):
+    response = api_client.get(reverse("rest_api:company-summary"), {"ordering": "-latest_total_revenue"})
+
+    revenues = [Decimal(company["latest_return"]["total_revenue"]) for company in response.json()["results"]]
+    assert revenues == sorted(revenues, reverse=True)
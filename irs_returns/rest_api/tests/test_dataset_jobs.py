@@ -0,0 +1,82 @@
+from django.core.files.base import ContentFile
+from django.urls import reverse
+import pytest
+
+from organizations.models import DatasetJob
+from rest_api.viewsets import dataset
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def no_task(monkeypatch):
+    """Keep the jobs created through the API from being enqueued."""
+    monkeypatch.setattr(dataset.process_dataset_task, "delay", lambda job_id: None)
+
+
+def test_create_dry_run_job(api_key_client):
+    response = api_key_client.post(
+        reverse("rest_api:dataset-list"), {"zip_url": "https://example.com/dataset.zip", "dry_run": True}, format="json"
+    )
+
+    assert response.status_code == 201
+    assert response.json()["dry_run"] is True
+    assert response.json()["report"] is None
+    assert DatasetJob.objects.get().dry_run
+
+
+def test_jobs_are_not_dry_runs_by_default(api_key_client):
+    response = api_key_client.post(
+        reverse("rest_api:dataset-list"), {"zip_url": "https://example.com/dataset.zip"}, format="json"
+    )
+
+    assert response.json()["dry_run"] is False
+
+
+def test_create_profiled_job(api_key_client):
+    response = api_key_client.post(
+        reverse("rest_api:dataset-list"), {"zip_url": "https://example.com/dataset.zip", "profile_every": 10}
+    )
+
+    assert response.status_code == 201
+    assert response.json()["profile_every"] == 10
+    assert DatasetJob.objects.get().profile_every == 10
+
+
+def test_profile_every_must_be_positive(api_key_client):
+    response = api_key_client.post(
+        reverse("rest_api:dataset-list"), {"zip_url": "https://example.com/dataset.zip", "profile_every": 0}
+    )
+
+    assert response.status_code == 400
+    assert "profile_every" in response.json()
+
+
+def test_download_profile(api_key_client, settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    job = DatasetJob.objects.create(zip_url="https://example.com/dataset.zip", profile_every=1)
+    job.profile_file.save(f"{job.id}.prof", ContentFile(b"profile"))
+
+    response = api_key_client.get(reverse("rest_api:dataset-profile", kwargs={"id": job.id}))
+
+    assert response.status_code == 200
+    assert response["Content-Disposition"] == f'attachment; filename="dataset-job-{job.id}.prof"'
+    assert b"".join(response.streaming_content) == b"profile"
+
+
+def test_job_without_profile_has_no_profile_to_download(api_key_client):
+    job = DatasetJob.objects.create(zip_url="https://example.com/dataset.zip")
+
+    response = api_key_client.get(reverse("rest_api:dataset-profile", kwargs={"id": job.id}))
+
+    assert response.status_code == 404
+
+
+def test_reextraction_runs_are_not_listed(api_key_client):
+    job = DatasetJob.objects.create(zip_url="https://example.com/dataset.zip")
+    reextraction = DatasetJob.objects.create(status=DatasetJob.Status.PROCESSING, reextraction=True)
+
+    response = api_key_client.get(reverse("rest_api:dataset-list"))
+
+    assert [listed["id"] for listed in response.json()] == [str(job.id)]
+    assert api_key_client.get(reverse("rest_api:dataset-detail", args=[reextraction.id])).status_code == 404
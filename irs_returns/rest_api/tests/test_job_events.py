@@ -0,0 +1,131 @@
+"""
+Server-sent events of dataset job progress, through the in-process broker of the test settings.
+
+The streams close their database connection while they wait, so these tests are transactional, and progress is only
+published once a save is committed.
+"""
+
+import json
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.test import AsyncClient
+from django.urls import reverse
+import pytest
+from rest_framework_api_key.models import APIKey
+
+from organizations.models import DatasetArchive, DatasetJob
+from organizations.progress import InProcessBroker, get_broker
+from rest_api import event_stream
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture(autouse=True)
+def in_process_broker():
+    assert isinstance(get_broker(), InProcessBroker)
+
+
+@pytest.fixture
+def job():
+    job = DatasetJob.objects.create(status=DatasetJob.Status.DOWNLOADING)
+    DatasetArchive.objects.create(job=job, zip_url="https://example.com/dataset.zip")
+    return job
+
+
+def _parse(frame: bytes) -> tuple[str, dict]:
+    """Parse an `event:` and `data:` frame."""
+    event_line, data_line, *rest = frame.decode().split("\n")
+    assert event_line.startswith("event: ")
+    assert data_line.startswith("data: ")
+    assert rest == ["", ""]
+    return event_line.removeprefix("event: "), json.loads(data_line.removeprefix("data: "))
+
+
+def _save(job, **fields):
+    for name, value in fields.items():
+        setattr(job, name, value)
+    job.save(update_fields=list(fields))
+
+
+def _url(job):
+    return reverse("rest_api:dataset-events", kwargs={"id": job.id})
+
+
+def test_wsgi_stream_relays_progress_until_job_finishes(api_key_client, job):
+    response = api_key_client.get(_url(job))
+
+    assert response.status_code == 200
+    assert response["Content-Type"] == "text/event-stream"
+    assert response["Cache-Control"] == "no-cache"
+    assert not response.is_async
+    events = iter(response.streaming_content)
+    event, data = _parse(next(events))
+    assert (event, data["id"], data["status"]) == ("job", str(job.id), "DOWNLOADING")
+    event, data = _parse(next(events))
+    assert (event, data["job"], data["status"]) == ("archive", str(job.id), "PENDING")
+
+    _save(job, status=DatasetJob.Status.PROCESSING, progress=40)
+    event, data = _parse(next(events))
+    assert (event, data["status"], data["progress"]) == ("job", "PROCESSING", 40)
+
+    archive = job.archives.get()
+    _save(archive, status=DatasetJob.Status.COMPLETED, processed_files=3)
+    event, data = _parse(next(events))
+    assert (event, data["id"], data["processed_files"]) == ("archive", str(archive.id), 3)
+
+    _save(job, status=DatasetJob.Status.COMPLETED, progress=100)
+    event, data = _parse(next(events))
+    assert (event, data["status"]) == ("job", "COMPLETED")
+    # The stream ends with the job
+    assert next(events, None) is None
+
+
+def test_wsgi_stream_sends_heartbeats_while_idle(api_key_client, job, monkeypatch):
+    monkeypatch.setattr(event_stream, "HEARTBEAT_SECONDS", 0.01)
+    events = iter(api_key_client.get(_url(job)).streaming_content)
+    next(events), next(events)
+
+    assert next(events) == b": keep-alive\n\n"
+
+
+def test_stream_of_finished_job_only_has_its_state(api_key_client, job):
+    _save(job, status=DatasetJob.Status.FAILED, error_message="Invalid ZIP file")
+
+    frames = list(api_key_client.get(_url(job)).streaming_content)
+
+    assert [_parse(frame)[0] for frame in frames] == ["job", "archive"]
+    assert _parse(frames[0])[1]["error_message"] == "Invalid ZIP file"
+
+
+def test_stream_of_unknown_job_is_not_found(api_key_client):
+    url = reverse("rest_api:dataset-events", kwargs={"id": "00000000-0000-0000-0000-000000000000"})
+
+    assert api_key_client.get(url).status_code == 404
+
+
+def test_asgi_stream_relays_progress_until_job_finishes(job):
+    _, key = APIKey.objects.create_key(name="tests")
+
+    async def watch():
+        response = await AsyncClient().get(_url(job), headers={"Authorization": f"Api-Key {key}"})
+        assert response.status_code == 200
+        assert response.is_async
+        events = aiter(response.streaming_content)
+        frames = [await anext(events), await anext(events)]
+
+        await sync_to_async(_save)(job, status=DatasetJob.Status.PROCESSING, progress=40)
+        frames.append(await anext(events))
+        await sync_to_async(_save)(job, status=DatasetJob.Status.COMPLETED, progress=100)
+        frames.append(await anext(events))
+        frames.append(await anext(events, None))
+        return frames
+
+    *frames, end = async_to_sync(watch)()
+
+    assert [(_parse(frame)[0], _parse(frame)[1]["status"]) for frame in frames] == [
+        ("job", "DOWNLOADING"),
+        ("archive", "PENDING"),
+        ("job", "PROCESSING"),
+        ("job", "COMPLETED"),
+    ]
+    assert end is None
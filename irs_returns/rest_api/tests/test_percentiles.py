@@ -0,0 +1,62 @@
+from decimal import Decimal
+
+from django.urls import reverse
+import numpy as np
+import pytest
+
+from organizations.rankings import get_percentile_ranks, percentile_rank, save_percentile_index
+from organizations.tests.conftest import make_return
+from rest_api.tests.conftest import SEEDED_WORDS
+
+VALUES = np.array([10, 20, 20, 20, 30, 40], dtype=np.float64)
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        # Each tie counts half below, so equal values get the same rank
+        (20, 100 * (1 + 3 / 2) / 6),
+        (10, 100 * (1 / 2) / 6),
+        (25, 100 * 4 / 6),
+        (40, 100 * (5 + 1 / 2) / 6),
+        # Values out of the cohort's range rank below or above all of it
+        (5, 0),
+        (-1e12, 0),
+        (50, 100),
+        (1e12, 100),
+    ],
+)
+def test_percentile_rank(value, expected):
+    assert percentile_rank(VALUES, value) == pytest.approx(expected)
+
+
+def test_percentile_rank_of_single_value():
+    assert percentile_rank(np.array([7.0]), 7) == 50
+
+
+@pytest.mark.django_db
+@pytest.mark.filterwarnings("error")
+def test_cohort_with_empty_index_is_not_ranked(seeded_organizations):
+    ret = make_return(seeded_organizations[0], 2030, total_revenue=Decimal(100))
+    save_percentile_index(ret.return_type, 2030, "total_revenue", [])
+
+    (rank,) = get_percentile_ranks([ret])
+
+    assert rank["metrics"]["total_revenue"] == {"value": Decimal(100), "percentile": None, "cohort_size": 0}
+    # Metrics without an index at all are not ranked either
+    assert rank["metrics"]["total_expenses"] == {"value": None, "percentile": None, "cohort_size": 0}
+
+
+@pytest.mark.django_db
+def test_percentiles_endpoint(api_client, seeded_organizations):
+    # Seeded returns have increasing revenue in the order of SEEDED_WORDS, and every third one is of the same type
+    last = next(org for org in seeded_organizations if org.name == f"Seeded {SEEDED_WORDS[-1]} Foundation")
+
+    response = api_client.get(reverse("rest_api:company-percentiles", args=[last.id]), {"tax_year": "2023"})
+
+    assert response.status_code == 200
+    (rank,) = response.json()["returns"]
+    assert rank["tax_year"] == 2023
+    total_revenue = rank["metrics"]["total_revenue"]
+    assert total_revenue["cohort_size"] == len(SEEDED_WORDS) // 3
+    assert total_revenue["percentile"] == round(100 * (len(SEEDED_WORDS) // 3 - 1 / 2) / (len(SEEDED_WORDS) // 3), 1)
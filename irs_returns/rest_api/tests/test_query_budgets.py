@@ -0,0 +1,88 @@
+"""
+Query budgets of the REST API endpoints, so that N+1 queries fail the tests rather than only logging warnings.
+
+Each endpoint is requested against seeded organizations and must stay within its budget in API_QUERY_BUDGETS, which
+is also what MetricsMiddleware warns about in production.
+"""
+
+from django.conf import settings
+from django.urls import reverse
+import pytest
+
+from organizations.models import DatasetJob
+from rest_api.tests.conftest import SEEDED_ORGANIZATIONS
+
+
+def _assert_within_budget(django_assert_max_num_queries, client, view_name: str, url: str) -> dict | list:
+    with django_assert_max_num_queries(settings.API_QUERY_BUDGETS[view_name]):
+        response = client.get(url)
+    assert response.status_code == 200, response.content
+    return response.json()
+
+
+def test_company_list(django_assert_max_num_queries, api_client, seeded_organizations):
+    data = _assert_within_budget(
+        django_assert_max_num_queries, api_client, "rest_api:company-list", reverse("rest_api:company-list")
+    )
+    assert len(data) == SEEDED_ORGANIZATIONS
+    assert all(len(company["returns"]) == 3 for company in data)
+
+
+def test_company_summary(django_assert_max_num_queries, api_client, seeded_organizations):
+    url = f"{reverse('rest_api:company-summary')}?page_size=100&ordering=-latest_total_revenue"
+    data = _assert_within_budget(django_assert_max_num_queries, api_client, "rest_api:company-summary", url)
+    assert data["count"] == SEEDED_ORGANIZATIONS
+    assert len(data["results"]) == SEEDED_ORGANIZATIONS
+
+
+def test_company_search(django_assert_max_num_queries, api_client, seeded_organizations):
+    company = seeded_organizations[0]
+    url = f"{reverse('rest_api:company-search')}?q={company.name.split()[0]}&page_size=100"
+    data = _assert_within_budget(django_assert_max_num_queries, api_client, "rest_api:company-search", url)
+    assert str(company.pk) in [result["id"] for result in data["results"]]
+
+
+def test_company_detail(django_assert_max_num_queries, api_client, seeded_organizations):
+    company = seeded_organizations[0]
+    url = reverse("rest_api:company-detail", kwargs={"pk": company.pk})
+    data = _assert_within_budget(django_assert_max_num_queries, api_client, "rest_api:company-detail", url)
+    assert data["id"] == str(company.pk)
+    assert len(data["returns"]) == 3
+
+
+def test_company_percentiles(django_assert_max_num_queries, api_client, seeded_organizations):
+    company = seeded_organizations[0]
+    url = reverse("rest_api:company-percentiles", kwargs={"pk": company.pk})
+    data = _assert_within_budget(django_assert_max_num_queries, api_client, "rest_api:company-percentiles", url)
+    assert len(data["returns"]) == 3
+
+
+def test_statistics(django_assert_max_num_queries, api_client, seeded_organizations):
+    data = _assert_within_budget(
+        django_assert_max_num_queries, api_client, "rest_api:stats-list", reverse("rest_api:stats-list")
+    )
+    assert data
+
+
+@pytest.mark.parametrize("kind", ["organizations", "returns"])
+def test_changes(django_assert_max_num_queries, api_key_client, seeded_organizations, kind):
+    url = f"{reverse('rest_api:changes-list')}?kind={kind}&page_size=500"
+    data = _assert_within_budget(django_assert_max_num_queries, api_key_client, "rest_api:changes-list", url)
+    expected = SEEDED_ORGANIZATIONS if kind == "organizations" else SEEDED_ORGANIZATIONS * 3
+    assert len(data["results"]) == expected
+
+
+def test_dataset_list(django_assert_max_num_queries, api_key_client):
+    for _ in range(5):
+        DatasetJob.objects.create(zip_url="https://example.com/dataset.zip")
+    data = _assert_within_budget(
+        django_assert_max_num_queries, api_key_client, "rest_api:dataset-list", reverse("rest_api:dataset-list")
+    )
+    assert len(data) == 5
+
+
+def test_dataset_detail(django_assert_max_num_queries, api_key_client):
+    job = DatasetJob.objects.create(zip_url="https://example.com/dataset.zip")
+    url = reverse("rest_api:dataset-detail", kwargs={"id": job.id})
+    data = _assert_within_budget(django_assert_max_num_queries, api_key_client, "rest_api:dataset-detail", url)
+    assert data["id"] == str(job.id)
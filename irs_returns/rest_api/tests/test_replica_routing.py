@@ -0,0 +1,101 @@
+"""
+Routing of the REST API's queries between the primary and a replica.
+
+The test settings define replica_0 as a mirror of the default test database, and these tests make it a replica with
+DATABASE_REPLICAS. A mirror has a connection of its own, so it only sees committed rows, hence transactional tests.
+"""
+
+from contextlib import contextmanager
+
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+import pytest
+
+from organizations.models import DatasetJob
+from rest_api.viewsets import dataset
+
+pytestmark = pytest.mark.django_db(transaction=True, databases=["default", "replica_0"])
+
+
+@pytest.fixture(autouse=True)
+def replica(settings):
+    settings.DATABASE_REPLICAS = ["replica_0"]
+
+
+@contextmanager
+def capture_queries():
+    """Capture the queries sent to the primary and to the replica."""
+    with (
+        CaptureQueriesContext(connections["default"]) as primary,
+        CaptureQueriesContext(connections["replica_0"]) as replica,
+    ):
+        yield primary, replica
+
+
+@pytest.mark.parametrize("view_name", ["company-list", "company-summary", "stats-list"])
+def test_api_reads_go_to_replica(api_client, seeded_organizations, view_name):
+    with capture_queries() as (primary, replica):
+        response = api_client.get(reverse(f"rest_api:{view_name}"))
+
+    assert response.status_code == 200
+    assert len(replica) > 0
+    assert len(primary) == 0
+
+
+def test_company_detail_reads_go_to_replica(api_client, seeded_organizations):
+    with capture_queries() as (primary, replica):
+        response = api_client.get(reverse("rest_api:company-detail", args=[seeded_organizations[0].id]))
+
+    assert response.status_code == 200
+    assert response.json()["name"] == seeded_organizations[0].name
+    assert len(replica) > 0
+    assert len(primary) == 0
+
+
+def test_dataset_job_creation_goes_to_primary(api_key_client, monkeypatch):
+    monkeypatch.setattr(dataset.process_dataset_task, "delay", lambda job_id: None)
+
+    with capture_queries() as (primary, replica):
+        response = api_key_client.post(
+            reverse("rest_api:dataset-list"), {"zip_url": "https://example.com/data.zip"}, format="json"
+        )
+
+    assert response.status_code == 201
+    assert DatasetJob.objects.filter(id=response.json()["id"]).exists()
+    assert len(primary) > 0
+    assert len(replica) == 0
+
+
+@pytest.mark.parametrize("detail", [False, True])
+def test_dataset_reads_go_to_primary(api_key_client, detail):
+    job = DatasetJob.objects.create(zip_url="https://example.com/data.zip")
+    url = reverse("rest_api:dataset-detail", args=[job.id]) if detail else reverse("rest_api:dataset-list")
+
+    with capture_queries() as (primary, replica):
+        response = api_key_client.get(url)
+
+    assert response.status_code == 200
+    assert len(primary) > 0
+    assert len(replica) == 0
+
+
+def test_change_feed_reads_go_to_primary(api_key_client, seeded_organizations):
+    with capture_queries() as (primary, replica):
+        response = api_key_client.get(reverse("rest_api:changes-list"), {"kind": "returns"})
+
+    assert response.status_code == 200
+    assert response.json()["results"]
+    assert len(primary) > 0
+    assert len(replica) == 0
+
+
+def test_reads_go_to_primary_without_replicas(settings, api_client, seeded_organizations):
+    settings.DATABASE_REPLICAS = []
+
+    with capture_queries() as (primary, replica):
+        response = api_client.get(reverse("rest_api:company-summary"))
+
+    assert response.status_code == 200
+    assert len(primary) > 0
+    assert len(replica) == 0
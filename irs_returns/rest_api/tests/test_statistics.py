@@ -0,0 +1,25 @@
+from django.urls import reverse
+import pytest
+
+from rest_api.tests.conftest import RETURN_TYPES, SEEDED_ORGANIZATIONS
+
+
+@pytest.mark.django_db
+def test_statistics_are_filtered_by_cohort_and_metric(api_client, seeded_organizations):
+    response = api_client.get(
+        reverse("rest_api:stats-list"), {"return_type": "990", "tax_year": "2023", "metric": "total_revenue"}
+    )
+
+    assert response.status_code == 200
+    [statistic] = response.json()
+    assert (statistic["return_type"], statistic["tax_year"], statistic["metric"]) == ("990", 2023, "total_revenue")
+    assert statistic["count"] == SEEDED_ORGANIZATIONS // len(RETURN_TYPES)
+
+
+@pytest.mark.django_db
+def test_statistics_ignore_invalid_tax_year(api_client, seeded_organizations):
+    response = api_client.get(reverse("rest_api:stats-list"), {"tax_year": "latest", "metric": "total_revenue"})
+
+    assert response.status_code == 200
+    # A cohort for each return type and seeded tax year
+    assert len(response.json()) == len(RETURN_TYPES) * 3
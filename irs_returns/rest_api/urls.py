@@ -1,12 +1,31 @@
+from django.conf import settings
+from django.urls import path
 from rest_framework.routers import DefaultRouter
 
+from rest_api import async_views
+from rest_api.viewsets.changes import ChangeFeedViewSet
 from rest_api.viewsets.dataset import DatasetViewSet
+from rest_api.viewsets.metrics import MetricsViewSet
 from rest_api.viewsets.organizations.companies import CompanyViewSet
+from rest_api.viewsets.statistics import StatisticsViewSet
 
 app_name = "rest_api"
 
 router = DefaultRouter()
 router.register(r"companies", CompanyViewSet, basename="company")
 router.register(r"dataset", DatasetViewSet, basename="dataset")
+router.register(r"stats", StatisticsViewSet, basename="stats")
+router.register(r"metrics", MetricsViewSet, basename="metrics")
+router.register(r"changes", ChangeFeedViewSet, basename="changes")
 
 urlpatterns = router.urls
+
+if settings.ASYNC_READ_API:
+    # Async views take precedence over the sync viewsets for the public read endpoints
+    urlpatterns = [
+        path("companies/", async_views.company_list, name="company-list"),
+        path("companies/summary/", async_views.company_summary, name="company-summary"),
+        path("companies/search/", async_views.company_search, name="company-search"),
+        path("companies/<uuid:id>/", async_views.company_detail, name="company-detail"),
+        path("stats/", async_views.statistics_list, name="stats-list"),
+    ] + urlpatterns
@@ -0,0 +1,94 @@
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from rest_framework import status, viewsets
+from rest_framework.response import Response
+from rest_framework_api_key.permissions import HasAPIKey
+
+from core.db_routers import read_from_primary
+from organizations.changes import CHANGE_FEED_KINDS, ChangeCursor, get_changes
+from organizations.models import DatasetJob
+from rest_api.serializers.changes import OrganizationChangeSerializer, ReturnChangeSerializer
+
+CHANGE_SERIALIZERS = {
+    "organizations": OrganizationChangeSerializer,
+    "returns": ReturnChangeSerializer,
+}
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+class ChangeFeedViewSet(viewsets.ViewSet):
+    """
+    ViewSet for the change feed of organizations and returns, for syncing a copy of the data incrementally.
+
+    Start from the beginning, from a dataset job (`since_job`) or from a time (`since`), then pass the `next_cursor` of
+    each page back as `cursor` until `has_more` is false. Keep the last `next_cursor` for the next sync.
+
+    GET /api/changes/?kind=returns&since_job=<job id>&page_size=500
+    GET /api/changes/?kind=returns&cursor=<next_cursor>
+    """
+
+    permission_classes = [HasAPIKey]
+
+    def dispatch(self, request, *args, **kwargs):
+        # A page read from a lagging replica would miss changes committed before the end of the feed, which the next
+        # cursor would then skip for good. Getting the end of the feed also fails stale jobs, which is a write.
+        with read_from_primary():
+            return super().dispatch(request, *args, **kwargs)
+
+    def list(self, request):
+        kind = request.query_params.get("kind", "organizations")
+        if kind not in CHANGE_FEED_KINDS:
+            return Response(
+                {"kind": [f"Must be one of: {', '.join(CHANGE_FEED_KINDS)}."]}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            cursor = self._get_cursor(request.query_params)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        page_size = request.query_params.get("page_size", "")
+        page_size = min(int(page_size), MAX_PAGE_SIZE) if page_size.isdigit() and int(page_size) else DEFAULT_PAGE_SIZE
+
+        page = get_changes(kind, cursor, page_size)
+        upserts = [change.instance for change in page.changes if not change.deleted]
+        data = iter(CHANGE_SERIALIZERS[kind](upserts, many=True).data)
+        results = [
+            {"op": "delete", "id": change.instance.object_id, "changed_at": change.cursor.changed_at}
+            if change.deleted
+            else {"op": "upsert", "id": change.instance.id, "changed_at": change.cursor.changed_at, "data": next(data)}
+            for change in page.changes
+        ]
+
+        return Response(
+            {
+                "kind": kind,
+                "until": page.until,
+                "has_more": page.has_more,
+                "next_cursor": page.next_cursor.encode() if page.next_cursor else None,
+                "results": results,
+            }
+        )
+
+    def _get_cursor(self, query_params) -> ChangeCursor | None:
+        """Get the starting position from the `cursor`, `since_job` or `since` query params."""
+        if query_params.get("cursor"):
+            return ChangeCursor.decode(query_params["cursor"])
+
+        if query_params.get("since_job"):
+            try:
+                job = DatasetJob.objects.only("created_at").get(id=query_params["since_job"])
+            except (DatasetJob.DoesNotExist, ValidationError) as e:
+                raise ValueError(f"Unknown dataset job: {query_params['since_job']}") from e
+            return ChangeCursor.since(job.created_at)
+
+        if query_params.get("since"):
+            since = datetime.fromisoformat(query_params["since"])
+            if since.tzinfo is None:
+                raise ValueError("since must include a time zone, e.g. 2026-01-01T00:00:00Z")
+            return ChangeCursor.since(since)
+
+        return None
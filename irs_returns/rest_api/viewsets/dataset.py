@@ -1,26 +1,45 @@
+from django.db import transaction
+from django.http import FileResponse, Http404, StreamingHttpResponse
 from rest_framework import serializers, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework_api_key.permissions import HasAPIKey
 
-from organizations.models import DatasetJob
+from core.db_routers import read_from_primary
+from organizations.models import DatasetArchive, DatasetJob
 from organizations.tasks import process_dataset_task
+from rest_api.event_stream import EventStreamRenderer, ajob_event_stream, is_asgi_request, job_event_stream
 from rest_api.serializers.dataset import DatasetJobCreateSerializer, DatasetJobSerializer
 
 
 class DatasetViewSet(viewsets.ModelViewSet):
     """ViewSet for dataset processing jobs."""
 
-    queryset = DatasetJob.objects.all()
+    # The jobs registered by reextract_filings only hold back the change feed, and are not dataset jobs
+    queryset = DatasetJob.objects.filter(reextraction=False).prefetch_related("archives")
     serializer_class = DatasetJobSerializer
     permission_classes = [HasAPIKey]
     lookup_field = "id"
 
+    def dispatch(self, request, *args, **kwargs):
+        # Jobs are polled right after being created and while the workers update their progress, which replicas would
+        # only show after their lag, so they are always read from the primary
+        with read_from_primary():
+            return super().dispatch(request, *args, **kwargs)
+
     def create(self, request, *args, **kwargs):
         """
         Create a new dataset processing job.
 
         POST /api/dataset/
-        Body: {"zip_url": "https://example.com/data.zip"}
+        Body: {"zip_url": "https://example.com/data.zip", "index_url": "https://example.com/index.csv"}
+
+        index_url is optional. When given, only the filings listed in that IRS filing index which were not ingested yet
+        are parsed. To process several ZIP files in one job, give their URLs as "zip_urls" instead of "zip_url". With
+        "dry_run": true, the files are only parsed and the job's report describes the results, without saving them.
+        With "profile_every": N, every Nth file is profiled, see the profile action.
         """
         create_serializer = DatasetJobCreateSerializer(data=request.data)
         try:
@@ -28,15 +47,57 @@ class DatasetViewSet(viewsets.ModelViewSet):
         except serializers.ValidationError as e:
             return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
 
-        # Create the job
-        job = DatasetJob.objects.create(
-            zip_url=create_serializer.validated_data["zip_url"],
-            status=DatasetJob.Status.PENDING,
-        )
+        # Create the job, with one archive per ZIP file of a batch job
+        with transaction.atomic():
+            job = DatasetJob.objects.create(
+                zip_url=create_serializer.validated_data.get("zip_url", ""),
+                index_url=create_serializer.validated_data.get("index_url", ""),
+                dry_run=create_serializer.validated_data["dry_run"],
+                profile_every=create_serializer.validated_data.get("profile_every"),
+                status=DatasetJob.Status.PENDING,
+            )
+            for zip_url in create_serializer.validated_data.get("zip_urls", []):
+                DatasetArchive.objects.create(job=job, zip_url=zip_url)
 
         # Enqueue the Celery task
         process_dataset_task.delay(str(job.id))
 
         # Return the job details
-        serializer = self.get_serializer(job)
+        serializer = self.get_serializer(DatasetJob.objects.prefetch_related("archives").get(id=job.id))
         return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=["get"])
+    def profile(self, request, *args, **kwargs):
+        """
+        Download the cProfile output of a job that was created with profile_every.
+
+        GET /api/dataset/<id>/profile/
+
+        The file can be read with `python -m pstats <file>` or visualized with tools such as snakeviz. The job's
+        profile_summary lists the functions that took the most time.
+        """
+        job = self.get_object()
+        if not job.profile_file:
+            raise Http404("This job has no profile.")
+        return FileResponse(job.profile_file.open("rb"), as_attachment=True, filename=f"dataset-job-{job.id}.prof")
+
+    @action(detail=True, methods=["get"], renderer_classes=[JSONRenderer, EventStreamRenderer])
+    def events(self, request, *args, **kwargs):
+        """
+        Stream the progress of a job as server-sent events, pushed as the job is saved instead of polled.
+
+        GET /api/dataset/<id>/events/
+
+        The stream starts with a `job` event with the job's current state and an `archive` event per ZIP file of a batch
+        job. It then sends the same events whenever they change, and ends once the job has completed or failed. Clients
+        using EventSource should close it when they receive a finished job, or it reconnects.
+        """
+        job = get_object_or_404(DatasetJob.objects.filter(reextraction=False).only("id"), id=kwargs["id"])
+        # Under ASGI, the response is streamed from the event loop, so it needs an async iterator
+        stream = ajob_event_stream(job.id) if is_asgi_request(request) else job_event_stream(job.id)
+
+        response = StreamingHttpResponse(stream, content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        # Keep nginx from buffering the events
+        response["X-Accel-Buffering"] = "no"
+        return response
@@ -0,0 +1,34 @@
+import os
+
+from rest_framework import status, viewsets
+from rest_framework.response import Response
+from rest_framework_api_key.permissions import HasAPIKey
+
+from rest_api.metrics import registry
+
+
+class MetricsViewSet(viewsets.ViewSet):
+    """
+    ViewSet for the request metrics of the REST API.
+
+    Metrics are kept by each process, so the response only covers the requests served by the process that answers it.
+    """
+
+    permission_classes = [HasAPIKey]
+
+    def list(self, request):
+        """
+        Get the latency, query and response size metrics of every endpoint.
+
+        GET /api/metrics/
+        """
+        return Response({"pid": os.getpid(), **registry.snapshot()})
+
+    def create(self, request):
+        """
+        Reset the metrics of this process.
+
+        POST /api/metrics/
+        """
+        registry.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -1,8 +1,68 @@
-from rest_framework import viewsets
+from datetime import date
+
+from django.db.models import Exists, OuterRef, QuerySet
+from django.http import QueryDict
+from rest_framework import serializers, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.filters import OrderingFilter
 from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+
+from organizations.financial_metrics import DERIVED_METRICS
+from organizations.models import Organization, OrganizationReturnInformation
+from organizations.rankings import get_percentile_ranks
+from organizations.search import search_organizations
+from rest_api.pagination import StandardPagination
+from rest_api.serializers.organizations.companies import CompanySerializer, CompanySummarySerializer
+
+# Query params of filter_companies, with the field that validates each of them. Floats must be finite.
+COMPANY_FILTER_FIELDS = {
+    "tax_year": serializers.IntegerField(min_value=1, max_value=9998),
+    **{f"{bound}_{metric}": serializers.FloatField() for metric in DERIVED_METRICS for bound in ["min", "max"]},
+}
+
+
+def filter_companies(queryset: QuerySet[Organization], query_params: QueryDict) -> QuerySet[Organization]:
+    """
+    Filter companies on the derived metrics of their latest return, and on the tax years they filed a return for.
 
-from organizations.models import Organization
-from rest_api.serializers.organizations.companies import CompanySerializer
+    Each metric can be bounded with `min_<metric>` and `max_<metric>` query params, e.g. `min_profit_margin=0.1`.
+    Companies whose metric is undefined are excluded by either bound. `tax_year=2023` keeps the companies with a return
+    for a tax period ending in 2023. Blank query params are ignored.
+
+    Raises:
+        ValidationError: If a query param is not a valid number, with the error of each invalid query param
+    """
+    values = {}
+    errors = {}
+    for name, field in COMPANY_FILTER_FIELDS.items():
+        value = query_params.get(name)
+        if not value:
+            continue
+        try:
+            values[name] = field.run_validation(value)
+        except serializers.ValidationError as e:
+            errors[name] = e.detail
+    if errors:
+        raise serializers.ValidationError(errors)
+
+    year = values.get("tax_year")
+    if year is not None:
+        # A range on the partition key rather than __year, so that only the year's partition of returns is scanned
+        returns = OrganizationReturnInformation.objects.filter(
+            organization=OuterRef("pk"),
+            tax_period_end_date__gte=date(year, 1, 1),
+            tax_period_end_date__lt=date(year + 1, 1, 1),
+        )
+        queryset = queryset.filter(Exists(returns))
+
+    for metric in DERIVED_METRICS:
+        for bound, lookup in [("min", "gte"), ("max", "lte")]:
+            value = values.get(f"{bound}_{metric}")
+            if value is not None:
+                queryset = queryset.filter(**{f"latest_{metric}__{lookup}": value})
+
+    return queryset
 
 
 class CompanyViewSet(viewsets.ReadOnlyModelViewSet):
@@ -11,3 +71,64 @@ class CompanyViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [AllowAny]
     queryset = Organization.objects.prefetch_related("returns").all().order_by("name")
     serializer_class = CompanySerializer
+    filter_backends = [OrderingFilter]
+    ordering_fields = [
+        "name",
+        "latest_tax_year",
+        "latest_employee_count",
+        "latest_total_revenue",
+        "latest_total_expenses",
+        "latest_total_assets_eoy",
+        *[f"latest_{metric}" for metric in DERIVED_METRICS],
+    ]
+    ordering = ["name"]
+
+    def filter_queryset(self, queryset):
+        return filter_companies(super().filter_queryset(queryset), self.request.query_params)
+
+    @action(detail=False, methods=["get"], pagination_class=StandardPagination)
+    def summary(self, request):
+        """
+        List companies that have filed a return with only their latest return summary.
+
+        This reads the summary columns denormalized onto Organization, so no returns are loaded.
+
+        GET /api/companies/summary/?ordering=-latest_total_revenue&min_profit_margin=0.1&tax_year=2023&page_size=50
+        """
+        queryset = self.filter_queryset(Organization.objects.filter(latest_return__isnull=False).defer("search_vector"))
+        page = self.paginate_queryset(queryset)
+        serializer = CompanySummarySerializer(page, many=True, context=self.get_serializer_context())
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=["get"], pagination_class=StandardPagination)
+    def search(self, request):
+        """
+        Search companies by name and mission description, ordered by relevance.
+
+        GET /api/companies/search/?q=food+bank&page=1&page_size=25
+        """
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            return Response({"q": ["This query parameter is required."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = search_organizations(query).prefetch_related("returns")
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=["get"])
+    def percentiles(self, request, pk=None):
+        """
+        Rank the company's returns among the returns of the same type and tax year, e.g. the 87th percentile of revenue
+        among 990EZ returns of 2023. Ranks are binary searches in the cohort's precomputed percentile index.
+
+        GET /api/companies/<id>/percentiles/?tax_year=2023
+        """
+        company = self.get_object()
+        returns = company.returns.all()
+        tax_year = request.query_params.get("tax_year")
+        if tax_year and tax_year.isdigit():
+            returns = [ret for ret in returns if ret.tax_period_end_date.year == int(tax_year)]
+
+        returns = sorted(returns, key=lambda ret: ret.tax_period_end_date, reverse=True)
+        return Response({"id": company.id, "name": company.name, "returns": get_percentile_ranks(returns)})
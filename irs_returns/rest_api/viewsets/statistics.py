@@ -0,0 +1,41 @@
+from django.db.models import QuerySet
+from django.http import QueryDict
+from rest_framework import mixins, viewsets
+from rest_framework.permissions import AllowAny
+
+from organizations.models import ReturnStatistic
+from rest_api.serializers.statistics import ReturnStatisticSerializer
+
+
+def filter_statistics(queryset: QuerySet[ReturnStatistic], query_params: QueryDict) -> QuerySet[ReturnStatistic]:
+    """Filter statistics by the `return_type`, `tax_year` and `metric` query params."""
+    return_type = query_params.get("return_type")
+    if return_type:
+        queryset = queryset.filter(return_type=return_type)
+
+    tax_year = query_params.get("tax_year")
+    if tax_year and tax_year.isdigit():
+        queryset = queryset.filter(tax_year=int(tax_year))
+
+    metric = query_params.get("metric")
+    if metric:
+        queryset = queryset.filter(metric=metric)
+
+    return queryset
+
+
+class StatisticsViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    ViewSet for aggregate return statistics.
+
+    Statistics are read from a rollup table that is refreshed after each dataset job, so requests never aggregate
+    over the returns table itself.
+
+    GET /api/stats/?return_type=990EZ&tax_year=2023&metric=total_revenue
+    """
+
+    permission_classes = [AllowAny]
+    serializer_class = ReturnStatisticSerializer
+
+    def get_queryset(self):
+        return filter_statistics(ReturnStatistic.objects.all(), self.request.query_params)